@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communities', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at'], name='community_post_expires_at_idx'),
+        ),
+    ]
@@ -134,6 +134,13 @@ class CommunityPost(ContentBase):
     
     class Meta:
         ordering = ['-is_pinned', '-created_at']
+        indexes = [
+            # Only expiring posts are indexed, for the expiry sweeper
+            models.Index(
+                fields=['expires_at'], name='community_post_expires_at_idx',
+                condition=models.Q(expires_at__isnull=False)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} in {self.community.name}"
@@ -5,7 +5,7 @@ from .models import (
     CommunityPost, CommunityInvitation, CommunityTopic
 )
 from apps.users.serializers import UserSerializer
-from apps.content.serializers import TagSerializer
+from apps.content.serializers import TagSerializer, ReactionSummaryField
 from apps.content.models import Tag
 
 User = get_user_model()
@@ -78,6 +78,7 @@ class CommunityPostSerializer(serializers.ModelSerializer):
         required=False,
         source='tags'
     )
+    reactions = ReactionSummaryField()
     
     class Meta:
         model = CommunityPost
@@ -85,12 +86,13 @@ class CommunityPostSerializer(serializers.ModelSerializer):
             'id', 'user', 'community', 'community_id', 'status', 'title',
             'body', 'url', 'is_pinned', 'visibility', 'expires_at',
             'created_at', 'updated_at', 'tags', 'tag_ids',
-            'view_count', 'engagement_score'
+            'view_count', 'engagement_score', 'reactions'
         ]
         read_only_fields = [
             'id', 'user', 'status', 'created_at', 'updated_at',
             'view_count', 'engagement_score'
         ]
+        prefetch_related = ['reaction_counters']
 
 
 class CommunityInvitationSerializer(serializers.ModelSerializer):
@@ -16,9 +16,12 @@ from .serializers import (
     CommunityPostSerializer, CommunityInvitationSerializer, CommunityTopicSerializer
 )
 from apps.interactions.models import Notification
+from apps.content import expiry
+from apps.content.view_counter import view_counter
+from socisphere.query_planner import QueryPlannerMixin, plan_queryset
 
 
-class CommunityViewSet(viewsets.ModelViewSet):
+class CommunityViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing communities."""
     serializer_class = CommunitySerializer
     permission_classes = [IsAuthenticated]
@@ -153,9 +156,12 @@ class CommunityViewSet(viewsets.ModelViewSet):
         community = self.get_object()
         
         # Get the memberships
-        memberships = CommunityMembership.objects.filter(
-            community=community, status='member'
-        ).order_by('-joined_at')
+        memberships = plan_queryset(
+            CommunityMembership.objects.filter(
+                community=community, status='member'
+            ).order_by('-joined_at'),
+            CommunityMembershipSerializer
+        )
         
         serializer = CommunityMembershipSerializer(memberships, many=True)
         return Response(serializer.data)
@@ -206,22 +212,28 @@ class CommunityViewSet(viewsets.ModelViewSet):
             )
         
         # Get approved posts
-        posts = CommunityPost.objects.filter(
-            community=community, status='approved'
-        ).order_by('-is_pinned', '-created_at')
+        posts = plan_queryset(
+            CommunityPost.objects.filter(
+                expiry.live_q(), community=community, status='approved'
+            ).order_by('-is_pinned', '-created_at'),
+            CommunityPostSerializer
+        )
         
         # If user is a moderator, include pending posts
         if user == community.creator or user in community.moderators.all():
-            pending_posts = CommunityPost.objects.filter(
-                community=community, status='pending'
-            ).order_by('-created_at')
+            pending_posts = plan_queryset(
+                CommunityPost.objects.filter(
+                    expiry.live_q(), community=community, status='pending'
+                ).order_by('-created_at'),
+                CommunityPostSerializer
+            )
             posts = list(posts) + list(pending_posts)
         
         serializer = CommunityPostSerializer(posts, many=True)
         return Response(serializer.data)
 
 
-class CommunityMembershipViewSet(viewsets.ModelViewSet):
+class CommunityMembershipViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing community memberships."""
     serializer_class = CommunityMembershipSerializer
     permission_classes = [IsAuthenticated]
@@ -269,7 +281,7 @@ class CommunityMembershipViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CommunityRuleViewSet(viewsets.ModelViewSet):
+class CommunityRuleViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing community rules."""
     serializer_class = CommunityRuleSerializer
     permission_classes = [IsAuthenticated]
@@ -297,7 +309,7 @@ class CommunityRuleViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class CommunityPostViewSet(viewsets.ModelViewSet):
+class CommunityPostViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing community posts."""
     serializer_class = CommunityPostSerializer
     permission_classes = [IsAuthenticated]
@@ -316,9 +328,17 @@ class CommunityPostViewSet(viewsets.ModelViewSet):
             (Q(community__visibility__in=['restricted', 'private']) & 
              Q(community__memberships__user=user, community__memberships__status='member'))
         ).filter(
+            expiry.live_q(),
             status='approved'
         ).distinct().order_by('-created_at')
 
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a community post and record a view of it."""
+        post = self.get_object()
+        view_counter.record(post)
+        serializer = self.get_serializer(post)
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         """Create a new post."""
         community = serializer.validated_data['community']
@@ -482,7 +502,7 @@ class CommunityPostViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CommunityInvitationViewSet(viewsets.ModelViewSet):
+class CommunityInvitationViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing community invitations."""
     serializer_class = CommunityInvitationSerializer
     permission_classes = [IsAuthenticated]
@@ -618,7 +638,7 @@ class CommunityInvitationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CommunityTopicViewSet(viewsets.ModelViewSet):
+class CommunityTopicViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing community topics."""
     serializer_class = CommunityTopicSerializer
     permission_classes = [IsAuthenticated]
@@ -650,7 +670,7 @@ class CommunityTopicViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class DiscoverCommunitiesView(generics.ListAPIView):
+class DiscoverCommunitiesView(QueryPlannerMixin, generics.ListAPIView):
     """View for discovering public communities."""
     serializer_class = CommunitySerializer
     permission_classes = [IsAuthenticated]
@@ -664,7 +684,7 @@ class DiscoverCommunitiesView(generics.ListAPIView):
         ).order_by('-members_count', '-posts_count', '-created_at')
 
 
-class RecommendedCommunitiesView(generics.ListAPIView):
+class RecommendedCommunitiesView(QueryPlannerMixin, generics.ListAPIView):
     """View for recommended communities for the user."""
     serializer_class = CommunitySerializer
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,143 @@
+import os
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Blob
+from .storage import BLOB_DIR, TEMP_DIR, blob_storage
+
+
+# Unreferenced blobs are kept this long, so uploads whose rows are not yet
+# saved and files that are re-attached soon after release survive collection.
+GC_GRACE_SECONDS = getattr(settings, 'BLOB_GC_GRACE_SECONDS', 60 * 60 * 24)
+
+BATCH_SIZE = 500
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/') and not name.startswith(f'{TEMP_DIR}/')
+
+
+def register(name, size):
+    """Record a stored blob, restarting its grace period if it is unreferenced."""
+    now = timezone.now()
+    Blob.objects.bulk_create([Blob(name=name, size=size, released_at=now)], ignore_conflicts=True)
+    Blob.objects.filter(name=name, ref_count=0).update(released_at=now)
+
+
+def file_names(instance):
+    """
+    Return the blob names an upload row references.
+
+    Values are read from ``__dict__`` so deferred fields are not fetched;
+    media rows also reference their resized variants.
+    """
+    names = []
+    value = instance.__dict__.get('file')
+    names.append(getattr(value, 'name', value))
+    for variant in instance.__dict__.get('variants') or ():
+        names.append(variant.get('name'))
+    return [name for name in names if is_blob(name)]
+
+
+def adjust(deltas):
+    """
+    Apply ``{name: delta}`` to blob reference counts.
+
+    Names sharing a delta move in one UPDATE. Counts never go below zero,
+    and a blob whose count reaches zero starts its grace period.
+    """
+    groups = defaultdict(list)
+    for name, delta in deltas.items():
+        if delta and is_blob(name):
+            groups[delta].append(name)
+
+    now = timezone.now()
+    for delta, names in groups.items():
+        updates = {'ref_count': Greatest(F('ref_count') + Value(delta), Value(0))}
+        if delta < 0:
+            updates['released_at'] = Case(
+                When(ref_count__lte=-delta, then=Value(now)),
+                default=F('released_at')
+            )
+        Blob.objects.filter(name__in=names).update(**updates)
+
+
+def retain(names):
+    """Add a reference to each of the given blobs."""
+    adjust(Counter(names))
+
+
+def release(names):
+    """Drop a reference from each of the given blobs."""
+    adjust({name: -count for name, count in Counter(names).items()})
+
+
+def track(instance, names):
+    """Move references from the names an instance was loaded with to ``names``."""
+    previous = Counter(getattr(instance, '_blob_names', ()))
+    current = Counter(names)
+    deltas = dict(current)
+    deltas.update({name: current.get(name, 0) - count for name, count in previous.items()})
+    adjust(deltas)
+    instance._blob_names = list(names)
+
+
+def collect_garbage(grace_seconds=None, batch_size=BATCH_SIZE, scan=False):
+    """
+    Delete blobs that no upload references any more.
+
+    Rows are removed in batches, and only while their count is still zero,
+    together with their files. With ``scan`` the blob directory is also
+    walked for files that have no row at all, such as leftovers from a
+    crashed upload.
+    Returns ``(blobs_removed, bytes_freed)``.
+    """
+    grace_seconds = GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    storage = blob_storage()
+    removed = freed = 0
+
+    while True:
+        with transaction.atomic():
+            orphans = list(
+                Blob.objects.select_for_update()
+                .filter(ref_count=0, released_at__lt=cutoff)
+                .values_list('id', 'name', 'size')[:batch_size]
+            )
+            if not orphans:
+                break
+            ids = [blob_id for blob_id, _, _ in orphans]
+            Blob.objects.filter(pk__in=ids, ref_count=0).delete()
+            # Blobs retained meanwhile keep their row and their file
+            kept = set(Blob.objects.filter(pk__in=ids).values_list('id', flat=True))
+            # Files go before the deletes commit: an upload of the same content
+            # waits on the rows, then finds no file and stores it again
+            for blob_id, name, size in orphans:
+                if blob_id in kept:
+                    continue
+                storage.delete(name)
+                removed += 1
+                freed += size
+        if len(orphans) < batch_size:
+            break
+
+    if scan:
+        root = storage.path(BLOB_DIR)
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                if os.path.getmtime(path) >= cutoff.timestamp():
+                    continue
+                if is_blob(name) and Blob.objects.filter(name=name).exists():
+                    continue
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+    return removed, freed
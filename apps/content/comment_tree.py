@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Comment
+
+
+# Each path segment is the comment id as fixed-width hex, so ordering by
+# path lists a thread depth-first with siblings in creation order.
+SEGMENT_WIDTH = 8
+MAX_DEPTH = Comment._meta.get_field('path').max_length // SEGMENT_WIDTH - 1
+
+# Sorts after every hex digit, closing the range of paths below a prefix.
+PATH_END = '~'
+
+PAGE_SIZE = getattr(settings, 'COMMENT_THREAD_PAGE_SIZE', 100)
+MAX_PAGE_SIZE = getattr(settings, 'COMMENT_THREAD_MAX_PAGE_SIZE', 500)
+
+
+def encode_segment(comment_id):
+    return f'{comment_id:0{SEGMENT_WIDTH}x}'
+
+
+def can_reply_to(parent):
+    """Return True if the comment can take another level of replies."""
+    return parent.depth < MAX_DEPTH
+
+
+def attach(comment):
+    """
+    Place a new comment in its thread.
+
+    Replies bump the parent's ``reply_count``; the new value is the reply's
+    position among its siblings. ``branch_rank`` is the largest position on
+    the way down from the top-level comment, so a thread cut to the first
+    ``n`` replies of every comment is exactly ``branch_rank <= n``.
+    """
+    segment = encode_segment(comment.pk)
+    if comment.parent_id is None:
+        fields = {'path': segment, 'depth': 0, 'branch_rank': 0}
+    else:
+        with transaction.atomic():
+            Comment.objects.filter(pk=comment.parent_id).update(reply_count=F('reply_count') + 1)
+            parent = Comment.objects.values('path', 'depth', 'branch_rank', 'reply_count').get(
+                pk=comment.parent_id
+            )
+        fields = {
+            'path': parent['path'] + segment,
+            'depth': parent['depth'] + 1,
+            'branch_rank': max(parent['branch_rank'], parent['reply_count']),
+        }
+
+    Comment.objects.filter(pk=comment.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(comment, name, value)
+
+
+def detach(comment):
+    """Drop a deleted reply from its parent's reply count."""
+    if comment.parent_id is not None:
+        Comment.objects.filter(pk=comment.parent_id, reply_count__gt=0).update(
+            reply_count=F('reply_count') - 1
+        )
+
+
+def thread_window(queryset, root=None, max_depth=None, max_width=None, after=None, limit=PAGE_SIZE):
+    """
+    Return one page of a comment thread in depth-first order.
+
+    ``queryset`` holds the comments of one object. With ``root`` only its
+    descendants are returned. ``max_depth`` limits how many levels below the
+    top (or below ``root``) are included, and ``max_width`` keeps only the
+    first replies of each comment, dropping the subtrees of the rest.
+    Below ``root`` it continues a window that showed ``root``: replies up to
+    the root's own ``branch_rank`` came with it, so the next ``max_width``
+    are returned. ``after`` is the cursor returned with the previous page.
+
+    Every bound is a predicate on the comment row, so the page is a single
+    range scan of the thread index. Returns ``(comments, next_cursor)``.
+    """
+    base_depth = 0
+    if root is not None:
+        queryset = queryset.filter(path__gt=root.path, path__lt=root.path + PATH_END)
+        base_depth = root.depth + 1
+    if max_depth is not None:
+        queryset = queryset.filter(depth__lt=base_depth + max_depth)
+    if max_width is not None:
+        if root is not None:
+            queryset = queryset.filter(branch_rank__gt=root.branch_rank)
+            max_width += root.branch_rank
+        queryset = queryset.filter(branch_rank__lte=max_width)
+    if after:
+        queryset = queryset.filter(path__gt=after)
+
+    comments = list(queryset.order_by('path')[:limit + 1])
+    if len(comments) > limit:
+        comments = comments[:limit]
+        return comments, comments[-1].path
+    return comments, None
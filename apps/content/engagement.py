@@ -0,0 +1,130 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, Value
+from django.db.models.functions import Exp, Ln
+from django.utils import timezone
+
+from . import trending
+from .models import Post
+
+
+# Engagement decays by half every HALF_LIFE_HOURS.
+HALF_LIFE_HOURS = getattr(settings, 'ENGAGEMENT_HALF_LIFE_HOURS', 24)
+DECAY_RATE = math.log(2) / (HALF_LIFE_HOURS * 3600)
+
+WEIGHTS = getattr(settings, 'ENGAGEMENT_WEIGHTS', {
+    'view': 0.1,
+    'reaction': 1.0,
+    'comment': 2.0,
+    'save': 3.0,
+})
+
+# Scores are stored in the log domain relative to a fixed epoch:
+#
+#     engagement_score = ln(sum(weight * exp(DECAY_RATE * (event_time - EPOCH))))
+#
+# Dividing every score by the same exp(DECAY_RATE * (now - EPOCH)) does not
+# change the ranking, so stored values never need to be decayed as time
+# passes. Recording an event is one log-add-exp UPDATE and old posts are never
+# rescanned. EPOCH only has to be in the past.
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+BATCH_SIZE = 1000
+
+
+def decay_term(weight, at):
+    """Return the log-domain contribution of ``weight`` engagement at ``at``."""
+    return math.log(weight) + DECAY_RATE * (at - EPOCH).total_seconds()
+
+
+def log_add(score, term):
+    """Numerically stable ``ln(exp(score) + exp(term))``."""
+    high, low = max(score, term), min(score, term)
+    return high + math.log1p(math.exp(low - high))
+
+
+def supports_engagement(model):
+    """Return True if the model stores an engagement score."""
+    return model is not None and any(
+        field.name == 'engagement_score' for field in model._meta.get_fields()
+    )
+
+
+def record_engagement(model, object_ids, kind, count=1, at=None):
+    """Fold ``count`` events of ``kind`` into the score of each given object."""
+    if not supports_engagement(model) or count <= 0:
+        return 0
+    if isinstance(object_ids, int):
+        object_ids = [object_ids]
+
+    at = at or timezone.now()
+    term = decay_term(WEIGHTS[kind] * count, at)
+    updated = model.objects.filter(pk__in=object_ids).update(
+        engagement_score=Value(term) + Ln(Value(1.0) + Exp(F('engagement_score') - Value(term)))
+    )
+
+    if updated and model is Post:
+        trending.record_activity(object_ids, WEIGHTS[kind] * count, at)
+    return updated
+
+
+def record_generic_engagement(instance, kind):
+    """Record engagement for a Reaction, Comment or SavedContent row."""
+    return record_engagement(
+        instance.content_type.model_class(),
+        instance.object_id,
+        kind,
+        at=instance.created_at
+    )
+
+
+def _event_sources():
+    from .models import Reaction, Comment, SavedContent
+    return [
+        (Reaction.objects.all(), 'reaction'),
+        (Comment.objects.filter(is_deleted=False), 'comment'),
+        (SavedContent.objects.all(), 'save'),
+    ]
+
+
+def recompute_scores(model, batch_size=BATCH_SIZE):
+    """
+    Recompute every score of ``model`` from the underlying events.
+
+    Events are streamed once per source table and folded per object, then
+    written back with ``bulk_update``. View counts carry no timestamps, so
+    they are credited at the post's creation time.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    scores = {}
+
+    for queryset, kind in _event_sources():
+        log_weight = math.log(WEIGHTS[kind])
+        rows = queryset.filter(content_type=content_type).values_list('object_id', 'created_at')
+        for object_id, created_at in rows.iterator(chunk_size=batch_size):
+            term = log_weight + DECAY_RATE * (created_at - EPOCH).total_seconds()
+            scores[object_id] = log_add(scores[object_id], term) if object_id in scores else term
+
+    updated = 0
+    pending = []
+    for obj in model.objects.only('id', 'created_at', 'view_count').iterator(chunk_size=batch_size):
+        score = scores.get(obj.id)
+        if obj.view_count:
+            term = decay_term(WEIGHTS['view'] * obj.view_count, obj.created_at)
+            score = term if score is None else log_add(score, term)
+        obj.engagement_score = score if score is not None else 0.0
+        pending.append(obj)
+
+        if len(pending) >= batch_size:
+            model.objects.bulk_update(pending, ['engagement_score'])
+            updated += len(pending)
+            pending = []
+
+    if pending:
+        model.objects.bulk_update(pending, ['engagement_score'])
+        updated += len(pending)
+
+    return updated
@@ -0,0 +1,121 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import ArchivedContent
+
+
+# Models swept for expired rows, as app labels.
+MODELS = getattr(settings, 'EXPIRY_MODELS', ['content.Post', 'communities.CommunityPost'])
+
+# 'delete' drops expired rows, 'archive' copies them to ArchivedContent first.
+ACTION = getattr(settings, 'EXPIRY_ACTION', 'delete')
+
+# Rows removed per transaction, and the pause between transactions that
+# lets other writers in; together they bound how long write locks are held.
+BATCH_SIZE = getattr(settings, 'EXPIRY_BATCH_SIZE', 500)
+BATCH_PAUSE = getattr(settings, 'EXPIRY_BATCH_PAUSE', 0.05)
+
+
+def live_q(now=None):
+    """Return a filter for rows that have not expired."""
+    return Q(expires_at__isnull=True) | Q(expires_at__gt=now or timezone.now())
+
+
+def is_live(obj, now=None):
+    """Return True if an object has not expired."""
+    return obj.expires_at is None or obj.expires_at > (now or timezone.now())
+
+
+def swept_models():
+    return [apps.get_model(label) for label in MODELS]
+
+
+def _expired(model, now):
+    # The comparison implies expires_at IS NOT NULL, so the partial index applies
+    return model.objects.filter(expires_at__lte=now)
+
+
+def lag(model, now=None):
+    """Return how many seconds the oldest unswept expired row is overdue, or 0."""
+    now = now or timezone.now()
+    oldest = _expired(model, now).aggregate(oldest=Min('expires_at'))['oldest']
+    return (now - oldest).total_seconds() if oldest else 0.0
+
+
+def stats(now=None):
+    """Return the number of expired rows awaiting the sweeper and its lag, per model."""
+    now = now or timezone.now()
+    return {
+        model._meta.label: {
+            'pending': _expired(model, now).count(),
+            'lag_seconds': round(lag(model, now), 3),
+        }
+        for model in swept_models()
+    }
+
+
+def _archive(model, objects):
+    content_type = ContentType.objects.get_for_model(model)
+    tags = {}
+    column = f'{model.tags.field.m2m_field_name()}_id'
+    for object_id, tag_id in model.tags.through.objects.filter(
+        **{f'{column}__in': [obj.pk for obj in objects]}
+    ).values_list(column, 'tag_id'):
+        tags.setdefault(object_id, []).append(tag_id)
+
+    ArchivedContent.objects.bulk_create([
+        ArchivedContent(
+            content_type=content_type,
+            object_id=obj.pk,
+            user_id=obj.user_id,
+            data={
+                **{field.attname: field.value_from_object(obj) for field in model._meta.concrete_fields},
+                'tags': tags.get(obj.pk, []),
+            },
+            expires_at=obj.expires_at,
+        )
+        for obj in objects
+    ])
+
+
+def sweep(model, now=None, action=None, batch_size=None, max_batches=None, pause=None, progress=None):
+    """
+    Remove a model's expired rows in bounded batches.
+
+    Each batch takes the oldest ``batch_size`` expired rows from the partial
+    ``expires_at`` index, archives them if ``action`` is ``'archive'``, and
+    deletes them in its own short transaction; cascades and delete signals
+    run as usual. ``progress`` is called with ``(model, removed, lag)``
+    after every batch. Returns the number of rows removed.
+    """
+    now = now or timezone.now()
+    action = action or ACTION
+    batch_size = batch_size or BATCH_SIZE
+    pause = BATCH_PAUSE if pause is None else pause
+
+    removed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            objects = list(_expired(model, now).order_by('expires_at', 'pk')[:batch_size])
+            if not objects:
+                break
+            if action == 'archive':
+                _archive(model, objects)
+            model.objects.filter(pk__in=[obj.pk for obj in objects]).delete()
+
+        removed += len(objects)
+        batches += 1
+        if progress:
+            progress(model, removed, lag(model, now))
+        if len(objects) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return removed
@@ -0,0 +1,86 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models.query import ModelIterable
+
+
+def _relations(model, names):
+    related = []
+    for name in names:
+        try:
+            field = model._meta.get_field(name.split('__')[0])
+        except FieldDoesNotExist:
+            continue
+        if field.is_relation and field.concrete and not field.many_to_many:
+            related.append(name)
+    return related
+
+
+def resolve(instances, field='content_object', select_related=()):
+    """
+    Load the generic foreign key ``field`` of many rows at once.
+
+    Rows are grouped by content type and each group is fetched with one
+    ``in_bulk``, so reading ``row.<field>`` afterwards does not query; rows
+    whose target is gone get None. ``select_related`` names relations to
+    join on the targets of every model that has them, such as ``user``.
+    Rows whose target is already cached are left alone.
+    """
+    instances = [instance for instance in instances if instance is not None]
+    if not instances:
+        return instances
+    gfk = instances[0]._meta.get_field(field)
+    ct_attname = instances[0]._meta.get_field(gfk.ct_field).get_attname()
+
+    wanted = defaultdict(set)
+    pending = []
+    for instance in instances:
+        if gfk.is_cached(instance):
+            continue
+        ct_id, object_id = getattr(instance, ct_attname), getattr(instance, gfk.fk_field)
+        pending.append((instance, ct_id, object_id))
+        if ct_id is not None and object_id is not None:
+            wanted[ct_id].add(object_id)
+
+    found = {}
+    for ct_id, object_ids in wanted.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is None:
+            continue
+        # The descriptor reads targets through the base manager too
+        queryset = model._base_manager.all()
+        related = _relations(model, select_related)
+        if related:
+            queryset = queryset.select_related(*related)
+        for pk, obj in queryset.in_bulk(object_ids).items():
+            found[ct_id, pk] = obj
+
+    for instance, ct_id, object_id in pending:
+        gfk.set_cached_value(instance, found.get((ct_id, object_id)))
+    return instances
+
+
+class GenericPrefetchQuerySet(models.QuerySet):
+    """QuerySet that can batch-load a generic foreign key with ``prefetch_generic()``."""
+
+    _generic_prefetch = None
+
+    def prefetch_generic(self, field='content_object', select_related=()):
+        """Resolve ``field`` for every fetched row with one query per content type."""
+        clone = self._chain()
+        clone._generic_prefetch = (field, tuple(select_related))
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._generic_prefetch = self._generic_prefetch
+        return clone
+
+    def _fetch_all(self):
+        fetched = self._result_cache is not None
+        super()._fetch_all()
+        if not fetched and self._generic_prefetch and issubclass(self._iterable_class, ModelIterable):
+            field, select_related = self._generic_prefetch
+            resolve(self._result_cache, field, select_related)
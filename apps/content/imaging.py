@@ -0,0 +1,64 @@
+# Image decoding and resizing for the media pipeline. Nothing here imports
+# Django, so process-pool workers can load the module on their own.
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+
+# Output format name -> (Pillow format, file extension)
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+
+def _flatten(image, mode):
+    """Convert to ``mode``, painting any transparency onto white for RGB."""
+    if image.mode == mode:
+        return image
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    if mode == 'RGB' and has_alpha:
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def encode(image, format_name, quality):
+    """Encode an image as ``'webp'`` or ``'jpeg'`` and return the bytes."""
+    pillow_format, _ = FORMATS[format_name]
+    if format_name == 'jpeg':
+        image = _flatten(image, 'RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = _flatten(image, 'RGBA' if 'A' in image.mode else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, pillow_format, quality=quality)
+    return buffer.getvalue()
+
+
+def render(data, widths, formats, quality):
+    """
+    Decode an image and resize it to each of ``widths``.
+
+    Widths larger than the image are capped at its own width, so the
+    original size is re-encoded rather than upscaled. Returns
+    ``{'width', 'height', 'variants'}`` where each variant holds its
+    ``width``, ``height``, ``format`` and encoded ``data``.
+    """
+    with Image.open(BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+    width, height = image.size
+
+    variants = []
+    for target in sorted({min(target, width) for target in widths}):
+        size = (target, max(1, round(height * target / width)))
+        resized = image if size == image.size else image.resize(size, Image.Resampling.LANCZOS)
+        for format_name in formats:
+            variants.append({
+                'width': size[0],
+                'height': size[1],
+                'format': format_name,
+                'data': encode(resized, format_name, quality),
+            })
+    return {'width': width, 'height': height, 'variants': variants}
@@ -0,0 +1,191 @@
+import json
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Q, prefetch_related_objects
+from django.utils.text import slugify
+
+from apps.users.models import User
+
+from . import blobs, media_processing, mentions, search, timelines
+from .models import Media, Post, Tag
+from .serializers import PostIngestSerializer
+
+
+# Posts validated before they are written together.
+BATCH_SIZE = getattr(settings, 'INGEST_BATCH_SIZE', 500)
+
+# Failed lines reported in detail; later failures are only counted.
+MAX_REPORTED_ERRORS = getattr(settings, 'INGEST_MAX_REPORTED_ERRORS', 100)
+
+
+class IngestReport:
+    """Running totals of a bulk import."""
+
+    def __init__(self):
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        """Created posts per second."""
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def fail(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def tick(self):
+        self.elapsed = time.monotonic() - self.started
+
+    def as_dict(self):
+        return {
+            'received': self.received,
+            'created': self.created,
+            'failed': self.failed,
+            'elapsed': round(self.elapsed, 3),
+            'posts_per_second': round(self.rate, 1),
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+        }
+
+
+def ingest_lines(lines, batch_size=BATCH_SIZE, progress=None):
+    """
+    Import posts from NDJSON lines, one JSON object per line.
+
+    Lines are validated with :class:`PostIngestSerializer` and written in
+    batches: one ``bulk_create`` each for posts, tag links and media, one
+    username lookup for mentions and one insert for their notifications.
+    Invalid lines are skipped and reported; if a batch fails to write, its
+    posts are retried one at a time so only the bad rows are lost.
+    ``progress`` is called with the report after every batch.
+    """
+    report = IngestReport()
+    batch = []
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if not line.strip():
+            continue
+        report.received += 1
+
+        try:
+            data = json.loads(line)
+        except ValueError as error:
+            report.fail(number, {'detail': [f"Invalid JSON: {error}"]})
+            continue
+        serializer = PostIngestSerializer(data=data)
+        if not serializer.is_valid():
+            report.fail(number, serializer.errors)
+            continue
+
+        batch.append((number, serializer.validated_data))
+        if len(batch) >= batch_size:
+            _write_batch(batch, report)
+            batch = []
+            report.tick()
+            if progress:
+                progress(report)
+
+    if batch:
+        _write_batch(batch, report)
+    report.tick()
+    if progress:
+        progress(report)
+    return report
+
+
+def _write_batch(batch, report):
+    users = User.objects.in_bulk({data['user'] for _, data in batch})
+    rows = []
+    for number, data in batch:
+        if data['user'] in users:
+            rows.append((number, data))
+        else:
+            report.fail(number, {'user': ["Unknown user."]})
+    if not rows:
+        return
+
+    try:
+        with transaction.atomic():
+            _create_posts(rows, users)
+        report.created += len(rows)
+    except DatabaseError as error:
+        if len(rows) == 1:
+            report.fail(rows[0][0], {'detail': [str(error)]})
+            return
+        for row in rows:
+            _write_batch([row], report)
+
+
+def _tags_by_slug(names):
+    slugs = {slugify(name): name for name in names}
+    tags = {tag.slug: tag for tag in Tag.objects.filter(slug__in=slugs)}
+    missing = {slug: name for slug, name in slugs.items() if slug not in tags}
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slug) for slug, name in missing.items()], ignore_conflicts=True
+        )
+        # A name may already belong to a tag with another slug, whose insert was skipped
+        by_name = {}
+        for tag in Tag.objects.filter(Q(slug__in=missing) | Q(name__in=missing.values())):
+            if tag.slug in missing:
+                tags[tag.slug] = tag
+            else:
+                by_name[tag.name] = tag
+        for slug, name in missing.items():
+            if slug not in tags:
+                tags[slug] = by_name[name]
+    return tags
+
+
+def _create_posts(rows, users):
+    posts = [
+        Post(
+            user=users[data['user']],
+            title=data['title'],
+            body=data['body'],
+            visibility=data['visibility'],
+            expires_at=data['expires_at'],
+        )
+        for _, data in rows
+    ]
+    Post.objects.bulk_create(posts)
+
+    # created_at is auto_now_add, so imported timestamps are written afterwards
+    dated = []
+    for post, (_, data) in zip(posts, rows):
+        if data['created_at']:
+            post.created_at = data['created_at']
+            dated.append(post)
+    if dated:
+        Post.objects.bulk_update(dated, ['created_at'])
+
+    tags = _tags_by_slug({name for _, data in rows for name in data['tags']})
+    PostTag = Post.tags.through
+    PostTag.objects.bulk_create([
+        PostTag(post_id=post.pk, tag_id=tag_id)
+        for post, (_, data) in zip(posts, rows)
+        for tag_id in dict.fromkeys(tags[slugify(name)].pk for name in data['tags'])
+    ])
+    media = Media.objects.bulk_create([
+        Media(post=post, position=position, **item)
+        for post, (_, data) in zip(posts, rows)
+        for position, item in enumerate(data['media'])
+    ])
+
+    # bulk_create skips the post_save handlers, so their work is done in batch
+    for item in media:
+        item._blob_names = blobs.file_names(item)
+    blobs.retain([name for item in media for name in item._blob_names])
+    timelines.fan_out_posts(posts)
+    mentions.notify_mentions(posts)
+    media_processing.schedule([item.pk for item in media])
+    prefetch_related_objects(posts, 'tags')
+    search.index_posts(posts)
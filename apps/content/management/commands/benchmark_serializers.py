@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+
+from socisphere.compiled_serializers import compile_serializer
+from socisphere.query_planner import plan_queryset
+
+
+TARGETS = {
+    'post': ('apps.content.serializers.PostSerializer', 'apps.content.models.Post'),
+    'notification': (
+        'apps.interactions.serializers.NotificationSerializer',
+        'apps.interactions.models.Notification'
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare list rendering throughput of DRF serializers and their compiled form'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='post')
+        parser.add_argument('--rows', type=int, default=20, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=50, help='Pages rendered per mode')
+
+    def handle(self, *args, **options):
+        serializer_path, model_path = TARGETS[options['target']]
+        serializer_class = import_string(serializer_path)
+        model = import_string(model_path)
+        queryset = model.objects.order_by('-pk')[:options['rows']]
+        compiled = compile_serializer(serializer_class)
+        renderer = JSONRenderer()
+
+        def drf():
+            page = list(plan_queryset(queryset, serializer_class))
+            return renderer.render(serializer_class(page, many=True).data)
+
+        def fast():
+            return renderer.render(compiled.render(queryset))
+
+        rows = len(queryset)
+        if not rows:
+            self.stdout.write(self.style.WARNING(f"No {options['target']} rows to benchmark"))
+            return
+        if drf() != fast():
+            self.stdout.write(self.style.ERROR("Compiled output differs from the serializer"))
+            return
+
+        for name, render in (('serializer', drf), ('compiled', fast)):
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                render()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {rows * options['repeat'] / elapsed:.0f} rows/sec"
+            ))
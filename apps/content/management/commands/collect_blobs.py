@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.content.blobs import BATCH_SIZE, GC_GRACE_SECONDS, collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete stored blobs that no upload references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=GC_GRACE_SECONDS,
+                            help='Seconds an unreferenced blob is kept before it is deleted')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Blobs deleted per transaction')
+        parser.add_argument('--scan', action='store_true',
+                            help='Also delete files in the blob directory that have no blob row')
+
+    def handle(self, *args, **options):
+        removed, freed = collect_garbage(
+            grace_seconds=options['grace'],
+            batch_size=options['batch_size'],
+            scan=options['scan'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} orphaned blobs, freeing {freed} bytes"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.content.uploads import EXPIRY_SECONDS, discard_stale
+
+
+class Command(BaseCommand):
+    help = 'Abort resumable uploads that stopped receiving chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=EXPIRY_SECONDS,
+                            help='Seconds since the last chunk after which an upload is aborted')
+
+    def handle(self, *args, **options):
+        discarded = discard_stale(max_age=options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f"Discarded {discarded} stale uploads"))
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from apps.content.ingest import BATCH_SIZE, ingest_lines
+
+
+class Command(BaseCommand):
+    help = 'Import posts in bulk from an NDJSON file, one post per line'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to import, or '-' for standard input")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Number of posts written per batch')
+
+    def handle(self, *args, **options):
+        def progress(report):
+            self.stdout.write(
+                f"{report.created} posts created, {report.failed} failed "
+                f"({report.rate:.0f} posts/sec)"
+            )
+
+        if options['path'] == '-':
+            report = ingest_lines(sys.stdin, batch_size=options['batch_size'], progress=progress)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                report = ingest_lines(lines, batch_size=options['batch_size'], progress=progress)
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']}: {error['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created} of {report.received} posts in {report.elapsed:.1f}s "
+            f"({report.rate:.0f} posts/sec)"
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from apps.content.media_processing import STALE_AFTER, process, stale_q
+from apps.content.models import Media
+
+
+class Command(BaseCommand):
+    help = 'Process pending, failed or abandoned media: dimensions and resized copies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Also retry media whose processing failed')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Process at most this many media')
+        parser.add_argument('--stale-after', type=int, default=STALE_AFTER,
+                            help='Take over media claimed by a worker this many seconds ago')
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed'] if options['retry_failed'] else ['pending']
+        media_ids = Media.objects.filter(
+            Q(status__in=statuses) | stale_q(options['stale_after'])
+        ).order_by('id').values_list('id', flat=True)
+        if options['limit']:
+            media_ids = media_ids[:options['limit']]
+
+        processed = failed = 0
+        for media_id in list(media_ids):
+            if process(media_id, stale_after=options['stale_after']):
+                processed += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} media, {failed} failed"))
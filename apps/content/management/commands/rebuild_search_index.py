@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.content.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of posts loaded per batch')
+
+    def handle(self, *args, **options):
+        backend, count = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {count} posts using the {backend} search backend")
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from apps.users.models import User
+from apps.content import timelines
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized home timelines from current follows and posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str,
+                            help='Only rebuild the timeline of this username')
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        user_count = 0
+        entry_count = 0
+        for user in users.iterator():
+            entry_count += timelines.rebuild_timeline(user)
+            user_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {user_count} timelines with {entry_count} entries")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from apps.content.engagement import recompute_scores
+from apps.content.models import Post
+from apps.communities.models import CommunityPost
+
+
+class Command(BaseCommand):
+    help = 'Recompute time-decayed engagement scores from reactions, comments, saves and views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of rows streamed and updated per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for model in (Post, CommunityPost):
+            count = recompute_scores(model, batch_size=batch_size)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Recomputed engagement scores for {count} {model._meta.verbose_name_plural}"
+                )
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.content.reactions import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recount reaction counters from the reaction table and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk write')
+
+    def handle(self, *args, **options):
+        repaired = reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} reaction counters"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.content.trending import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Recompute the trending posts and tags snapshot from hourly activity buckets'
+
+    def handle(self, *args, **options):
+        entries, pruned = refresh_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {entries} trending entries and pruned {pruned} expired buckets"
+            )
+        )
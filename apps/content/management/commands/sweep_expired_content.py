@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from apps.content import expiry
+
+
+class Command(BaseCommand):
+    help = 'Delete or archive expired posts and community posts in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--action', choices=['delete', 'archive'], default=expiry.ACTION,
+                            help='Delete expired rows, or archive them before deleting')
+        parser.add_argument('--batch-size', type=int, default=expiry.BATCH_SIZE,
+                            help='Rows removed per transaction')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop each model after this many batches')
+        parser.add_argument('--pause', type=float, default=expiry.BATCH_PAUSE,
+                            help='Seconds to wait between batches')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep sweeping until interrupted')
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        def progress(model, removed, lag):
+            self.stdout.write(f"{model._meta.label}: {removed} removed, lag {lag:.0f}s")
+
+        while True:
+            total = 0
+            for model in expiry.swept_models():
+                total += expiry.sweep(
+                    model,
+                    action=options['action'],
+                    batch_size=options['batch_size'],
+                    max_batches=options['max_batches'],
+                    pause=options['pause'],
+                    progress=progress,
+                )
+            self.stdout.write(self.style.SUCCESS(f"Swept {total} expired rows ({options['action']})"))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
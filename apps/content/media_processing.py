@@ -0,0 +1,136 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import blobs, imaging
+from .models import Media
+
+
+logger = logging.getLogger(__name__)
+
+# Widths of the resized copies made for every image, and their formats.
+THUMBNAIL_WIDTHS = getattr(settings, 'MEDIA_THUMBNAIL_WIDTHS', [320, 640, 1280])
+THUMBNAIL_FORMATS = getattr(settings, 'MEDIA_THUMBNAIL_FORMATS', ['webp', 'jpeg'])
+THUMBNAIL_QUALITY = getattr(settings, 'MEDIA_THUMBNAIL_QUALITY', 80)
+VARIANT_DIR = getattr(settings, 'MEDIA_VARIANT_DIR', 'post_media/variants')
+
+# Decode in worker processes, coordinated from threads off the request path.
+ASYNC = getattr(settings, 'MEDIA_PROCESSING_ASYNC', True)
+WORKERS = getattr(settings, 'MEDIA_PROCESSING_WORKERS', 2)
+TIMEOUT = getattr(settings, 'MEDIA_PROCESSING_TIMEOUT', 60)
+# Seconds after which a claim is presumed abandoned by a worker that died
+STALE_AFTER = getattr(settings, 'MEDIA_PROCESSING_STALE_AFTER', 60 * 15)
+
+_coordinator = None
+_pool = None
+
+
+def _process_pool():
+    global _pool
+    if _pool is None:
+        # Spawned workers only import the Django-free imaging module
+        _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _render(data):
+    args = (data, THUMBNAIL_WIDTHS, THUMBNAIL_FORMATS, THUMBNAIL_QUALITY)
+    if not ASYNC:
+        return imaging.render(*args)
+    return _process_pool().submit(imaging.render, *args).result(timeout=TIMEOUT)
+
+
+def stale_q(stale_after=None):
+    """Return a filter for rows claimed more than ``stale_after`` seconds ago and never finished."""
+    stale_after = STALE_AFTER if stale_after is None else stale_after
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return Q(status='processing') & (
+        Q(processing_started_at__lt=cutoff) | Q(processing_started_at__isnull=True)
+    )
+
+
+def process(media_id, stale_after=None):
+    """
+    Decode an image, record its dimensions and store its resized copies.
+
+    The row moves from ``pending`` (or ``failed``, for retries) through
+    ``processing`` to ``ready`` or ``failed``; claiming it with a
+    conditional UPDATE keeps two workers from processing the same file.
+    A claim older than ``stale_after`` seconds is taken over, so rows left
+    by a worker that died are not stuck. Other media types are marked
+    ready as they are. Returns True on success.
+    """
+    claimed = Media.objects.filter(
+        Q(status__in=['pending', 'failed']) | stale_q(stale_after), pk=media_id
+    ).update(status='processing', processing_started_at=timezone.now())
+    if not claimed:
+        return False
+    media = Media.objects.get(pk=media_id)
+    if media.type != 'image':
+        Media.objects.filter(pk=media_id).update(status='ready')
+        return True
+
+    try:
+        with media.file.open('rb') as source:
+            result = _render(source.read())
+        variants = []
+        for variant in result['variants']:
+            _, extension = imaging.FORMATS[variant['format']]
+            name = media.file.storage.save(
+                f"{VARIANT_DIR}/{media.pk}/{variant['width']}w.{extension}",
+                ContentFile(variant['data'])
+            )
+            variants.append({
+                'width': variant['width'],
+                'height': variant['height'],
+                'format': variant['format'],
+                'name': name,
+            })
+    except Exception:
+        logger.exception("Failed to process media %s", media_id)
+        Media.objects.filter(pk=media_id).update(status='failed')
+        return False
+
+    Media.objects.filter(pk=media_id).update(
+        width=result['width'],
+        height=result['height'],
+        variants=variants,
+        status='ready'
+    )
+    blobs.retain([variant['name'] for variant in variants])
+    return True
+
+
+def _run(job):
+    try:
+        job()
+    except Exception:
+        logger.exception("Media processing job failed")
+    finally:
+        close_old_connections()
+
+
+def dispatch(job):
+    """Run a processing job on a coordinator thread, or inline when ``ASYNC`` is off."""
+    global _coordinator
+    if not ASYNC:
+        job()
+        return
+    if _coordinator is None:
+        _coordinator = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='media-processing')
+    _coordinator.submit(_run, job)
+
+
+def schedule(media_ids):
+    """Process the given media once the current transaction commits."""
+    for media_id in media_ids:
+        job = partial(process, media_id)
+        transaction.on_commit(lambda job=job: dispatch(job))
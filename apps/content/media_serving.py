@@ -0,0 +1,205 @@
+import os
+import posixpath
+import re
+from email.utils import formatdate
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from . import expiry, visibility
+from .models import Media, Post
+from .storage import TEMP_DIR, blob_storage
+from .uploads import UPLOAD_DIR
+
+
+# 'direct' streams files from Django (with sendfile where the WSGI server
+# supports it); 'x-accel' and 'x-sendfile' hand the transfer to the front
+# server through X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd).
+MODE = getattr(settings, 'MEDIA_SERVE_MODE', 'direct')
+ACCEL_PREFIX = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+MAX_AGE = getattr(settings, 'MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 365)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOB_NAME_RE = re.compile(r'([0-9a-f]{64})(?:\.[^/]*)?$')
+
+# Unfinished uploads and half-written blobs are never served
+HIDDEN_DIRS = (f'{UPLOAD_DIR}/', f'{TEMP_DIR}/')
+
+
+def locate(name):
+    """Return the normalized name and filesystem path of a servable media file, or None."""
+    name = posixpath.normpath(name)
+    if name.startswith(('../', '/')) or name == '..' or name.startswith(HIDDEN_DIRS):
+        return None
+    try:
+        path = blob_storage().path(name)
+    except SuspiciousFileOperation:
+        return None
+    return (name, path) if os.path.isfile(path) else None
+
+
+def _public_posts_q():
+    return Q(visibility='public') & expiry.live_q()
+
+
+def is_private(name):
+    """
+    Return True if the file is attached to a message or to a post not everyone can see.
+
+    Files on a live public post, or attached to nothing, are public.
+    """
+    from apps.interactions.models import MessageAttachment, ConversationMessageAttachment
+    if Post.objects.filter(_public_posts_q(), media__file=name).exists():
+        return False
+    return (
+        Media.objects.filter(file=name).exists()
+        or MessageAttachment.objects.filter(file=name).exists()
+        or ConversationMessageAttachment.objects.filter(file=name).exists()
+    )
+
+
+def can_access(user, name):
+    """
+    Return True if ``user`` may download a private file.
+
+    Deduplicated blobs can be shared, so a file is readable by anyone who
+    can see one of the posts or read one of the messages it is attached to.
+    """
+    from apps.interactions.models import MessageAttachment, ConversationMessageAttachment
+    if not user.is_authenticated:
+        return False
+    return (
+        Post.objects.filter(visibility.visible_posts_q(user), media__file=name).exists()
+        or MessageAttachment.objects.filter(file=name).filter(
+            Q(message__sender=user) | Q(message__recipient=user)
+        ).exists()
+        or ConversationMessageAttachment.objects.filter(
+            file=name, message__conversation__participants=user
+        ).exists()
+    )
+
+
+def etag_for(name, stat):
+    """Blob names carry their SHA-256, so their ETag is free; other files use size and mtime."""
+    match = BLOB_NAME_RE.search(name)
+    if match:
+        return quote_etag(match.group(1))
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` for a single-range ``Range`` header, inclusive.
+
+    Returns None for a header to ignore (malformed, or several ranges, which
+    are answered with the whole file) and raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFile:
+    """
+    A file positioned at the start of a range that reads no further than its end.
+
+    ``fileno`` is exposed so WSGI servers can still ``sendfile`` from the
+    current offset, limited by the response's Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def serve(request, name, path, private=False):
+    """Answer a GET or HEAD for the media file at ``path``."""
+    stat = os.stat(path)
+    etag = etag_for(name, stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, name, path, stat.st_size, etag)
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+    response.headers['Cache-Control'] = f"{'private' if private else 'public'}, max-age={MAX_AGE}"
+    return response
+
+
+def _file_response(request, name, path, size, etag):
+    if MODE == 'x-accel':
+        response = HttpResponse()
+        response.headers['X-Accel-Redirect'] = ACCEL_PREFIX + quote(name)
+        return _without_content_type(response)
+    if MODE == 'x-sendfile':
+        response = HttpResponse()
+        response.headers['X-Sendfile'] = path
+        return _without_content_type(response)
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file)
+        response.headers['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206)
+        response.headers['Content-Length'] = end - start + 1
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _without_content_type(response):
+    # The front server sets the type of the file it sends
+    del response.headers['Content-Type']
+    return response
@@ -0,0 +1,128 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.users.models import User
+
+
+logger = logging.getLogger(__name__)
+
+MENTION_RE = re.compile(r'@(\w+)')
+
+# Deliver notifications on worker threads instead of the request thread.
+ASYNC = getattr(settings, 'MENTION_NOTIFY_ASYNC', True)
+WORKERS = getattr(settings, 'MENTION_NOTIFY_WORKERS', 2)
+
+_executor = None
+
+
+def extract_usernames(text):
+    """Return the set of usernames mentioned with ``@`` in a text."""
+    return set(MENTION_RE.findall(text)) if text else set()
+
+
+def resolve(usernames):
+    """
+    Return ``{username: user_id}`` for the usernames that exist, with one query.
+
+    Not cached: a per-process cache would keep resolving renamed and newly
+    registered usernames wrongly in other workers.
+    """
+    if not usernames:
+        return {}
+    return dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+
+def _notifications(author_id, author_username, usernames, user_ids):
+    from apps.interactions.models import Notification
+
+    return [
+        Notification(
+            recipient_id=user_ids[username],
+            notification_type='mention',
+            title='You were mentioned',
+            message=f"{author_username} mentioned you in a post."
+        )
+        for username in sorted(usernames)
+        # Don't notify the author
+        if username in user_ids and user_ids[username] != author_id
+    ]
+
+
+def deliver(author_id, author_username, usernames):
+    """Notify the mentioned users with one ``bulk_create``."""
+    from apps.interactions import notification_counter, notification_stream
+    from apps.interactions.models import Notification
+
+    notifications = _notifications(author_id, author_username, usernames, resolve(usernames))
+    if notifications:
+        Notification.objects.bulk_create(notifications)
+        # bulk_create sends no post_save, so count them and push them to open streams here
+        notification_counter.count_new(notifications)
+        notification_stream.publish_notifications_on_commit(notifications)
+    return len(notifications)
+
+
+def notify_mentions(posts):
+    """
+    Notify everyone mentioned in the given posts.
+
+    Mentions across all posts are resolved with one lookup and the
+    notifications are inserted with one ``bulk_create``. Each post's
+    ``user`` should already be loaded.
+    """
+    from apps.interactions import notification_counter, notification_stream
+    from apps.interactions.models import Notification
+
+    mentioned = [(post, extract_usernames(post.body)) for post in posts]
+    user_ids = resolve(set().union(*(usernames for _, usernames in mentioned)))
+
+    notifications = [
+        notification
+        for post, usernames in mentioned
+        for notification in _notifications(post.user_id, post.user.username, usernames, user_ids)
+    ]
+    if notifications:
+        Notification.objects.bulk_create(notifications)
+        # bulk_create sends no post_save, so count them and push them to open streams here
+        notification_counter.count_new(notifications)
+        notification_stream.publish_notifications_on_commit(notifications)
+    return len(notifications)
+
+
+def _run(job):
+    try:
+        job()
+    except Exception:
+        logger.exception("Failed to deliver mention notifications")
+    finally:
+        close_old_connections()
+
+
+def dispatch(job):
+    """Run a delivery job on the worker pool, or inline when ``ASYNC`` is off."""
+    global _executor
+    if not ASYNC:
+        job()
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='mention-notify')
+    _executor.submit(_run, job)
+
+
+def queue_post_mentions(post):
+    """
+    Notify the users mentioned in a new post once its transaction commits.
+
+    Only the regex runs on the request thread; resolving names and inserting
+    notifications happen after commit, off the request thread.
+    """
+    usernames = extract_usernames(post.body)
+    if not usernames:
+        return
+    job = partial(deliver, post.user_id, post.user.username, usernames)
+    transaction.on_commit(lambda: dispatch(job))
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.20 on 2026-10-18 03:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('tag', 'Tag')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('object_id', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['kind', 'rank'],
+                'unique_together': {('kind', 'rank')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PostActivityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('score', models.FloatField(default=0.0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_buckets', to='content.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='activity_bucket_hour_idx')],
+                'unique_together': {('post', 'hour')},
+            },
+        ),
+    ]
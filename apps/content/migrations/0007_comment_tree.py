@@ -0,0 +1,69 @@
+# Generated by Django 4.2.20 on 2026-10-18 04:09
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    """Fill in paths, depths, branch ranks and reply counts level by level."""
+    Comment = apps.get_model('content', 'Comment')
+    parents = {}
+    depth = 0
+    level = Comment.objects.filter(parent__isnull=True).order_by('id')
+    while True:
+        comments = list(level)
+        if not comments:
+            break
+        positions = {}
+        for comment in comments:
+            parent = parents.get(comment.parent_id)
+            if parent is None:
+                comment.path, comment.depth, comment.branch_rank = f'{comment.id:08x}', 0, 0
+            else:
+                positions[parent.id] = positions.get(parent.id, 0) + 1
+                comment.path = parent.path + f'{comment.id:08x}'
+                comment.depth = parent.depth + 1
+                comment.branch_rank = max(parent.branch_rank, positions[parent.id])
+        for parent_id, count in positions.items():
+            parents[parent_id].reply_count = count
+        Comment.objects.bulk_update(list(parents.values()), ['reply_count'], batch_size=500)
+        Comment.objects.bulk_update(comments, ['path', 'depth', 'branch_rank'], batch_size=500)
+        parents = {comment.id: comment for comment in comments}
+        level = Comment.objects.filter(
+            path='', parent__path__gt='', parent__depth=depth
+        ).order_by('id')
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='branch_rank',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_type', 'object_id', 'path'], name='comment_thread_path_idx'),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
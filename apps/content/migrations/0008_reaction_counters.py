@@ -0,0 +1,53 @@
+# Generated by Django 4.2.20 on 2026-10-18 04:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_reactions(apps, schema_editor):
+    """Build counters for reactions that predate them."""
+    Reaction = apps.get_model('content', 'Reaction')
+    ReactionCounter = apps.get_model('content', 'ReactionCounter')
+    counters = {}
+    totals = Reaction.objects.values('content_type_id', 'object_id', 'reaction_type').annotate(
+        total=models.Count('id')
+    ).order_by()
+    for row in totals:
+        key = (row['content_type_id'], row['object_id'])
+        counter = counters.setdefault(
+            key, ReactionCounter(content_type_id=key[0], object_id=key[1])
+        )
+        field = f"{row['reaction_type']}_count"
+        if hasattr(counter, field):
+            setattr(counter, field, row['total'])
+    ReactionCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('content', '0007_comment_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('love_count', models.PositiveIntegerField(default=0)),
+                ('laugh_count', models.PositiveIntegerField(default=0)),
+                ('sad_count', models.PositiveIntegerField(default=0)),
+                ('angry_count', models.PositiveIntegerField(default=0)),
+                ('wow_count', models.PositiveIntegerField(default=0)),
+                ('support_count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(count_reactions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-18 04:56
+
+import apps.content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='media',
+            name='file',
+            field=models.FileField(db_index=True, storage=apps.content.storage.blob_storage, upload_to='post_media/'),
+        ),
+    ]
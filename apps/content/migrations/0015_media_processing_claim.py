@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_media_file_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,13 +1,17 @@
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from apps.users.models import User
 
+from .generic import GenericPrefetchQuerySet, resolve
+from .storage import blob_storage
+
 
 class Tag(models.Model):
     """
@@ -45,6 +49,8 @@ class ContentBase(models.Model):
     # Content decay
     expires_at = models.DateTimeField(null=True, blank=True)
     
+    reaction_counters = GenericRelation('content.ReactionCounter')
+    
     class Meta:
         abstract = True
 
@@ -73,6 +79,15 @@ class Post(ContentBase):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_created_id_idx'),
+            # Only expiring posts are indexed, for the expiry sweeper
+            models.Index(
+                fields=['expires_at'], name='post_expires_at_idx',
+                condition=models.Q(expires_at__isnull=False)
+            ),
+        ]
 
 
 class Media(models.Model):
@@ -88,7 +103,7 @@ class Media(models.Model):
         ('document', _('Document')),
     ]
     type = models.CharField(max_length=10, choices=TYPE_CHOICES)
-    file = models.FileField(upload_to='post_media/')
+    file = models.FileField(upload_to='post_media/', storage=blob_storage, db_index=True)
     
     # For images/videos
     alt_text = models.CharField(max_length=255, blank=True)
@@ -98,6 +113,20 @@ class Media(models.Model):
     # For sorting multiple media items
     position = models.PositiveSmallIntegerField(default=0)
     
+    # Background processing fills in dimensions and resized copies
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('processing', _('Processing')),
+        ('ready', _('Ready')),
+        ('failed', _('Failed')),
+    ]
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # When a worker claimed the row, so claims left by dead workers can be taken over
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    
+    # Resized copies: [{"width", "height", "format", "name"}], smallest first
+    variants = models.JSONField(default=list, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -133,6 +162,8 @@ class Reaction(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = GenericPrefetchQuerySet.as_manager()
+    
     class Meta:
         unique_together = ('user', 'content_type', 'object_id')
     
@@ -140,6 +171,30 @@ class Reaction(models.Model):
         return f"{self.user.username} {self.reaction_type}d {self.content_object}"
 
 
+class ReactionCounter(models.Model):
+    """
+    Per-type reaction totals for one piece of content.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    
+    # One counter per Reaction.REACTION_CHOICES type
+    like_count = models.PositiveIntegerField(default=0)
+    love_count = models.PositiveIntegerField(default=0)
+    laugh_count = models.PositiveIntegerField(default=0)
+    sad_count = models.PositiveIntegerField(default=0)
+    angry_count = models.PositiveIntegerField(default=0)
+    wow_count = models.PositiveIntegerField(default=0)
+    support_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+    
+    def __str__(self):
+        return f"Reaction counts for {self.content_type.model} {self.object_id}"
+
+
 class Comment(models.Model):
     """
     Comments on content.
@@ -167,11 +222,24 @@ class Comment(models.Model):
     # For soft deletion
     is_deleted = models.BooleanField(default=False)
     
+    # Materialized thread position, maintained by apps.content.comment_tree
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    branch_rank = models.PositiveIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    reaction_counters = GenericRelation('content.ReactionCounter')
+    
+    objects = GenericPrefetchQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.user.username}'s comment on {self.content_object}"
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'path'], name='comment_thread_path_idx'),
+        ]
 
 
 class SavedContent(models.Model):
@@ -187,6 +255,8 @@ class SavedContent(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = GenericPrefetchQuerySet.as_manager()
+    
     class Meta:
         unique_together = ('user', 'content_type', 'object_id')
     
@@ -194,68 +264,206 @@ class SavedContent(models.Model):
         return f"{self.user.username} saved {self.content_object}"
 
 
+class TimelineEntry(models.Model):
+    """
+    Materialized home timeline row: a post fanned out to one follower's feed.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+
+    # Denormalized from the post so unfollows and page reads stay on this table
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='timeline_user_created_idx'),
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+        verbose_name_plural = 'timeline entries'
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.user_id}'s timeline"
+
+
+class PostActivityBucket(models.Model):
+    """
+    Engagement received by a post during one hour, used for trending windows.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='activity_buckets')
+    hour = models.DateTimeField()
+    score = models.FloatField(default=0.0)
+
+    class Meta:
+        unique_together = ('post', 'hour')
+        indexes = [
+            models.Index(fields=['hour'], name='activity_bucket_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} activity at {self.hour}"
+
+
+class TrendingSnapshot(models.Model):
+    """
+    Precomputed top-K trending posts and tags, ready to serve.
+    """
+    KIND_CHOICES = [
+        ('post', _('Post')),
+        ('tag', _('Tag')),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    object_id = models.PositiveIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('kind', 'rank')
+        ordering = ['kind', 'rank']
+
+    def __str__(self):
+        return f"Trending {self.kind} #{self.rank}: {self.object_id}"
+
+
+class SearchDocument(models.Model):
+    """
+    Per-post statistics for the pure-Python search index.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    length = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"Search document for post {self.post_id}"
+
+
+class SearchPosting(models.Model):
+    """
+    Inverted-index posting: how often a term occurs in a post.
+    """
+    term = models.CharField(max_length=100, db_index=True)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    frequency = models.FloatField()
+
+    class Meta:
+        unique_together = ('term', 'document')
+
+    def __str__(self):
+        return f"{self.term} in post {self.document_id}"
+
+
+class Blob(models.Model):
+    """
+    A stored file shared by every upload with the same content.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    size = models.PositiveBigIntegerField()
+    
+    # Uploads referencing the blob; unreferenced blobs are garbage collected
+    ref_count = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['released_at'], name='blob_orphan_idx',
+                condition=models.Q(ref_count=0)
+            ),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+
+class Upload(models.Model):
+    """
+    A file being uploaded in chunks, attached to its target once complete.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploads')
+
+    TARGET_CHOICES = [
+        ('message', _('Message')),
+        ('conversation_message', _('Conversation message')),
+        ('post', _('Post')),
+    ]
+    target_type = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    target_id = models.PositiveIntegerField()
+
+    type = models.CharField(max_length=10, choices=Media.TYPE_CHOICES)
+    file_name = models.CharField(max_length=255)
+    file_size = models.PositiveBigIntegerField()  # in bytes, declared up front
+
+    # Bytes written so far; the next chunk must start here
+    received = models.PositiveBigIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.received}/{self.file_size} bytes)"
+
+
+class ArchivedContent(models.Model):
+    """
+    Copy of an expired post kept after the sweeper removed it from the live tables.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_content')
+    
+    # Column values of the removed row, plus its tag ids
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    
+    expires_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'archived content'
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='archived_content_object_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived {self.content_type.model} {self.object_id}"
+
+
 # Signal handlers
 
 @receiver(post_save, sender=Comment)
 def create_comment_notification(sender, instance, created, **kwargs):
     """Create a notification when a user comments on content."""
     if created and not instance.is_deleted:
+        # Loads the target and its author in one query
+        resolve([instance], select_related=['user'])
         content_object = instance.content_object
         
         # Only notify if the content object has a user attribute (like Post)
         if hasattr(content_object, 'user') and content_object.user != instance.user:
-            from apps.interactions.models import Notification
+            from apps.interactions.coalescing import Event, record
             
-            Notification.objects.create(
-                recipient=content_object.user,
+            # Comments on the same content within the coalescing window share one notification
+            record([Event(
+                recipient_id=content_object.user_id,
                 notification_type='comment',
                 title='New Comment',
-                message=f"{instance.user.username} commented on your post: {content_object.title if hasattr(content_object, 'title') and content_object.title else content_object.body[:50]}"
-            )
+                action=f"commented on your post: {content_object.title if hasattr(content_object, 'title') and content_object.title else content_object.body[:50]}",
+                actor=instance.user,
+                target=content_object
+            )])
 
 @receiver(post_save, sender=Post)
 def create_mention_notification(sender, instance, created, **kwargs):
     """Create a notification when a user is mentioned in a post."""
-    if created and hasattr(instance, 'body'):
-        # Extract usernames mentioned with @
-        import re
-        mentioned_usernames = re.findall(r'@(\w+)', instance.body)
-        
-        if mentioned_usernames:
-            # Get unique usernames
-            mentioned_usernames = set(mentioned_usernames)
-            
-            # Get users that match the usernames
-            from apps.users.models import User
-            mentioned_users = User.objects.filter(username__in=mentioned_usernames)
-            
-            # Create notification for each mentioned user
-            from apps.interactions.models import Notification
-            for user in mentioned_users:
-                # Don't notify the author
-                if user != instance.user:
-                    Notification.objects.create(
-                        recipient=user,
-                        notification_type='mention',
-                        title='You were mentioned',
-                        message=f"{instance.user.username} mentioned you in a post."
-                    )
+    if created:
+        from .mentions import queue_post_mentions
+        queue_post_mentions(instance)
 
 @receiver(post_save, sender=Reaction)
 def create_reaction_notification(sender, instance, created, **kwargs):
     """Create a notification when a user reacts to content."""
     if created and instance.reaction_type == 'like':
-        content_object = instance.content_object
-        
-        # Only notify if the content object has a user attribute and it's not the same user
-        if hasattr(content_object, 'user') and content_object.user != instance.user:
-            from apps.interactions.models import Notification
-            
-            title = content_object.title if hasattr(content_object, 'title') and content_object.title else content_object.body[:50]
-            
-            Notification.objects.create(
-                recipient=content_object.user,
-                notification_type='like',
-                title='New Like',
-                message=f"{instance.user.username} liked your post: {title}"
-            ) 
\ No newline at end of file
+        from .reactions import notify_likes
+        notify_likes(instance.user, [(instance.content_type_id, instance.object_id)])
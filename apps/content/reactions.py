@@ -0,0 +1,386 @@
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import engagement, visibility
+from .models import Comment, Post, Reaction, ReactionCounter
+
+
+REACTION_TYPES = [reaction_type for reaction_type, _ in Reaction.REACTION_CHOICES]
+COUNTER_FIELDS = {reaction_type: f'{reaction_type}_count' for reaction_type in REACTION_TYPES}
+
+BATCH_SIZE = 1000
+
+# Largest number of reactions one batch request may apply.
+BATCH_MAX_SIZE = getattr(settings, 'REACTION_BATCH_MAX_SIZE', 100)
+
+# Columns returned by the upsert, in order.
+UPSERT_RETURNING = ('id', 'content_type_id', 'object_id', 'reaction_type', 'created_at')
+
+
+def summarize(counter):
+    """Return ``{reaction_type: count}`` for a counter row, or zeros for none."""
+    if counter is None:
+        return {reaction_type: 0 for reaction_type in REACTION_TYPES}
+    return {reaction_type: getattr(counter, field) for reaction_type, field in COUNTER_FIELDS.items()}
+
+
+def summaries(model, object_ids):
+    """Return the reaction summary of every given object of a model in one query."""
+    content_type = ContentType.objects.get_for_model(model)
+    counters = ReactionCounter.objects.filter(content_type=content_type, object_id__in=object_ids)
+    by_object = {counter.object_id: counter for counter in counters}
+    return {object_id: summarize(by_object.get(object_id)) for object_id in object_ids}
+
+
+def adjust(content_type_id, object_id, deltas):
+    """
+    Apply ``{reaction_type: delta}`` to an object's counters.
+
+    The row is created on first use and the counters move in a single
+    UPDATE, so concurrent reactions never lose increments.
+    """
+    adjust_many({(content_type_id, object_id): deltas})
+
+
+def adjust_many(deltas_by_target):
+    """
+    Apply ``{(content_type_id, object_id): {reaction_type: delta}}`` to counters.
+
+    Missing rows are created in one INSERT and targets sharing the same deltas
+    move together in one UPDATE, so a batch of likes costs two statements.
+    """
+    groups = defaultdict(list)
+    for target, deltas in deltas_by_target.items():
+        key = tuple(sorted(
+            (reaction_type, delta) for reaction_type, delta in deltas.items()
+            if delta and reaction_type in COUNTER_FIELDS
+        ))
+        if key:
+            groups[key].append(target)
+    if not groups:
+        return
+
+    ReactionCounter.objects.bulk_create(
+        [
+            ReactionCounter(content_type_id=content_type_id, object_id=object_id)
+            for targets in groups.values() for content_type_id, object_id in targets
+        ],
+        ignore_conflicts=True
+    )
+    for key, targets in groups.items():
+        updates = {
+            COUNTER_FIELDS[reaction_type]: Greatest(F(COUNTER_FIELDS[reaction_type]) + Value(delta), Value(0))
+            for reaction_type, delta in key
+        }
+        ReactionCounter.objects.filter(_targets_q(targets)).update(**updates)
+
+
+def switch(reaction, reaction_type):
+    """Change a reaction's type and move its count in one transaction."""
+    previous = reaction.reaction_type
+    if previous == reaction_type:
+        return reaction
+    with transaction.atomic():
+        Reaction.objects.filter(pk=reaction.pk).update(reaction_type=reaction_type)
+        adjust(reaction.content_type_id, reaction.object_id, {previous: -1, reaction_type: 1})
+    reaction.reaction_type = reaction_type
+    return reaction
+
+
+def _targets_q(targets):
+    return reduce(or_, (Q(content_type_id=content_type_id, object_id=object_id)
+                        for content_type_id, object_id in targets))
+
+
+def _supports_upsert():
+    """Return True if the database can upsert and delete with RETURNING."""
+    features = connection.features
+    return features.supports_update_conflicts_with_target and features.can_return_columns_from_insert
+
+
+def _upsert_row(values):
+    row = dict(zip(UPSERT_RETURNING, values))
+    created_at = row['created_at']
+    if isinstance(created_at, str):
+        created_at = parse_datetime(created_at)
+    if settings.USE_TZ and timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at, dt_timezone.utc)
+    row['created_at'] = created_at
+    return row
+
+
+def upsert(user_id, items):
+    """
+    Set the user's reaction on every ``(content_type_id, object_id, reaction_type)``.
+
+    The types the rows had before are read and locked first, then all rows
+    are written by one ``INSERT ... ON CONFLICT DO UPDATE``, in the same
+    transaction, so concurrent taps cannot trip over the unique constraint.
+    Each returned row carries the type it replaced in ``previous_type``
+    (``''`` for new rows). When an object appears more than once the last
+    item wins.
+
+    Raw statements skip model signals; callers settle counters and other side
+    effects with :func:`settle`. Returns the written rows as dicts.
+    """
+    targets = {(content_type_id, object_id): reaction_type for content_type_id, object_id, reaction_type in items}
+    if not targets:
+        return []
+
+    # Joins the caller's transaction rather than paying for a savepoint
+    with transaction.atomic(savepoint=False):
+        previous = {
+            (content_type_id, object_id): reaction_type
+            for content_type_id, object_id, reaction_type in Reaction.objects.select_for_update()
+            .filter(_targets_q(targets), user_id=user_id)
+            .values_list('content_type_id', 'object_id', 'reaction_type')
+        }
+        if not _supports_upsert():
+            rows = _upsert_fallback(user_id, targets, previous)
+        else:
+            table = connection.ops.quote_name(Reaction._meta.db_table)
+            now = connection.ops.adapt_datetimefield_value(timezone.now())
+            params = []
+            for (content_type_id, object_id), reaction_type in targets.items():
+                params += [user_id, content_type_id, object_id, reaction_type, now]
+            sql = (
+                f"INSERT INTO {table} (user_id, content_type_id, object_id, reaction_type, created_at) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(targets))} "
+                f"ON CONFLICT (user_id, content_type_id, object_id) DO UPDATE SET "
+                f"reaction_type = excluded.reaction_type "
+                f"RETURNING {', '.join(UPSERT_RETURNING)}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = [_upsert_row(values) for values in cursor.fetchall()]
+    for row in rows:
+        row['previous_type'] = previous.get((row['content_type_id'], row['object_id']), '')
+    return rows
+
+
+def _upsert_fallback(user_id, targets, previous):
+    """Row-by-row writes for :func:`upsert` on databases without ``ON CONFLICT ... RETURNING``."""
+    rows = []
+    for (content_type_id, object_id), reaction_type in targets.items():
+        lookup = {'user_id': user_id, 'content_type_id': content_type_id, 'object_id': object_id}
+        if (content_type_id, object_id) in previous:
+            Reaction.objects.filter(**lookup).update(reaction_type=reaction_type)
+        else:
+            Reaction.objects.bulk_create([Reaction(reaction_type=reaction_type, **lookup)])
+        rows.append(Reaction.objects.filter(**lookup).values(*UPSERT_RETURNING).get())
+    return rows
+
+
+def remove(user_id, targets):
+    """
+    Delete the user's reactions on every ``(content_type_id, object_id)``.
+
+    One ``DELETE ... RETURNING`` statement; like :func:`upsert` it skips model
+    signals. Returns the deleted rows as dicts.
+    """
+    targets = list(dict.fromkeys(targets))
+    if not targets:
+        return []
+    table = connection.ops.quote_name(Reaction._meta.db_table)
+    where = ' OR '.join(['(content_type_id = %s AND object_id = %s)'] * len(targets))
+    params = [user_id] + [value for target in targets for value in target]
+    columns = 'id, content_type_id, object_id, reaction_type'
+    with connection.cursor() as cursor:
+        if _supports_upsert():
+            cursor.execute(f"DELETE FROM {table} WHERE user_id = %s AND ({where}) RETURNING {columns}", params)
+            deleted = cursor.fetchall()
+        else:
+            cursor.execute(f"SELECT {columns} FROM {table} WHERE user_id = %s AND ({where})", params)
+            deleted = cursor.fetchall()
+            _delete_ids([values[0] for values in deleted])
+    return [dict(zip(('id', 'content_type_id', 'object_id', 'reaction_type'), values)) for values in deleted]
+
+
+def _delete_ids(ids):
+    if not ids:
+        return
+    table = connection.ops.quote_name(Reaction._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(ids))})", list(ids))
+
+
+def outcome(row):
+    """Return ``'created'``, ``'switched'`` or ``'unchanged'`` for an upserted row."""
+    if not row['previous_type']:
+        return 'created'
+    if row['previous_type'] != row['reaction_type']:
+        return 'switched'
+    return 'unchanged'
+
+
+def settle(user, written=(), removed=()):
+    """
+    Apply the side effects of raw reaction writes in batches.
+
+    Counters move by the net change of every row, engagement is recorded
+    for new reactions and new likes are notified in one bulk insert. This
+    is what the model signals do for reactions saved one at a time.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    created = defaultdict(list)
+    likes = []
+    for row in written:
+        target = (row['content_type_id'], row['object_id'])
+        state = outcome(row)
+        if state == 'unchanged':
+            continue
+        deltas[target][row['reaction_type']] += 1
+        if state == 'switched':
+            deltas[target][row['previous_type']] -= 1
+        else:
+            created[row['content_type_id']].append(row['object_id'])
+            if row['reaction_type'] == 'like':
+                likes.append(target)
+    for row in removed:
+        deltas[(row['content_type_id'], row['object_id'])][row['reaction_type']] -= 1
+
+    adjust_many(deltas)
+    for content_type_id, object_ids in created.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        engagement.record_engagement(model, object_ids, 'reaction')
+    notify_likes(user, likes)
+
+
+def notify_likes(actor, targets):
+    """
+    Notify the authors of every liked ``(content_type_id, object_id)``.
+
+    Likes are coalesced per target, so a post liked by many users keeps one
+    notification that counts them.
+    """
+    from apps.interactions.coalescing import Event, record
+
+    by_type = defaultdict(list)
+    for content_type_id, object_id in targets:
+        by_type[content_type_id].append(object_id)
+
+    events = []
+    for content_type_id, object_ids in by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None or not any(field.name == 'user' for field in model._meta.get_fields()):
+            continue
+        for content_object in model.objects.select_related('user').filter(pk__in=object_ids):
+            # Nobody is notified of liking their own content
+            if content_object.user_id == actor.pk:
+                continue
+            title = getattr(content_object, 'title', None) or content_object.body[:50]
+            events.append(Event(
+                recipient_id=content_object.user_id,
+                notification_type='like',
+                title='New Like',
+                action=f"liked your post: {title}",
+                actor=actor,
+                target=content_object
+            ))
+    record(events)
+
+
+def toggle(user, content_type_id, object_id, reaction_type):
+    """
+    Toggle the user's reaction on an object.
+
+    Reacting with a new type creates or switches the reaction in a single
+    upsert; repeating the current type removes it. Returns
+    ``(outcome, reaction)`` where outcome is ``'created'``, ``'switched'``
+    or ``'removed'`` and ``reaction`` is an unsaved copy of the row.
+    """
+    with transaction.atomic():
+        [row] = upsert(user.pk, [(content_type_id, object_id, reaction_type)])
+        if outcome(row) == 'unchanged':
+            _delete_ids([row['id']])
+            settle(user, removed=[row])
+            state = 'removed'
+        else:
+            settle(user, written=[row])
+            state = outcome(row)
+    reaction = Reaction(user=user, **{field: row[field] for field in UPSERT_RETURNING})
+    reaction.content_type = ContentType.objects.get_for_id(content_type_id)
+    return state, reaction
+
+
+def reactable_ids(user, model, object_ids):
+    """Return the ids among ``object_ids`` that the user may react to."""
+    if model is Post:
+        queryset = Post.objects.filter(visibility.visible_posts_q(user))
+    elif model is Comment:
+        visible_posts = Post.objects.filter(visibility.visible_posts_q(user)).values('id')
+        queryset = Comment.objects.filter(
+            Q(user=user) |
+            Q(content_type=ContentType.objects.get_for_model(Post), object_id__in=visible_posts)
+        )
+    else:
+        return set()
+    return set(queryset.filter(pk__in=object_ids).values_list('pk', flat=True))
+
+
+def apply_batch(user, items):
+    """
+    Set or clear many of the user's reactions at once.
+
+    ``items`` are ``(content_type_id, object_id, reaction_type)`` with a
+    ``None`` type clearing the reaction. Operations are idempotent rather than
+    toggles, so replaying a queue of offline taps is safe. Every set is one
+    upsert, every clear one delete. Returns ``{(content_type_id, object_id):
+    outcome}`` with ``'removed'`` or ``'absent'`` for clears.
+    """
+    wanted = {(content_type_id, object_id): reaction_type for content_type_id, object_id, reaction_type in items}
+    sets = [(*target, reaction_type) for target, reaction_type in wanted.items() if reaction_type]
+    clears = [target for target, reaction_type in wanted.items() if not reaction_type]
+
+    with transaction.atomic():
+        written = upsert(user.pk, sets)
+        removed = remove(user.pk, clears)
+        settle(user, written, removed)
+
+    results = {target: 'absent' for target in clears}
+    results.update({(row['content_type_id'], row['object_id']): 'removed' for row in removed})
+    results.update({(row['content_type_id'], row['object_id']): outcome(row) for row in written})
+    return results
+
+
+def reconcile(batch_size=BATCH_SIZE):
+    """
+    Rebuild counters from the reaction table, repairing any drift.
+
+    Returns the number of counter rows created or changed.
+    """
+    actual = defaultdict(dict)
+    totals = Reaction.objects.values('content_type_id', 'object_id', 'reaction_type').annotate(
+        total=Count('id')
+    ).order_by()
+    for row in totals:
+        if row['reaction_type'] in COUNTER_FIELDS:
+            key = (row['content_type_id'], row['object_id'])
+            actual[key][COUNTER_FIELDS[row['reaction_type']]] = row['total']
+
+    changed = []
+    for counter in ReactionCounter.objects.iterator(chunk_size=batch_size):
+        expected = actual.pop((counter.content_type_id, counter.object_id), {})
+        if any(getattr(counter, field) != expected.get(field, 0) for field in COUNTER_FIELDS.values()):
+            for field in COUNTER_FIELDS.values():
+                setattr(counter, field, expected.get(field, 0))
+            changed.append(counter)
+
+    missing = [
+        ReactionCounter(content_type_id=content_type_id, object_id=object_id, **counts)
+        for (content_type_id, object_id), counts in actual.items()
+    ]
+    with transaction.atomic():
+        ReactionCounter.objects.bulk_update(changed, list(COUNTER_FIELDS.values()), batch_size=batch_size)
+        ReactionCounter.objects.bulk_create(missing, batch_size=batch_size)
+    return len(changed) + len(missing)
@@ -0,0 +1,196 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg
+
+from .models import Post, SearchDocument, SearchPosting
+
+
+FTS_TABLE = 'content_post_fts'
+
+# Relative weight of a match in each field, shared by both backends.
+TITLE_WEIGHT = 3.0
+BODY_WEIGHT = 1.0
+TAGS_WEIGHT = 2.0
+
+MAX_CANDIDATES = getattr(settings, 'SEARCH_MAX_CANDIDATES', 500)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _post_fields(post):
+    tags = ' '.join(tag.name for tag in post.tags.all()) if post.pk else ''
+    return post.title or '', post.body or '', tags
+
+
+class FTS5SearchBackend:
+    """Search index stored in an SQLite FTS5 virtual table ranked with BM25."""
+
+    name = 'fts5'
+
+    _available = None
+
+    @classmethod
+    def is_available(cls):
+        if cls._available is None:
+            cls._available = (
+                connection.vendor == 'sqlite' and
+                FTS_TABLE in connection.introspection.table_names()
+            )
+        return cls._available
+
+    def index_post(self, post):
+        title, body, tags = _post_fields(post)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body, tags) VALUES (%s, %s, %s, %s)",
+                [post.pk, title, body, tags]
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, query, limit=MAX_CANDIDATES):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # Every token must match, as a prefix, in any column.
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, bm25({FTS_TABLE}, %s, %s, %s) AS rank "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+                [TITLE_WEIGHT, BODY_WEIGHT, TAGS_WEIGHT, match, limit]
+            )
+            # FTS5 reports BM25 as a negative number, lower is better.
+            return [(post_id, -rank) for post_id, rank in cursor.fetchall()]
+
+
+class PythonSearchBackend:
+    """Database-backed inverted index with BM25 ranking computed in Python."""
+
+    name = 'python'
+
+    k1 = 1.2
+    b = 0.75
+
+    @staticmethod
+    def is_available():
+        return True
+
+    def index_post(self, post):
+        title, body, tags = _post_fields(post)
+        frequencies = Counter()
+        for text, weight in ((title, TITLE_WEIGHT), (body, BODY_WEIGHT), (tags, TAGS_WEIGHT)):
+            for token in tokenize(text):
+                frequencies[token[:100]] += weight
+
+        with transaction.atomic():
+            document, _ = SearchDocument.objects.update_or_create(
+                post_id=post.pk,
+                defaults={'length': sum(frequencies.values())}
+            )
+            document.postings.all().delete()
+            SearchPosting.objects.bulk_create([
+                SearchPosting(term=term, document=document, frequency=frequency)
+                for term, frequency in frequencies.items()
+            ])
+
+    def remove_post(self, post_id):
+        SearchDocument.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchDocument.objects.all().delete()
+
+    def search(self, query, limit=MAX_CANDIDATES):
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+
+        total_documents = SearchDocument.objects.count()
+        average_length = SearchDocument.objects.aggregate(avg=Avg('length'))['avg'] or 1.0
+
+        scores = None
+        for token in tokens:
+            token_scores = defaultdict(float)
+            postings = SearchPosting.objects.filter(term__startswith=token).values_list(
+                'document_id', 'frequency', 'document__length'
+            )
+            for document_id, frequency, length in postings:
+                token_scores[document_id] += self._term_score(frequency, length, average_length)
+
+            matching = len(token_scores)
+            idf = math.log((total_documents - matching + 0.5) / (matching + 0.5) + 1)
+
+            if scores is None:
+                scores = {doc_id: idf * score for doc_id, score in token_scores.items()}
+            else:
+                scores = {
+                    doc_id: scores[doc_id] + idf * score
+                    for doc_id, score in token_scores.items() if doc_id in scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit]
+
+    def _term_score(self, frequency, length, average_length):
+        norm = self.k1 * (1 - self.b + self.b * length / average_length)
+        return frequency * (self.k1 + 1) / (frequency + norm)
+
+
+def get_backend():
+    """Return the configured search backend, preferring FTS5 when present."""
+    preferred = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if preferred in ('auto', 'fts5') and FTS5SearchBackend.is_available():
+        return FTS5SearchBackend()
+    return PythonSearchBackend()
+
+
+def index_post(post):
+    """Add or refresh a post in the search index."""
+    get_backend().index_post(post)
+
+
+def index_posts(posts):
+    """Add or refresh many posts, with their tags prefetched, in the search index."""
+    backend = get_backend()
+    for post in posts:
+        backend.index_post(post)
+
+
+def remove_post(post_id):
+    """Remove a post from the search index."""
+    get_backend().remove_post(post_id)
+
+
+def search_post_ids(query, limit=MAX_CANDIDATES):
+    """Return ``(post_id, score)`` candidates for a query, best match first."""
+    return get_backend().search(query, limit=limit)
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index every post from scratch."""
+    backend = get_backend()
+    backend.clear()
+    count = 0
+    for post in Post.objects.prefetch_related('tags').iterator(chunk_size=batch_size):
+        backend.index_post(post)
+        count += 1
+    return backend.name, count
@@ -1,7 +1,30 @@
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
-from .models import Tag, Post, Media, Reaction, Comment, SavedContent
+from django.utils.text import slugify
+from .models import Tag, Post, Media, Reaction, Comment, SavedContent, Upload
 from apps.users.serializers import UserSerializer
+from . import comment_tree, reactions, uploads
+
+
+class ReactionSummaryField(serializers.Field):
+    """
+    Read-only ``{reaction_type: count}`` summary of an object's reactions.
+
+    Reads the prefetched ``reaction_counters`` relation, and is batch-loaded
+    once per page by compiled serializers.
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, obj):
+        counters = obj.reaction_counters.all()
+        return reactions.summarize(counters[0] if counters else None)
+    
+    def batch_load(self, model, object_ids):
+        return reactions.summaries(model, object_ids)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -13,16 +36,45 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class TrendingTagSerializer(TagSerializer):
+    """Serializer for a tag in the trending snapshot."""
+    score = serializers.FloatField(source='trending_score', read_only=True)
+    
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['score']
+
+
+class MediaVariantsField(serializers.Field):
+    """Read-only list of a media item's resized copies with their URLs."""
+    
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, variants):
+        storage = Media._meta.get_field('file').storage
+        return [
+            {
+                'width': variant['width'],
+                'height': variant['height'],
+                'format': variant['format'],
+                'url': storage.url(variant['name']),
+            }
+            for variant in variants
+        ]
+
+
 class MediaSerializer(serializers.ModelSerializer):
     """Serializer for the Media model."""
+    variants = MediaVariantsField()
     
     class Meta:
         model = Media
         fields = [
             'id', 'post', 'type', 'file', 'alt_text',
-            'width', 'height', 'position', 'created_at'
+            'width', 'height', 'position', 'status', 'variants', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'status', 'created_at']
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -38,18 +90,68 @@ class PostSerializer(serializers.ModelSerializer):
         source='tags'
     )
     is_expired = serializers.BooleanField(read_only=True)
+    reactions = ReactionSummaryField()
     
     class Meta:
         model = Post
         fields = [
             'id', 'user', 'title', 'body', 'visibility', 'expires_at',
             'created_at', 'updated_at', 'tags', 'tag_ids', 'media',
-            'view_count', 'engagement_score', 'is_expired'
+            'view_count', 'engagement_score', 'is_expired', 'reactions'
         ]
         read_only_fields = [
             'id', 'user', 'created_at', 'updated_at',
             'view_count', 'engagement_score'
         ]
+        prefetch_related = ['reaction_counters']
+
+
+class PostIngestMediaSerializer(serializers.Serializer):
+    """One media item of an imported post; ``file`` is a path already in storage."""
+    type = serializers.ChoiceField(choices=Media.TYPE_CHOICES)
+    file = serializers.CharField(max_length=100)
+    alt_text = serializers.CharField(max_length=255, allow_blank=True, default='')
+    width = serializers.IntegerField(min_value=1, allow_null=True, default=None)
+    height = serializers.IntegerField(min_value=1, allow_null=True, default=None)
+
+
+class PostIngestSerializer(serializers.Serializer):
+    """One line of a bulk post import."""
+    user = serializers.IntegerField(min_value=1)
+    title = serializers.CharField(max_length=200, allow_blank=True, default='')
+    body = serializers.CharField()
+    visibility = serializers.ChoiceField(choices=Post.VISIBILITY_CHOICES, default='public')
+    expires_at = serializers.DateTimeField(allow_null=True, default=None)
+    created_at = serializers.DateTimeField(allow_null=True, default=None)
+    tags = serializers.ListField(child=serializers.CharField(max_length=100), default=list)
+    media = serializers.ListField(child=PostIngestMediaSerializer(), default=list)
+    
+    def validate_tags(self, value):
+        """Tags are matched by slug, so every name needs one."""
+        for name in value:
+            if not slugify(name):
+                raise serializers.ValidationError(f"Tag '{name}' has no usable slug.")
+        return value
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    """Serializer for resumable uploads; ``received`` is the offset of the next chunk."""
+    
+    class Meta:
+        model = Upload
+        fields = [
+            'id', 'target_type', 'target_id', 'type', 'file_name',
+            'file_size', 'received', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'received', 'created_at', 'updated_at']
+    
+    def validate_file_size(self, value):
+        """Check the declared size against the upload limit."""
+        if not 0 < value <= uploads.MAX_FILE_SIZE:
+            raise serializers.ValidationError(
+                f"File size must be between 1 and {uploads.MAX_FILE_SIZE} bytes."
+            )
+        return value
 
 
 class ReactionSerializer(serializers.ModelSerializer):
@@ -64,34 +166,63 @@ class ReactionSerializer(serializers.ModelSerializer):
             'reaction_type', 'created_at', 'content_type_name'
         ]
         read_only_fields = ['id', 'user', 'created_at']
+        select_related = ['content_type']
     
     def get_content_type_name(self, obj):
         """Get the name of the content type."""
         return obj.content_type.model
 
 
+class ReactionBatchItemSerializer(serializers.Serializer):
+    """One entry of a reaction batch; a null type clears the reaction."""
+    content_type = serializers.IntegerField()
+    object_id = serializers.IntegerField(min_value=1)
+    reaction_type = serializers.ChoiceField(choices=reactions.REACTION_TYPES, allow_null=True)
+    
+    def validate_content_type(self, value):
+        """Resolve the content type id from the content type cache."""
+        try:
+            return ContentType.objects.get_for_id(value)
+        except ContentType.DoesNotExist:
+            raise serializers.ValidationError("Unknown content type.")
+
+
+class ReactionBatchSerializer(serializers.Serializer):
+    """Serializer for applying many reactions in one request."""
+    reactions = serializers.ListField(
+        child=ReactionBatchItemSerializer(),
+        allow_empty=False,
+        max_length=reactions.BATCH_MAX_SIZE
+    )
+
+
 class CommentSerializer(serializers.ModelSerializer):
     """Serializer for the Comment model."""
     user = UserSerializer(read_only=True)
     content_type_name = serializers.SerializerMethodField()
-    replies_count = serializers.SerializerMethodField()
+    replies_count = serializers.IntegerField(source='reply_count', read_only=True)
+    reactions = ReactionSummaryField()
     
     class Meta:
         model = Comment
         fields = [
             'id', 'user', 'content_type', 'object_id', 'parent',
             'body', 'created_at', 'updated_at', 'is_deleted',
-            'content_type_name', 'replies_count'
+            'content_type_name', 'replies_count', 'depth', 'reactions'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'created_at', 'updated_at', 'depth']
+        select_related = ['content_type']
+        prefetch_related = ['reaction_counters']
     
     def get_content_type_name(self, obj):
         """Get the name of the content type."""
         return obj.content_type.model
     
-    def get_replies_count(self, obj):
-        """Get the count of replies to this comment."""
-        return obj.replies.count()
+    def validate_parent(self, value):
+        """Ensure the parent comment can take another level of replies."""
+        if value is not None and not comment_tree.can_reply_to(value):
+            raise serializers.ValidationError("Maximum reply depth reached.")
+        return value
 
 
 class SavedContentSerializer(serializers.ModelSerializer):
@@ -107,6 +238,8 @@ class SavedContentSerializer(serializers.ModelSerializer):
             'created_at', 'content_type_name', 'content_object_repr'
         ]
         read_only_fields = ['id', 'user', 'created_at']
+        # content_object is batch-loaded by the view's prefetch_generic()
+        select_related = ['content_type']
     
     def get_content_type_name(self, obj):
         """Get the name of the content type."""
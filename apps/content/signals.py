@@ -1 +1,166 @@
-# Content app signals will be defined here 
\ No newline at end of file
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Tag, Post, Media, Reaction, Comment, SavedContent
+from . import (
+    blobs, comment_tree, engagement, media_processing, reactions, search, timelines, visibility
+)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post_to_timelines(sender, instance, created, **kwargs):
+    """Keep followers' materialized timelines in step with the post."""
+    timelines.fan_out_post(instance)
+
+
+@receiver(post_save, sender='interactions.Connection')
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    """Copy recent posts of a newly followed user into the follower's timeline."""
+    if created:
+        timelines.backfill_follow(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_delete, sender='interactions.Connection')
+def purge_timeline_on_unfollow(sender, instance, **kwargs):
+    """Remove an unfollowed user's posts from the follower's timeline."""
+    timelines.purge_follow(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_save, sender='interactions.Connection')
+@receiver(post_delete, sender='interactions.Connection')
+def forget_visible_authors(sender, instance, **kwargs):
+    """Drop the follower's cached visible-author set when they follow or unfollow."""
+    visibility.forget(instance.follower_id)
+
+
+@receiver(post_save, sender=Reaction)
+def count_new_reaction(sender, instance, created, **kwargs):
+    """Add a new reaction to the target's counters."""
+    if created:
+        reactions.adjust(instance.content_type_id, instance.object_id, {instance.reaction_type: 1})
+
+
+@receiver(post_delete, sender=Reaction)
+def uncount_deleted_reaction(sender, instance, **kwargs):
+    """Remove a deleted reaction from the target's counters."""
+    reactions.adjust(instance.content_type_id, instance.object_id, {instance.reaction_type: -1})
+
+
+@receiver(post_save, sender=Reaction)
+def record_reaction_engagement(sender, instance, created, **kwargs):
+    """Fold a new reaction into the target's engagement score."""
+    if created:
+        engagement.record_generic_engagement(instance, 'reaction')
+
+
+@receiver(post_save, sender=Comment)
+def attach_comment_to_thread(sender, instance, created, **kwargs):
+    """Give a new comment its place in the materialized thread."""
+    if created:
+        comment_tree.attach(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def detach_comment_from_thread(sender, instance, **kwargs):
+    """Keep the parent's reply count in step with deleted replies."""
+    comment_tree.detach(instance)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_engagement(sender, instance, created, **kwargs):
+    """Fold a new comment into the target's engagement score."""
+    if created and not instance.is_deleted:
+        engagement.record_generic_engagement(instance, 'comment')
+
+
+@receiver(post_save, sender=SavedContent)
+def record_save_engagement(sender, instance, created, **kwargs):
+    """Fold a new save into the target's engagement score."""
+    if created:
+        engagement.record_generic_engagement(instance, 'save')
+
+
+@receiver(post_save, sender=Post)
+def index_post_for_search(sender, instance, **kwargs):
+    """Keep the search index in step with the post's text."""
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_search(sender, instance, **kwargs):
+    """Drop a deleted post from the search index."""
+    search.remove_post(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-index posts whose tags were added or removed."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        search.index_post(instance)
+    elif pk_set:
+        for post in Post.objects.filter(pk__in=pk_set).prefetch_related('tags'):
+            search.index_post(post)
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag(sender, instance, created, **kwargs):
+    """Re-index the posts carrying a tag after it is renamed."""
+    if not created:
+        for post in instance.posts.prefetch_related('tags'):
+            search.index_post(post)
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_deleted_tag_posts(sender, instance, **kwargs):
+    """Remember which posts carry a tag that is about to be deleted."""
+    instance._search_post_ids = list(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def reindex_deleted_tag_posts(sender, instance, **kwargs):
+    """Re-index the posts that carried a deleted tag."""
+    post_ids = getattr(instance, '_search_post_ids', [])
+    for post in Post.objects.filter(pk__in=post_ids).prefetch_related('tags'):
+        search.index_post(post)
+
+
+@receiver(post_save, sender=Media)
+def process_new_media(sender, instance, created, **kwargs):
+    """Queue new media for dimensions and resized copies."""
+    if created:
+        media_processing.schedule([instance.pk])
+
+
+UPLOAD_MODELS = (Media, 'interactions.MessageAttachment', 'interactions.ConversationMessageAttachment')
+
+
+def remember_blob_names(sender, instance, **kwargs):
+    """Remember the blobs an upload row was loaded with; new rows reference none yet."""
+    instance._blob_names = blobs.file_names(instance) if instance.pk is not None else []
+
+
+def track_blob_references(sender, instance, **kwargs):
+    """Move blob references when an upload row is saved with new files."""
+    blobs.track(instance, blobs.file_names(instance))
+
+
+def refresh_media_blob_names(sender, instance, **kwargs):
+    """Re-read a media row's variants, which processing writes behind the instance's back."""
+    variants = Media.objects.filter(pk=instance.pk).values_list('variants', flat=True).first()
+    if variants is not None:
+        instance.variants = variants
+        instance._blob_names = blobs.file_names(instance)
+
+
+def release_blob_references(sender, instance, **kwargs):
+    """Release the blobs of a deleted upload row."""
+    blobs.release(instance._blob_names)
+
+
+for upload_model in UPLOAD_MODELS:
+    post_init.connect(remember_blob_names, sender=upload_model)
+    post_save.connect(track_blob_references, sender=upload_model)
+    post_delete.connect(release_blob_references, sender=upload_model)
+pre_delete.connect(refresh_media_blob_names, sender=Media)
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+
+BLOB_DIR = getattr(settings, 'BLOB_DIR', 'blobs')
+TEMP_DIR = f'{BLOB_DIR}/tmp'
+
+
+def blob_name(hexdigest, extension=''):
+    """Return the storage name of the blob with the given SHA-256 digest."""
+    return f'{BLOB_DIR}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Filesystem storage that keeps one copy of every distinct file.
+
+    Uploads are hashed with SHA-256 while they stream to a temporary file,
+    which is then moved to ``blobs/<aa>/<bb>/<digest><ext>``. If that blob
+    already exists the temporary copy is dropped and the blob is reused.
+    Every stored blob gets a :class:`~apps.content.models.Blob` row, whose
+    reference count decides when garbage collection may remove it.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, and existing blobs are reused
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()[:16]
+        directory = self.path(TEMP_DIR)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    temp.write(chunk)
+            return self._store(temp_path, digest.hexdigest(), size, extension)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def adopt(self, path, name):
+        """
+        Move a finished file under ``location`` into the store and return its blob name.
+
+        The file is hashed where it lies and then renamed, not copied; ``name``
+        only supplies the extension.
+        """
+        extension = os.path.splitext(name)[1].lower()[:16]
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(File.DEFAULT_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        return self._store(path, digest.hexdigest(), size, extension)
+
+    def _store(self, temp_path, hexdigest, size, extension):
+        from . import blobs
+
+        name = blob_name(hexdigest, extension)
+        path = self.path(name)
+        # The row is written before the file is looked for, and garbage
+        # collection removes rows and files in one transaction, so a blob
+        # found here cannot be collected before this upload is recorded
+        with transaction.atomic():
+            blobs.register(name, size)
+            if os.path.exists(path):
+                os.remove(temp_path)
+                # A reused file counts as new for the stray-file scan
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Atomic, so concurrent uploads of the same file both end with one blob
+                os.replace(temp_path, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        return name
+
+
+_storage = None
+
+
+def blob_storage():
+    """Return the shared content-addressed storage, for ``FileField(storage=...)``."""
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage()
+    return _storage
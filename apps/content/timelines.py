@@ -0,0 +1,178 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from . import expiry
+from .models import Post, TimelineEntry
+
+
+# Authors with more followers than this are merged into feeds at read time
+# instead of being fanned out on write.
+FANOUT_MAX_FOLLOWERS = getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+
+# Number of recent posts copied into a timeline when a user follows someone.
+BACKFILL_SIZE = getattr(settings, 'TIMELINE_BACKFILL_SIZE', 100)
+
+# Number of recent public posts mixed into every feed.
+RECENT_PUBLIC_SIZE = 20
+
+BATCH_SIZE = 1000
+FEED_VISIBILITIES = ['public', 'followers']
+
+HEAVY_AUTHORS_CACHE_KEY = 'timelines:heavy_authors'
+HEAVY_AUTHORS_CACHE_TIMEOUT = 300
+
+
+def _follower_ids(author_id):
+    from apps.interactions.models import Connection
+    return Connection.objects.filter(followed_id=author_id).values_list('follower_id', flat=True)
+
+
+def heavy_author_ids():
+    """Return the set of author ids that are too popular to fan out."""
+    ids = cache.get(HEAVY_AUTHORS_CACHE_KEY)
+    if ids is None:
+        from apps.interactions.models import Connection
+        ids = set(
+            Connection.objects.values('followed_id')
+            .annotate(followers_count=Count('id'))
+            .filter(followers_count__gt=FANOUT_MAX_FOLLOWERS)
+            .values_list('followed_id', flat=True)
+        )
+        cache.set(HEAVY_AUTHORS_CACHE_KEY, ids, HEAVY_AUTHORS_CACHE_TIMEOUT)
+    return ids
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Push a post into the timelines of its author's followers."""
+    if post.visibility not in FEED_VISIBILITIES:
+        remove_post(post)
+        return 0
+
+    follower_ids = list(_follower_ids(post.user_id)[:FANOUT_MAX_FOLLOWERS + 1])
+    if len(follower_ids) > FANOUT_MAX_FOLLOWERS:
+        # Read-time merge covers this author; drop any stale fanned-out rows.
+        cache.delete(HEAVY_AUTHORS_CACHE_KEY)
+        remove_post(post)
+        return 0
+
+    _bulk_insert([
+        TimelineEntry(
+            user_id=follower_id,
+            post_id=post.id,
+            author_id=post.user_id,
+            created_at=post.created_at,
+        )
+        for follower_id in follower_ids
+    ])
+    return len(follower_ids)
+
+
+def fan_out_posts(posts):
+    """
+    Push many new posts into their followers' timelines.
+
+    Followers of every author are loaded in one query and all entries are
+    inserted together. Heavy authors are left to the read-time merge.
+    """
+    posts = [post for post in posts if post.visibility in FEED_VISIBILITIES]
+    author_ids = {post.user_id for post in posts} - heavy_author_ids()
+    if not author_ids:
+        return 0
+
+    from apps.interactions.models import Connection
+    followers = defaultdict(list)
+    for follower_id, followed_id in Connection.objects.filter(
+        followed_id__in=author_ids
+    ).values_list('follower_id', 'followed_id'):
+        followers[followed_id].append(follower_id)
+
+    entries = [
+        TimelineEntry(
+            user_id=follower_id,
+            post_id=post.id,
+            author_id=post.user_id,
+            created_at=post.created_at,
+        )
+        for post in posts
+        for follower_id in followers.get(post.user_id, ())
+    ]
+    _bulk_insert(entries)
+    return len(entries)
+
+
+def remove_post(post):
+    """Remove a post from every timeline it was fanned out to."""
+    TimelineEntry.objects.filter(post_id=post.id).delete()
+
+
+def backfill_follow(follower_id, followed_id):
+    """Copy the followed author's recent posts into the follower's timeline."""
+    if followed_id in heavy_author_ids():
+        return 0
+
+    recent_posts = Post.objects.filter(
+        expiry.live_q(),
+        user_id=followed_id,
+        visibility__in=FEED_VISIBILITIES
+    ).order_by('-created_at').values_list('id', 'created_at')[:BACKFILL_SIZE]
+
+    entries = [
+        TimelineEntry(
+            user_id=follower_id,
+            post_id=post_id,
+            author_id=followed_id,
+            created_at=created_at,
+        )
+        for post_id, created_at in recent_posts
+    ]
+    _bulk_insert(entries)
+    return len(entries)
+
+
+def purge_follow(follower_id, followed_id):
+    """Drop an unfollowed author's posts from the follower's timeline."""
+    return TimelineEntry.objects.filter(user_id=follower_id, author_id=followed_id).delete()[0]
+
+
+def rebuild_timeline(user):
+    """Rebuild a user's timeline from scratch."""
+    TimelineEntry.objects.filter(user=user).delete()
+    count = 0
+    for followed_id in user.following.values_list('followed_id', flat=True):
+        count += backfill_follow(user.id, followed_id)
+    return count
+
+
+def feed_queryset(user):
+    """
+    Return the user's home feed as a Post queryset.
+
+    Fanned-out posts are read from the user's timeline rows, while posts by
+    heavy authors and the most recent public posts are merged in at read time.
+    Each branch is an ``IN`` on the post table, so no DISTINCT is needed.
+    """
+    timeline_post_ids = TimelineEntry.objects.filter(user=user).values('post_id')
+    recent_public_ids = list(
+        Post.objects.filter(expiry.live_q(), visibility='public')
+        .order_by('-created_at')
+        .values_list('id', flat=True)[:RECENT_PUBLIC_SIZE]
+    )
+
+    feed = Q(id__in=timeline_post_ids) | Q(id__in=recent_public_ids)
+
+    heavy_ids = heavy_author_ids()
+    if heavy_ids:
+        followed_heavy_ids = list(
+            user.following.filter(followed_id__in=heavy_ids).values_list('followed_id', flat=True)
+        )
+        if followed_heavy_ids:
+            feed |= Q(user_id__in=followed_heavy_ids, visibility__in=FEED_VISIBILITIES)
+
+    return Post.objects.filter(feed, expiry.live_q()).order_by('-created_at', '-id')
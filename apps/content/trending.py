@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import expiry
+from .models import Post, Tag, PostActivityBucket, TrendingSnapshot
+
+
+WINDOW_HOURS = getattr(settings, 'TRENDING_WINDOW_HOURS', 24)
+SNAPSHOT_SIZE = getattr(settings, 'TRENDING_SNAPSHOT_SIZE', 50)
+REFRESH_SECONDS = getattr(settings, 'TRENDING_REFRESH_SECONDS', 300)
+
+REFRESH_LOCK_KEY = 'trending:refresh_lock'
+
+
+def _hour(at):
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def record_activity(post_ids, weight, at=None):
+    """Add ``weight`` to the current hourly bucket of each post."""
+    hour = _hour(at or timezone.now())
+    PostActivityBucket.objects.bulk_create(
+        [PostActivityBucket(post_id=post_id, hour=hour) for post_id in post_ids],
+        ignore_conflicts=True
+    )
+    PostActivityBucket.objects.filter(post_id__in=post_ids, hour=hour).update(
+        score=F('score') + weight
+    )
+
+
+def refresh_snapshot(now=None):
+    """
+    Merge the sliding window of hourly buckets into top-K snapshots.
+
+    Tag scores are rolled up from the same post buckets through the post's
+    tags, so writes only ever touch one bucket row per post.
+    """
+    now = now or timezone.now()
+    window_start = _hour(now) - timedelta(hours=WINDOW_HOURS - 1)
+    window = PostActivityBucket.objects.filter(
+        hour__gte=window_start,
+        post__visibility='public'
+    )
+
+    top_posts = (
+        window.values('post_id')
+        .annotate(total=Sum('score'))
+        .order_by('-total', '-post_id')[:SNAPSHOT_SIZE]
+    )
+    top_tags = (
+        window.exclude(post__tags=None)
+        .values('post__tags')
+        .annotate(total=Sum('score'))
+        .order_by('-total', 'post__tags')[:SNAPSHOT_SIZE]
+    )
+
+    entries = [
+        TrendingSnapshot(kind='post', rank=rank, object_id=row['post_id'],
+                         score=row['total'], computed_at=now)
+        for rank, row in enumerate(top_posts, start=1)
+    ]
+    entries += [
+        TrendingSnapshot(kind='tag', rank=rank, object_id=row['post__tags'],
+                         score=row['total'], computed_at=now)
+        for rank, row in enumerate(top_tags, start=1)
+    ]
+
+    with transaction.atomic():
+        TrendingSnapshot.objects.all().delete()
+        TrendingSnapshot.objects.bulk_create(entries)
+
+    pruned = PostActivityBucket.objects.filter(hour__lt=window_start).delete()[0]
+    return len(entries), pruned
+
+
+def _snapshot(kind):
+    rows = list(TrendingSnapshot.objects.filter(kind=kind).values_list('object_id', 'score', 'computed_at'))
+    stale = not rows or rows[0][2] < timezone.now() - timedelta(seconds=REFRESH_SECONDS)
+
+    # One worker refreshes a stale snapshot; the others keep serving the old one.
+    if stale and cache.add(REFRESH_LOCK_KEY, True, REFRESH_SECONDS):
+        refresh_snapshot()
+        rows = list(TrendingSnapshot.objects.filter(kind=kind).values_list('object_id', 'score', 'computed_at'))
+
+    return [(object_id, score) for object_id, score, _ in rows]
+
+
+def _in_rank_order(queryset, ranked):
+    objects = queryset.in_bulk([object_id for object_id, _ in ranked])
+    result = []
+    for object_id, score in ranked:
+        obj = objects.get(object_id)
+        if obj is not None:
+            obj.trending_score = score
+            result.append(obj)
+    return result
+
+
+def trending_posts():
+    """Return the trending posts in rank order."""
+    return _in_rank_order(Post.objects.filter(expiry.live_q(), visibility='public'), _snapshot('post'))
+
+
+def trending_tags():
+    """Return the trending tags in rank order."""
+    return _in_rank_order(Tag.objects.all(), _snapshot('tag'))
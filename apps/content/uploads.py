@@ -0,0 +1,178 @@
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Media, Post, Upload
+from .storage import blob_storage
+
+
+# Partial files sit under MEDIA_ROOT beside the blob store, so finishing
+# an upload renames the file instead of copying it.
+UPLOAD_DIR = getattr(settings, 'UPLOAD_DIR', 'uploads/partial')
+MAX_FILE_SIZE = getattr(settings, 'UPLOAD_MAX_FILE_SIZE', 512 * 1024 * 1024)
+MAX_CHUNK_SIZE = getattr(settings, 'UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024)
+EXPIRY_SECONDS = getattr(settings, 'UPLOAD_EXPIRY_SECONDS', 60 * 60 * 24)
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """A chunk or finalize request the upload cannot accept."""
+
+
+class OffsetMismatch(UploadError):
+    """A chunk that does not start where the upload left off."""
+
+    def __init__(self, expected):
+        super().__init__(f"Expected a chunk at offset {expected}.")
+        self.expected = expected
+
+
+class UploadConflict(UploadError):
+    """A finalize of an upload that another request already finished or whose partial file is gone."""
+
+
+def part_path(upload):
+    return blob_storage().path(f'{UPLOAD_DIR}/{upload.pk}.part')
+
+
+def get_target(target_type, target_id):
+    """Return the message or post an upload is meant for, or None."""
+    from apps.interactions.models import Message, ConversationMessage
+    model = {'message': Message, 'conversation_message': ConversationMessage, 'post': Post}[target_type]
+    return model.objects.filter(pk=target_id).first()
+
+
+def target_owner_id(target_type, target):
+    return target.user_id if target_type == 'post' else target.sender_id
+
+
+def start(user, target_type, target_id, type, file_name, file_size):
+    """Open an upload and create its empty partial file."""
+    upload = Upload.objects.create(
+        user=user,
+        target_type=target_type,
+        target_id=target_id,
+        type=type,
+        file_name=file_name,
+        file_size=file_size
+    )
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return upload
+
+
+def append(upload, offset, stream):
+    """
+    Write the chunk read from ``stream`` at ``offset`` and return the new offset.
+
+    The body is copied in small blocks, so memory use does not grow with the
+    chunk. The row is locked while writing, a chunk must start exactly where
+    the last one ended, and it may not run past the declared file size.
+    Bytes left by an interrupted chunk are overwritten by its retry.
+    """
+    with transaction.atomic():
+        upload = Upload.objects.select_for_update().get(pk=upload.pk)
+        if offset != upload.received:
+            raise OffsetMismatch(upload.received)
+
+        limit = min(upload.file_size - offset, MAX_CHUNK_SIZE)
+        written = 0
+        with open(part_path(upload), 'r+b') as part:
+            part.seek(offset)
+            while True:
+                # Read one byte past the limit to notice oversized chunks
+                block = stream.read(min(BLOCK_SIZE, limit - written + 1))
+                if not block:
+                    break
+                written += len(block)
+                if written > limit:
+                    raise UploadError(
+                        "Chunk is larger than the remaining file size or the chunk size limit."
+                    )
+                part.write(block)
+            part.truncate()
+
+        upload.received = offset + written
+        upload.save(update_fields=['received', 'updated_at'])
+    return upload.received
+
+
+def _attach(upload, target, name):
+    from apps.interactions.models import MessageAttachment, ConversationMessageAttachment
+
+    if upload.target_type == 'post':
+        return Media.objects.create(post=target, type=upload.type, file=name)
+
+    fields = {'message': target, 'type': upload.type, 'file': name,
+              'file_name': upload.file_name, 'file_size': upload.file_size}
+    if upload.target_type == 'conversation_message':
+        return ConversationMessageAttachment.objects.create(**fields)
+
+    attachment = MessageAttachment.objects.create(**fields)
+    if not target.has_attachment:
+        target.has_attachment = True
+        target.save(update_fields=['has_attachment'])
+    return attachment
+
+
+def finalize(upload):
+    """
+    Store a complete upload and attach it to its target.
+
+    The partial file is hashed in place and moved into the blob store, so
+    its bytes are not copied again. The row stays locked until the
+    attachment is saved, so concurrent finalizes of one upload run one
+    after the other. Returns the new ``Media``, ``MessageAttachment`` or
+    ``ConversationMessageAttachment``.
+    """
+    name = None
+    try:
+        with transaction.atomic():
+            upload = Upload.objects.select_for_update().filter(pk=upload.pk).first()
+            if upload is None:
+                raise UploadConflict("The upload has already been finalized.")
+            if upload.received != upload.file_size:
+                raise UploadError(f"Received {upload.received} of {upload.file_size} bytes.")
+            target = get_target(upload.target_type, upload.target_id)
+            if target is None:
+                raise UploadError("The upload's target no longer exists.")
+            path = part_path(upload)
+            if not os.path.exists(path):
+                raise UploadConflict("The upload's partial file is missing.")
+
+            name = blob_storage().adopt(path, upload.file_name)
+            attachment = _attach(upload, target, name)
+            upload.delete()
+    except Exception:
+        if name is not None:
+            # The blob's row rolled back with the attachment: record it again so
+            # collection can reclaim it, and restore the partial file for a retry
+            from . import blobs
+            blobs.register(name, upload.file_size)
+            shutil.copyfile(blob_storage().path(name), path)
+        raise
+    return attachment
+
+
+def discard(upload):
+    """Abort an upload, removing its partial file."""
+    path = part_path(upload)
+    upload.delete()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def discard_stale(max_age=None):
+    """Abort uploads that have not received a chunk for ``max_age`` seconds; returns the count."""
+    max_age = EXPIRY_SECONDS if max_age is None else max_age
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    stale = list(Upload.objects.filter(updated_at__lt=cutoff))
+    for upload in stale:
+        discard(upload)
+    return len(stale)
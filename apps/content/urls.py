@@ -8,11 +8,15 @@ router.register('tags', views.TagViewSet, basename='tags')
 router.register('reactions', views.ReactionViewSet, basename='reactions')
 router.register('comments', views.CommentViewSet, basename='comments')
 router.register('saved', views.SavedContentViewSet, basename='saved-content')
+router.register('uploads', views.UploadViewSet, basename='uploads')
 
 urlpatterns = [
     path('feed/', views.FeedView.as_view(), name='feed'),
     path('trending/', views.TrendingView.as_view(), name='trending'),
+    path('trending/tags/', views.TrendingTagsView.as_view(), name='trending-tags'),
     path('search/', views.ContentSearchView.as_view(), name='content-search'),
+    path('view-stats/', views.ViewCounterStatsView.as_view(), name='view-counter-stats'),
+    path('expiry-stats/', views.ExpiryStatsView.as_view(), name='expiry-stats'),
 ]
 
 urlpatterns += router.urls 
\ No newline at end of file
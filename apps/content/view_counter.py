@@ -0,0 +1,166 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from . import engagement
+
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Per-process write-behind buffer for ``view_count`` increments.
+
+    Views are accumulated in memory keyed by (model label, pk) and written
+    with one ``UPDATE ... WHERE id IN (...)`` per model and increment size,
+    so a hot post costs one row write per flush instead of one per request.
+    At most ``max_pending`` views or ``flush_interval`` seconds of views can
+    be lost if a worker dies without running its exit hook. With
+    ``background`` the writes happen on a flush thread, which requests only
+    wake when a flush is due.
+    """
+
+    def __init__(self, flush_interval=5.0, max_pending=1000, background=True):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.background = background
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._wake = threading.Event()
+
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+        self.dropped_views = 0
+        self.last_flush_at = None
+        self.last_flush_duration = 0.0
+
+    def record(self, instance, count=1):
+        """Buffer ``count`` views of a Post or CommunityPost."""
+        key = (instance._meta.label, instance.pk)
+        with self._lock:
+            self._counts[key] += count
+            self._pending += count
+            due = (
+                self._pending >= self.max_pending or
+                time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+        if not self.background:
+            if due:
+                self.flush()
+            return
+        self._ensure_thread()
+        if due:
+            self._wake.set()
+
+    def pending(self):
+        """Return the number of buffered views not yet written."""
+        with self._lock:
+            return self._pending
+
+    def flush(self):
+        """Write all buffered views to the database."""
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, defaultdict(int)
+                self._pending = 0
+                self._last_flush = time.monotonic()
+
+            if not counts:
+                return 0
+
+            started = time.monotonic()
+            try:
+                self._write(counts)
+            except Exception:
+                logger.exception("Failed to flush %d buffered view counts", len(counts))
+                with self._lock:
+                    self.failed_flushes += 1
+                self._requeue(counts)
+                return 0
+
+            with self._lock:
+                self.flushes += 1
+                self.flushed_rows += len(counts)
+                self.flushed_views += sum(counts.values())
+                self.last_flush_at = time.time()
+                self.last_flush_duration = time.monotonic() - started
+            return len(counts)
+
+    def stats(self):
+        """Return flush metrics for this process."""
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'flushes': self.flushes,
+                'flushed_rows': self.flushed_rows,
+                'flushed_views': self.flushed_views,
+                'failed_flushes': self.failed_flushes,
+                'dropped_views': self.dropped_views,
+                'last_flush_at': self.last_flush_at,
+                'last_flush_duration': self.last_flush_duration,
+            }
+
+    def _write(self, counts):
+        # Group rows that received the same number of views so each group is
+        # a single UPDATE for both the counter and the engagement score.
+        groups = defaultdict(list)
+        for (label, pk), count in counts.items():
+            groups[(label, count)].append(pk)
+
+        with transaction.atomic():
+            for (label, count), pks in groups.items():
+                model = apps.get_model(label)
+                model.objects.filter(pk__in=pks).update(view_count=F('view_count') + count)
+                engagement.record_engagement(model, pks, 'view', count=count)
+
+    def _requeue(self, counts):
+        with self._lock:
+            for key, count in counts.items():
+                if self._pending + count > self.max_pending:
+                    self.dropped_views += count
+                    continue
+                self._counts[key] += count
+                self._pending += count
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='view-counter-flush', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+
+view_counter = ViewCounter(
+    flush_interval=getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 5.0),
+    max_pending=getattr(settings, 'VIEW_COUNTER_MAX_PENDING', 1000),
+    background=getattr(settings, 'VIEW_COUNTER_BACKGROUND_FLUSH', True),
+)
+
+atexit.register(view_counter.flush)
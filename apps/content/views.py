@@ -1,20 +1,73 @@
-from rest_framework import viewsets, generics, filters, status
+import io
+
+from rest_framework import viewsets, generics, filters, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.db.models import Count, Q
+from django.http import Http404
 from django.utils import timezone
 from apps.users.models import User
+from socisphere.pagination import KeysetPagination
+from socisphere.compiled_serializers import CompiledListMixin
+from socisphere.query_planner import QueryPlannerMixin, plan_queryset
 
-from .models import Tag, Post, Media, Reaction, Comment, SavedContent
+from .models import Tag, Post, Media, Reaction, Comment, SavedContent, Upload
+from . import (
+    comment_tree, expiry, ingest, media_serving, reactions, search, timelines, trending, uploads, visibility
+)
+from .view_counter import view_counter
 from .serializers import (
     TagSerializer, PostSerializer, MediaSerializer,
-    ReactionSerializer, CommentSerializer, SavedContentSerializer
+    ReactionSerializer, ReactionBatchSerializer, CommentSerializer,
+    SavedContentSerializer, TrendingTagSerializer, UploadSerializer
 )
 
 
-class TagViewSet(viewsets.ModelViewSet):
+def _positive_int_param(request, name):
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return None
+    value = int(value)
+    if value < 1:
+        raise ValueError(name)
+    return value
+
+
+def _comment_thread_response(request, comments, root=None):
+    """Return one window of a comment thread as a cursor-paginated response."""
+    try:
+        max_depth = _positive_int_param(request, 'max_depth')
+        max_width = _positive_int_param(request, 'max_width')
+        page_size = _positive_int_param(request, 'page_size') or comment_tree.PAGE_SIZE
+    except ValueError:
+        return Response(
+            {"detail": "max_depth, max_width and page_size must be positive integers."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    thread, cursor = comment_tree.thread_window(
+        plan_queryset(comments, CommentSerializer),
+        root=root,
+        max_depth=max_depth,
+        max_width=max_width,
+        after=request.query_params.get('cursor'),
+        limit=min(page_size, comment_tree.MAX_PAGE_SIZE)
+    )
+    next_link = None
+    if cursor:
+        next_link = replace_query_param(request.build_absolute_uri(), 'cursor', cursor)
+    return Response({
+        'next': next_link,
+        'results': CommentSerializer(thread, many=True).data
+    })
+
+
+class TagViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing tags."""
     queryset = Tag.objects.all().order_by('name')
     serializer_class = TagSerializer
@@ -23,33 +76,43 @@ class TagViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(CompiledListMixin, QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing posts."""
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'body', 'tags__name']
 
     def get_queryset(self):
         """Return posts based on user permissions and visibility settings."""
-        user = self.request.user
-        # Users can view their own posts (including private ones)
-        own_posts = Q(user=user)
-        # Users can view public posts
-        public_posts = Q(visibility='public')
-        # Users can view posts shared with followers if they are following the creator
-        # Get the users that the current user is following
-        following_users = user.following.values_list('followed', flat=True)
-        followers_posts = Q(visibility='followers', user__in=following_users)
-        
+        # Own posts, public posts, and followers-only posts of followed users
         return Post.objects.filter(
-            own_posts | public_posts | followers_posts
-        ).distinct().order_by('-created_at')
+            visibility.visible_posts_q(self.request.user)
+        ).order_by('-created_at')
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a post and record a view of it."""
+        post = self.get_object()
+        view_counter.record(post)
+        serializer = self.get_serializer(post)
+        return Response(serializer.data)
 
     def perform_create(self, serializer):
         """Set the current user as the post author."""
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def ingest(self, request):
+        """Import posts in bulk from an NDJSON body, one post per line."""
+        if request.stream is None:
+            return Response(
+                {"detail": "Request body is empty."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        report = ingest.ingest_lines(iter(request.stream.readline, b''))
+        return Response(report.as_dict())
+
     @action(detail=True, methods=['post'])
     def add_media(self, request, pk=None):
         """Add media to a post."""
@@ -78,38 +141,23 @@ class PostViewSet(viewsets.ModelViewSet):
                 {"detail": "Reaction type is required."},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if reaction_type not in reactions.COUNTER_FIELDS:
+            return Response(
+                {"detail": f"Unknown reaction type '{reaction_type}'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Check if user already reacted to this post
-        existing_reaction = Reaction.objects.filter(
-            user=request.user,
-            content_type=content_type,
-            object_id=post.id
-        ).first()
-        
-        if existing_reaction:
-            if existing_reaction.reaction_type == reaction_type:
-                # Remove the reaction if it's the same type
-                existing_reaction.delete()
-                return Response(
-                    {"detail": f"Removed {reaction_type} reaction."},
-                    status=status.HTTP_204_NO_CONTENT
-                )
-            else:
-                # Update the reaction if it's a different type
-                existing_reaction.reaction_type = reaction_type
-                existing_reaction.save()
-                serializer = ReactionSerializer(existing_reaction)
-                return Response(serializer.data)
-        
-        # Create a new reaction
-        reaction = Reaction.objects.create(
-            user=request.user,
-            content_type=content_type,
-            object_id=post.id,
-            reaction_type=reaction_type
-        )
+        # One upsert creates, switches or (on a repeated type) removes the reaction
+        outcome, reaction = reactions.toggle(request.user, content_type.id, post.id, reaction_type)
+        if outcome == 'removed':
+            return Response(
+                {"detail": f"Removed {reaction_type} reaction."},
+                status=status.HTTP_204_NO_CONTENT
+            )
         
         serializer = ReactionSerializer(reaction)
+        if outcome == 'switched':
+            return Response(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['get'])
@@ -124,10 +172,21 @@ class PostViewSet(viewsets.ModelViewSet):
             object_id=post.id,
             parent=None
         ).order_by('-created_at')
+        comments = plan_queryset(comments, CommentSerializer)
         
         serializer = CommentSerializer(comments, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """Get the post's comment thread in depth-first order."""
+        post = self.get_object()
+        comments = Comment.objects.filter(
+            content_type=ContentType.objects.get_for_model(Post),
+            object_id=post.id
+        )
+        return _comment_thread_response(request, comments)
+
     @action(detail=True, methods=['post'])
     def add_comment(self, request, pk=None):
         """Add a comment to a post."""
@@ -196,17 +255,19 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing comments."""
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Return comments the user can access."""
+        visible_posts = Post.objects.filter(
+            visibility.visible_posts_q(self.request.user)
+        ).values('id')
         return Comment.objects.filter(
             Q(user=self.request.user) |  # User's own comments
-            Q(content_object__visibility='public') |  # Comments on public content
-            Q(content_object__visibility='followers', content_object__user__followers=self.request.user)  # Comments on follower-only content
+            Q(content_type=ContentType.objects.get_for_model(Post), object_id__in=visible_posts)  # Comments on visible posts
         ).order_by('-created_at')
 
     def perform_create(self, serializer):
@@ -217,14 +278,32 @@ class CommentViewSet(viewsets.ModelViewSet):
     def replies(self, request, pk=None):
         """Get replies to a comment."""
         comment = self.get_object()
-        replies = Comment.objects.filter(parent=comment).order_by('-created_at')
+        replies = plan_queryset(
+            Comment.objects.filter(parent=comment).order_by('-created_at'),
+            CommentSerializer
+        )
         serializer = CommentSerializer(replies, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """Get the comments below this one, continuing a windowed thread."""
+        comment = self.get_object()
+        comments = Comment.objects.filter(
+            content_type_id=comment.content_type_id,
+            object_id=comment.object_id
+        )
+        return _comment_thread_response(request, comments, root=comment)
+
     @action(detail=True, methods=['post'])
     def add_reply(self, request, pk=None):
         """Add a reply to a comment."""
         parent_comment = self.get_object()
+        if not comment_tree.can_reply_to(parent_comment):
+            return Response(
+                {"detail": "Maximum reply depth reached."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
@@ -238,7 +317,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ReactionViewSet(viewsets.ModelViewSet):
+class ReactionViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing reactions."""
     serializer_class = ReactionSerializer
     permission_classes = [IsAuthenticated]
@@ -251,98 +330,259 @@ class ReactionViewSet(viewsets.ModelViewSet):
         """Set the current user as the reaction author."""
         serializer.save(user=self.request.user)
 
-
-class SavedContentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Set or clear many reactions at once, e.g. likes queued while offline."""
+        serializer = ReactionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['reactions']
+        
+        # Drop targets that do not exist or that the user cannot see
+        allowed = set()
+        by_type = {}
+        for item in items:
+            by_type.setdefault(item['content_type'], []).append(item['object_id'])
+        for content_type, object_ids in by_type.items():
+            allowed.update(
+                (content_type.id, object_id)
+                for object_id in reactions.reactable_ids(request.user, content_type.model_class(), object_ids)
+            )
+        
+        outcomes = reactions.apply_batch(request.user, [
+            (item['content_type'].id, item['object_id'], item['reaction_type'])
+            for item in items
+            if (item['content_type'].id, item['object_id']) in allowed
+        ])
+        results = [
+            {
+                'content_type': item['content_type'].id,
+                'object_id': item['object_id'],
+                'reaction_type': item['reaction_type'],
+                'status': outcomes.get((item['content_type'].id, item['object_id']), 'not_found'),
+            }
+            for item in items
+        ]
+        return Response({'results': results})
+
+    def perform_update(self, serializer):
+        """Move the reaction's count when its type changes."""
+        with transaction.atomic():
+            reaction = serializer.instance
+            new_type = serializer.validated_data.pop('reaction_type', reaction.reaction_type)
+            reactions.switch(reaction, new_type)
+            serializer.save()
+
+
+class SavedContentViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing saved content."""
     serializer_class = SavedContentSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        """Return saved content for the current user."""
-        return SavedContent.objects.filter(user=self.request.user).order_by('-created_at')
+        """Return saved content for the current user, with the saved objects and their authors."""
+        return SavedContent.objects.filter(user=self.request.user).order_by('-created_at').prefetch_generic(
+            select_related=['user']
+        )
 
     def perform_create(self, serializer):
         """Set the current user as the owner of the saved content."""
         serializer.save(user=self.request.user)
 
 
-class FeedView(generics.ListAPIView):
+class UploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                    mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable uploads of message attachments and post media.
+
+    Create an upload, send the file as raw chunks to ``chunk`` with the
+    byte ``offset`` to resume from, then ``finalize`` it to attach the file.
+    """
+    serializer_class = UploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Return the current user's unfinished uploads."""
+        return Upload.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        """Open an upload for a message or post owned by the current user."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        target = uploads.get_target(data['target_type'], data['target_id'])
+        if target is None:
+            return Response(
+                {"detail": "Upload target not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if uploads.target_owner_id(data['target_type'], target) != request.user.id:
+            return Response(
+                {"detail": "You can only upload files to your own messages and posts."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        upload = uploads.start(request.user, **data)
+        return Response(self.get_serializer(upload).data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        """Abort the upload and remove its partial file."""
+        uploads.discard(instance)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Append the raw request body at ``?offset=``."""
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params['offset'])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "An integer 'offset' parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # The body is read from the stream, never buffered by a parser
+        try:
+            received = uploads.append(upload, offset, request.stream or io.BytesIO())
+        except uploads.OffsetMismatch as error:
+            return Response(
+                {"detail": str(error), "offset": error.expected},
+                status=status.HTTP_409_CONFLICT
+            )
+        except uploads.UploadError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"offset": received, "file_size": upload.file_size})
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Attach the completed file to its message or post."""
+        from apps.interactions.serializers import (
+            MessageAttachmentSerializer, ConversationMessageAttachmentSerializer
+        )
+        upload = self.get_object()
+        try:
+            attachment = uploads.finalize(upload)
+        except uploads.UploadConflict as error:
+            return Response({"detail": str(error)}, status=status.HTTP_409_CONFLICT)
+        except uploads.UploadError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer_class = {
+            'message': MessageAttachmentSerializer,
+            'conversation_message': ConversationMessageAttachmentSerializer,
+            'post': MediaSerializer,
+        }[upload.target_type]
+        return Response(
+            serializer_class(attachment, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class FeedView(CompiledListMixin, QueryPlannerMixin, generics.ListAPIView):
     """View for the user's personalized feed."""
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Return posts for the user's feed."""
-        user = self.request.user
-        
-        # Get the users that the current user is following
-        following_users = user.following.values_list('followed', flat=True)
-        
-        # Get posts from users the current user is following
-        following_posts = Post.objects.filter(
-            user__in=following_users,
-            visibility__in=['public', 'followers']
-        )
-        
-        # Get public posts that are trending (or recent if no trending)
-        trending_posts = Post.objects.filter(
-            visibility='public'
-        ).order_by('-created_at')[:20]
-        
-        # Combine and remove duplicates
-        return (following_posts | trending_posts).distinct().order_by('-created_at')
+        return timelines.feed_queryset(self.request.user)
 
 
-class TrendingView(generics.ListAPIView):
+class TrendingView(QueryPlannerMixin, generics.ListAPIView):
     """View for trending content."""
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Return trending posts."""
-        # Get public posts with high engagement in the last 24 hours
+        posts = trending.trending_posts()
+        if posts:
+            return posts
+
+        # No recent activity yet: fall back to public posts from the last 24 hours
         yesterday = timezone.now() - timezone.timedelta(days=1)
         
         return Post.objects.filter(
+            expiry.live_q(),
             visibility='public',
             created_at__gte=yesterday
         ).order_by('-engagement_score', '-view_count')[:50]
 
 
-class ContentSearchView(generics.ListAPIView):
+class TrendingTagsView(QueryPlannerMixin, generics.ListAPIView):
+    """View for trending tags."""
+    serializer_class = TrendingTagSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Return trending tags."""
+        return trending.trending_tags()
+
+
+class ContentSearchView(QueryPlannerMixin, generics.ListAPIView):
     """View for searching content."""
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['title', 'body', 'tags__name']
+    filter_backends = []
 
     def get_queryset(self):
-        """Return posts that match the search criteria."""
+        """Return posts that match the search criteria, best match first."""
         user = self.request.user
         query = self.request.query_params.get('q', '')
         
         if not query:
             return Post.objects.none()
         
-        # Users can view their own posts (including private ones)
-        own_posts = Q(user=user)
-        
-        # Users can view public posts
-        public_posts = Q(visibility='public')
-        
-        # Users can view posts shared with followers if they are following the creator
-        # Get the users that the current user follows
-        followed_users = User.objects.filter(followers__follower=user)
-        followers_posts = Q(visibility='followers', user__in=followed_users)
-        
-        # First filter by visibility permissions
-        base_queryset = Post.objects.filter(
-            own_posts | public_posts | followers_posts
-        ).distinct()
-        
-        # Then apply search filter manually
-        search_query = Q()
-        for field in self.search_fields:
-            search_query |= Q(**{f"{field}__icontains": query})
+        # Rank candidates in the search index, then apply visibility to them
+        candidates = [post_id for post_id, score in search.search_post_ids(query)]
+        if not candidates:
+            return Post.objects.none()
         
-        return base_queryset.filter(search_query).order_by('-created_at') 
\ No newline at end of file
+        posts = Post.objects.in_bulk(candidates)
+        return visibility.filter_visible(
+            user, [posts[post_id] for post_id in candidates if post_id in posts]
+        )
+
+
+class ExpiryStatsView(APIView):
+    """View for inspecting the backlog of the expiry sweeper."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return the expired rows awaiting the sweeper and its lag."""
+        return Response(expiry.stats())
+
+
+class ViewCounterStatsView(APIView):
+    """View for inspecting this worker's buffered view counter."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return flush metrics for the view counter."""
+        return Response(view_counter.stats())
+
+
+class MediaFileView(APIView):
+    """
+    Serve uploaded files with support for range and conditional requests.
+
+    Message attachments are only served to users who can read the message,
+    and media on restricted posts to users who can see the post.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, name):
+        """Return the file, a byte range of it, or 304 Not Modified."""
+        located = media_serving.locate(name)
+        if located is None:
+            raise Http404
+        name, path = located
+
+        private = media_serving.is_private(name)
+        if private and not media_serving.can_access(request.user, name):
+            return Response(
+                {"detail": "You do not have access to this file."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return media_serving.serve(request, name, path, private=private)
@@ -0,0 +1,98 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from . import expiry
+
+CACHE_TIMEOUT = getattr(settings, 'VISIBILITY_CACHE_TIMEOUT', 60)
+
+# Above this many followed authors the IN list is replaced by a subquery.
+MAX_INLINE_IDS = getattr(settings, 'VISIBILITY_MAX_INLINE_IDS', 1000)
+
+
+def _cache_key(user_id):
+    return f'visibility:followed:{user_id}'
+
+
+def _load(user_id):
+    from apps.interactions.models import Connection
+    ids = Connection.objects.filter(follower_id=user_id).order_by('followed_id').values_list(
+        'followed_id', flat=True
+    )
+    return array('q', ids)
+
+
+def followed_author_ids(user_id):
+    """
+    Return the sorted ids of authors whose followers-only posts the user sees.
+
+    The ids are kept per user in the cache as a compact ``array('q')`` and
+    dropped when connections change. Workers only see each other's drops
+    through a shared cache; with a per-process cache the set is at most
+    ``VISIBILITY_CACHE_TIMEOUT`` seconds stale.
+    """
+    ids = cache.get(_cache_key(user_id))
+    if ids is None:
+        ids = _load(user_id)
+        cache.set(_cache_key(user_id), ids, CACHE_TIMEOUT)
+    return ids
+
+
+def _contains(ids, author_id):
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def forget(user_id):
+    """
+    Drop a user's cached set after their connections change.
+
+    The set is rebuilt from the database on the next read. It is dropped
+    now and again once the transaction commits, so a read by another
+    worker in between cannot keep the old connections cached.
+    """
+    cache.delete(_cache_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_cache_key(user_id)))
+
+
+def visible_posts_q(user):
+    """
+    Return a filter for the unexpired posts the user may see.
+
+    Every branch is a predicate on the post row itself, so the result needs
+    no join on connections and no DISTINCT.
+    """
+    ids = followed_author_ids(user.id)
+    if len(ids) > MAX_INLINE_IDS:
+        from apps.interactions.models import Connection
+        followed = Connection.objects.filter(follower_id=user.id).values('followed_id')
+    else:
+        followed = list(ids)
+
+    visible = Q(user_id=user.id) | Q(visibility='public')
+    if followed:
+        visible |= Q(visibility='followers', user_id__in=followed)
+    return visible & expiry.live_q()
+
+
+def _is_visible(post, user_id, followed_ids):
+    if not expiry.is_live(post):
+        return False
+    if post.user_id == user_id or post.visibility == 'public':
+        return True
+    return post.visibility == 'followers' and _contains(followed_ids, post.user_id)
+
+
+def can_view(user, post):
+    """Return True if the user may see the post."""
+    return _is_visible(post, user.id, followed_author_ids(user.id))
+
+
+def filter_visible(user, posts):
+    """Return the posts from an iterable that the user may see, in order."""
+    followed_ids = followed_author_ids(user.id)
+    return [post for post in posts if _is_visible(post, user.id, followed_ids)]
@@ -0,0 +1,141 @@
+from collections import Counter, namedtuple
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import notification_counter, notification_stream
+from .models import Notification
+
+
+# Seconds since a group's latest event within which new events join it
+WINDOW = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 60 * 60 * 24)
+# Notification types grouped by (recipient, type, target); others get a row per event
+TYPES = set(getattr(settings, 'NOTIFICATION_COALESCE_TYPES', ['like', 'comment', 'follow']))
+# Actors kept on a coalesced notification, newest first
+RECENT_ACTORS = getattr(settings, 'NOTIFICATION_RECENT_ACTORS', 3)
+
+# ``action`` completes the sentence started by the actors' names, e.g. "liked your post: Hello"
+Event = namedtuple('Event', 'recipient_id notification_type title action actor target')
+
+
+def describe(actors, actor_count):
+    """Return "alice", "alice and bob" or "alice and 41 others"."""
+    names = [actor['username'] for actor in actors]
+    if actor_count <= 1:
+        return names[0]
+    if actor_count == 2 and len(names) > 1:
+        return f"{names[0]} and {names[1]}"
+    others = actor_count - 1
+    return f"{names[0]} and {others} other{'s' if others != 1 else ''}"
+
+
+def _key(notification_type, recipient_id, target_type_id, target_id):
+    return notification_type, recipient_id, target_type_id, target_id
+
+
+def _target(event):
+    if event.target is None:
+        return None, None
+    return ContentType.objects.get_for_model(event.target).pk, event.target.pk
+
+
+def _add_actor(notification, event):
+    actor = {'id': event.actor.pk, 'username': event.actor.username}
+    # Every actor's id is kept, so someone who acts again after dropping out
+    # of the displayed few is still counted once
+    if actor['id'] not in notification.actor_ids:
+        notification.actor_ids = notification.actor_ids + [actor['id']]
+        notification.actor_count += 1
+    recent = [known for known in notification.recent_actors if known['id'] != actor['id']]
+    notification.recent_actors = [actor] + recent[:RECENT_ACTORS - 1]
+    notification.message = f"{describe(notification.recent_actors, notification.actor_count)} {event.action}"
+
+
+def _open_groups(keys, since):
+    """Return the latest notification of each group with an event since ``since``, locked."""
+    if not keys:
+        return {}
+    condition = reduce(or_, (
+        Q(notification_type=notification_type, recipient_id=recipient_id,
+          target_type_id=target_type_id, target_id=target_id)
+        for notification_type, recipient_id, target_type_id, target_id in keys
+    ))
+    groups = {}
+    for notification in (
+        Notification.objects.select_for_update().filter(condition, last_event_at__gte=since)
+        .order_by('-last_event_at', '-id')
+    ):
+        groups.setdefault(_key(
+            notification.notification_type, notification.recipient_id,
+            notification.target_type_id, notification.target_id
+        ), notification)
+    return groups
+
+
+def record(events):
+    """
+    Record notification events, coalescing them into existing notifications.
+
+    Events of a coalesced type whose (recipient, type, target) group had an
+    event within ``WINDOW`` update that group's latest notification: the
+    actor is counted and put first, the message is rewritten,
+    ``last_event_at`` moves forward and the notification is unread again;
+    ``created_at`` is left alone, so paged lists stay stable. Other events are
+    inserted. Open groups are found with one query, new rows inserted with
+    one ``bulk_create`` and updated rows saved with one ``bulk_update``.
+    Returns the notifications written.
+    """
+    events = list(events)
+    if not events:
+        return []
+    now = timezone.now()
+    keyed = [(_key(event.notification_type, event.recipient_id, *_target(event)), event) for event in events]
+
+    # Joins the caller's transaction rather than paying for a savepoint
+    with transaction.atomic(savepoint=False):
+        groups = _open_groups(
+            {key for key, event in keyed if event.notification_type in TYPES}, now - timedelta(seconds=WINDOW)
+        )
+        created, updated, revived = [], {}, []
+        for key, event in keyed:
+            notification = groups.get(key)
+            if notification is None:
+                notification = Notification(
+                    recipient_id=event.recipient_id,
+                    notification_type=event.notification_type,
+                    title=event.title,
+                    target_type_id=key[2],
+                    target_id=key[3],
+                    actor_count=0,
+                    last_event_at=now,
+                )
+                created.append(notification)
+                if event.notification_type in TYPES:
+                    groups[key] = notification
+            elif notification.pk is not None:
+                if notification.is_read:
+                    revived.append(notification.recipient_id)
+                    notification.is_read = False
+                    notification.read_at = None
+                notification.last_event_at = now
+                updated[notification.pk] = notification
+            _add_actor(notification, event)
+
+        if created:
+            Notification.objects.bulk_create(created)
+            notification_counter.count_new(created)
+        if updated:
+            Notification.objects.bulk_update(updated.values(), [
+                'message', 'actor_count', 'actor_ids', 'recent_actors', 'is_read', 'read_at', 'last_event_at'
+            ])
+        if revived:
+            notification_counter.adjust(Counter(revived))
+        written = created + list(updated.values())
+        notification_stream.publish_notifications_on_commit(written)
+    return written
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+# Events waiting for a slow socket; beyond this the oldest are dropped
+QUEUE_SIZE = getattr(settings, 'REALTIME_QUEUE_SIZE', 100)
+
+
+class Subscription:
+    """
+    The channels one socket listens on, and the queue events arrive in.
+
+    Created on the socket's event loop; events may be put from any thread.
+    """
+
+    def __init__(self, hub, channels):
+        self.hub = hub
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The socket's loop has shut down
+            self.close()
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """
+    In-process publish/subscribe between request code and open sockets.
+
+    ``publish`` hands an event to the backend, which brings it back through
+    ``deliver`` in every worker process that shares the backend; ``deliver``
+    then fans it out to the local subscribers of the channel.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._started = False
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            if not self._started:
+                self.backend.start(self.deliver)
+                self._started = True
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel, event):
+        """Send a text event to every subscriber of ``channel``, in any worker."""
+        self.backend.publish(channel, event)
+
+    def deliver(self, channel, event):
+        """Hand an event from the backend to this process's subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+class LocalBackend:
+    """Backend for a single worker process: events never leave the process."""
+
+    def __init__(self, **options):
+        self.deliver = None
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, channel, event):
+        if self.deliver is not None:
+            self.deliver(channel, event)
+
+
+class SQLiteBackend:
+    """
+    Backend sharing events between worker processes on one host.
+
+    Publishers append rows to a SQLite file and every worker polls it from a
+    background thread. Meant as a local stand-in for Redis or Postgres
+    LISTEN/NOTIFY, which plug in the same way.
+    """
+
+    def __init__(self, path=None, poll_interval=0.02, retention=60, **options):
+        self.path = str(path or settings.BASE_DIR / 'realtime.sqlite3')
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.deliver = None
+        self._local = threading.local()
+        self._stopped = threading.Event()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT, payload TEXT, created REAL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def publish(self, channel, event):
+        self._connection().execute(
+            'INSERT INTO events (channel, payload, created) VALUES (?, ?, ?)', (channel, event, time.time())
+        )
+
+    def start(self, deliver):
+        self.deliver = deliver
+        last_id = self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+        threading.Thread(target=self._poll, args=(last_id,), name='realtime-sqlite', daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _poll(self, last_id):
+        pruned_at = 0
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                connection = self._connection()
+                rows = connection.execute(
+                    'SELECT id, channel, payload FROM events WHERE id > ? ORDER BY id', (last_id,)
+                ).fetchall()
+                for last_id, channel, payload in rows:
+                    self.deliver(channel, payload)
+                if time.time() - pruned_at > self.retention:
+                    pruned_at = time.time()
+                    connection.execute('DELETE FROM events WHERE created < ?', (pruned_at - self.retention,))
+            except sqlite3.Error:
+                logger.exception("Polling realtime events failed")
+
+
+_hub = None
+
+
+def get_hub():
+    """Return the process-wide hub, built from ``REALTIME_BACKEND``."""
+    global _hub
+    if _hub is None:
+        backend_class = import_string(getattr(settings, 'REALTIME_BACKEND', 'apps.interactions.hub.LocalBackend'))
+        _hub = Hub(backend_class(**getattr(settings, 'REALTIME_BACKEND_OPTIONS', {})))
+    return _hub
@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.db.models import Count, F, FilteredRelation, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+from django.utils import timezone
+
+from .models import Conversation, ConversationMessage, ConversationRead
+
+
+PREVIEW_LENGTH = getattr(settings, 'INBOX_PREVIEW_LENGTH', 100)
+
+
+def preview(body):
+    return body[:PREVIEW_LENGTH]
+
+
+def record_message(message):
+    """
+    Update the inbox after a message is posted to a conversation.
+
+    The conversation points at the message and keeps a preview of it, and
+    every other participant's unread counter goes up by one. Counter rows
+    are created on first use, then bumped in one UPDATE.
+    """
+    # Never move the pointer back to an older message
+    Conversation.objects.filter(
+        Q(last_message__isnull=True) | Q(last_message__lt=message.pk),
+        pk=message.conversation_id
+    ).update(
+        last_message=message,
+        last_message_preview=preview(message.body),
+        updated_at=message.created_at
+    )
+
+    recipient_ids = list(
+        Conversation.participants.through.objects
+        .filter(conversation_id=message.conversation_id)
+        .exclude(user_id=message.sender_id)
+        .values_list('user_id', flat=True)
+    )
+    if not recipient_ids:
+        return
+    ConversationRead.objects.bulk_create(
+        [ConversationRead(conversation_id=message.conversation_id, user_id=user_id) for user_id in recipient_ids],
+        ignore_conflicts=True
+    )
+    ConversationRead.objects.filter(
+        conversation_id=message.conversation_id, user_id__in=recipient_ids
+    ).update(unread_count=F('unread_count') + 1)
+
+
+def mark_read(conversation, user):
+    """Record that ``user`` has read everything in ``conversation``; returns the read mark."""
+    read_mark, _ = ConversationRead.objects.update_or_create(
+        conversation=conversation,
+        user=user,
+        defaults={'last_read_at': timezone.now(), 'unread_count': 0}
+    )
+    return read_mark
+
+
+def unread_count(conversation, user):
+    """Return the unread counter of one participant."""
+    return ConversationRead.objects.filter(
+        conversation=conversation, user=user
+    ).values_list('unread_count', flat=True).first() or 0
+
+
+def inbox_queryset(user):
+    """
+    Return ``user``'s conversations, newest activity first.
+
+    Each row is annotated with ``unread_count`` from the user's counter,
+    joined in the same query rather than counted per conversation.
+    """
+    return Conversation.objects.filter(participants=user).annotate(
+        own_read_mark=FilteredRelation('read_marks', condition=Q(read_marks__user=user)),
+        unread_count=Coalesce(F('own_read_mark__unread_count'), 0)
+    ).order_by('-updated_at')
+
+
+def _latest_message_fields(messages):
+    """Return the update that points a conversation at its newest message, or clears it."""
+    latest = messages.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+    return {
+        'last_message': Subquery(latest.values('pk')[:1]),
+        'last_message_preview': Coalesce(
+            Substr(Subquery(latest.values('body')[:1]), 1, PREVIEW_LENGTH), Value('')
+        ),
+    }
+
+
+def forget_message(message):
+    """
+    Point a conversation whose newest message was deleted at the one before it.
+
+    The foreign key is cleared by ``SET_NULL`` before ``post_delete`` runs,
+    so only conversations left without a pointer are updated.
+    """
+    Conversation.objects.filter(pk=message.conversation_id, last_message__isnull=True).update(
+        **_latest_message_fields(ConversationMessage.objects.all())
+    )
+
+
+def rebuild(conversations=None, apps=None):
+    """
+    Recompute last-message pointers and unread counters from the messages.
+
+    For data written without :func:`record_message`, such as fixtures and
+    rows that predate the inbox. Migrations pass their historical ``apps``.
+    Returns the number of conversations updated.
+    """
+    if apps is None:
+        conversation_model, message_model, read_model = Conversation, ConversationMessage, ConversationRead
+    else:
+        conversation_model, message_model, read_model = (
+            apps.get_model('interactions', name) for name in ('Conversation', 'ConversationMessage', 'ConversationRead')
+        )
+    conversations = conversation_model.objects.all() if conversations is None else conversations
+    updated = conversations.update(**_latest_message_fields(message_model.objects.all()))
+
+    through = conversation_model.participants.through
+    memberships = through.objects.filter(conversation__in=conversations.values('pk'))
+    read_model.objects.bulk_create(
+        [
+            read_model(conversation_id=conversation_id, user_id=user_id)
+            for conversation_id, user_id in memberships.values_list('conversation_id', 'user_id').iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+    unread = message_model.objects.filter(
+        conversation=OuterRef('conversation')
+    ).exclude(sender=OuterRef('user'))
+    read_marks = read_model.objects.filter(conversation__in=conversations.values('pk'))
+    for marks, messages in (
+        (read_marks.filter(last_read_at__isnull=True), unread),
+        (read_marks.filter(last_read_at__isnull=False), unread.filter(created_at__gt=OuterRef('last_read_at'))),
+    ):
+        counted = messages.order_by().values('conversation').annotate(total=Count('pk')).values('total')
+        marks.update(unread_count=Coalesce(Subquery(counted), 0))
+    return updated
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
+from apps.interactions import notification_counter, notification_stream
 from apps.interactions.models import Notification
 
 
@@ -28,7 +30,11 @@ class Command(BaseCommand):
                 self.style.SUCCESS(f"Would delete {count} notifications older than {days} days")
             )
         else:
-            old_notifications.delete()
+            with transaction.atomic():
+                # Counters move once per recipient rather than once per deleted row
+                with notification_counter.deferred() as deltas:
+                    old_notifications.delete()
+                notification_stream.publish_unread_counts_on_commit(deltas)
             self.stdout.write(
                 self.style.SUCCESS(f"Deleted {count} notifications older than {days} days")
             ) 
\ No newline at end of file
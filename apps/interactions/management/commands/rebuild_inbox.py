@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.interactions import inbox
+
+
+class Command(BaseCommand):
+    help = 'Recompute conversation last-message pointers and unread counters from the messages'
+
+    def handle(self, *args, **options):
+        updated = inbox.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the inbox of {updated} conversations"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.interactions import notification_counter
+
+
+class Command(BaseCommand):
+    help = 'Recount unread notifications and correct the cached and stored counters'
+
+    def handle(self, *args, **options):
+        updated = notification_counter.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled the unread notification counts of {updated} users"))
@@ -1,7 +1,7 @@
 from django.utils.functional import SimpleLazyObject
 from django.contrib.auth.models import AnonymousUser
 
-from apps.interactions.models import Notification
+from apps.interactions import notification_counter
 
 
 class NotificationMiddleware:
@@ -26,10 +26,7 @@ class NotificationMiddleware:
         
         # Add unread notification count to the context for authenticated users
         if hasattr(request, 'user') and request.user.is_authenticated:
-            response.context_data['unread_notifications_count'] = Notification.objects.filter(
-                recipient=request.user,
-                is_read=False
-            ).count()
+            response.context_data['unread_notifications_count'] = self.unread_count(request)
         
         return response
     
@@ -41,9 +38,12 @@ class NotificationMiddleware:
             
         # Add unread notification count to the context for authenticated users
         if hasattr(request, 'user') and request.user.is_authenticated:
-            response.context_data['unread_notifications_count'] = Notification.objects.filter(
-                recipient=request.user,
-                is_read=False
-            ).count()
+            response.context_data['unread_notifications_count'] = self.unread_count(request)
             
-        return response 
\ No newline at end of file
+        return response
+    
+    def unread_count(self, request):
+        """Return the user's unread count from the counter cache, once per request."""
+        if not hasattr(request, '_unread_notifications_count'):
+            request._unread_notifications_count = notification_counter.get(request.user.pk)
+        return request._unread_notifications_count 
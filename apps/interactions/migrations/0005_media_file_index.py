@@ -0,0 +1,24 @@
+# Generated by Django 4.2.20 on 2026-10-18 04:56
+
+import apps.content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0004_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversationmessageattachment',
+            name='file',
+            field=models.FileField(db_index=True, storage=apps.content.storage.blob_storage, upload_to='conversation_attachments/'),
+        ),
+        migrations.AlterField(
+            model_name='messageattachment',
+            name='file',
+            field=models.FileField(db_index=True, storage=apps.content.storage.blob_storage, upload_to='message_attachments/'),
+        ),
+    ]
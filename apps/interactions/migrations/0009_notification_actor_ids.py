@@ -0,0 +1,31 @@
+# Generated by Django 4.2.20 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+
+def fill_actor_ids(apps, schema_editor):
+    Notification = apps.get_model('interactions', 'Notification')
+    batch = []
+    for notification in Notification.objects.exclude(recent_actors=[]).only('id', 'recent_actors').iterator():
+        notification.actor_ids = [actor['id'] for actor in notification.recent_actors]
+        batch.append(notification)
+        if len(batch) >= 1000:
+            Notification.objects.bulk_update(batch, ['actor_ids'])
+            batch = []
+    Notification.objects.bulk_update(batch, ['actor_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0008_notification_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(fill_actor_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.20 on 2026-10-18 06:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def copy_created_at(apps, schema_editor):
+    Notification = apps.get_model('interactions', 'Notification')
+    Notification.objects.update(last_event_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0009_notification_actor_ids'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_coalesce_idx',
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='last_event_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'notification_type', 'target_type', 'target_id', '-last_event_at'], name='notif_coalesce_idx'),
+        ),
+    ]
@@ -7,6 +7,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from apps.users.models import User
+from apps.content.storage import blob_storage
 
 
 class Connection(models.Model):
@@ -62,6 +63,10 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['sender', '-created_at', '-id'], name='message_sender_created_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='message_recipient_created_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.username} to {self.recipient.username}"
@@ -72,7 +77,7 @@ class MessageAttachment(models.Model):
     Attachments for private messages.
     """
     message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='message_attachments/')
+    file = models.FileField(upload_to='message_attachments/', storage=blob_storage, db_index=True)
     
     TYPE_CHOICES = [
         ('image', _('Image')),
@@ -103,6 +108,16 @@ class Conversation(models.Model):
     is_group = models.BooleanField(default=False)
     name = models.CharField(max_length=100, blank=True)
     
+    # Inbox summary, maintained by apps.interactions.inbox
+    last_message = models.ForeignKey(
+        'ConversationMessage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_preview = models.CharField(max_length=255, blank=True)
+    
     class Meta:
         ordering = ['-updated_at']
     
@@ -138,6 +153,9 @@ class ConversationMessage(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at', 'id'], name='convmsg_conv_created_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.username} in {self.conversation}"
@@ -148,7 +166,7 @@ class ConversationMessageAttachment(models.Model):
     Attachments for conversation messages.
     """
     message = models.ForeignKey(ConversationMessage, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='conversation_attachments/')
+    file = models.FileField(upload_to='conversation_attachments/', storage=blob_storage, db_index=True)
     
     TYPE_CHOICES = [
         ('image', _('Image')),
@@ -173,7 +191,10 @@ class ConversationRead(models.Model):
     """
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='read_marks')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_reads')
-    last_read_at = models.DateTimeField()
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    
+    # Messages from others since last_read_at, maintained by apps.interactions.inbox
+    unread_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         unique_together = ('conversation', 'user')
@@ -205,19 +226,59 @@ class Notification(models.Model):
     # For linking to the relevant object
     link = models.URLField(blank=True)
     
+    # What the notification is about; events on the same target are coalesced
+    target_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    target_id = models.PositiveIntegerField(null=True, blank=True)
+    target = GenericForeignKey('target_type', 'target_id')
+    
+    # Coalesced events: how many users acted, all of their ids, and the latest few of them
+    actor_count = models.PositiveIntegerField(default=1)
+    actor_ids = models.JSONField(default=list, blank=True)
+    recent_actors = models.JSONField(default=list, blank=True)
+    
     # Notification status
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
     
+    # Never changes, so lists paged on it stay stable while groups grow
     created_at = models.DateTimeField(auto_now_add=True)
+    # Time of the latest event, moved forward when one is coalesced
+    last_event_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_recipient_created_idx'),
+            models.Index(
+                fields=['recipient', 'notification_type', 'target_type', 'target_id', '-last_event_at'],
+                name='notif_coalesce_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.notification_type} notification for {self.recipient.username}"
 
 
+class NotificationEvent(models.Model):
+    """
+    An event sent on a user's notification stream, kept for resuming streams.
+
+    The primary key is the event id, so ids are shared by every worker.
+    """
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    event = models.CharField(max_length=20)
+    data = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'id'], name='notif_event_recipient_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} event {self.pk} for user {self.recipient_id}"
+
+
 class CollaborativeSpace(models.Model):
     """
     Collaborative spaces for group projects and creative endeavors.
@@ -272,9 +333,14 @@ class SpaceMembership(models.Model):
 def create_follow_notification(sender, instance, created, **kwargs):
     """Create a notification when a user follows another user."""
     if created:  # Only on new connections, not updates
-        Notification.objects.create(
-            recipient=instance.followed,
+        from .coalescing import Event, record
+
+        # Follows within the coalescing window share one notification
+        record([Event(
+            recipient_id=instance.followed_id,
             notification_type='follow',
             title='New Follower',
-            message=f"{instance.follower.username} started following you."
-        ) 
\ No newline at end of file
+            action="started following you.",
+            actor=instance.follower,
+            target=None
+        )]) 
\ No newline at end of file
@@ -0,0 +1,133 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.users.models import User
+
+from .models import Notification
+
+
+# Seconds a cached count lives. Changes drop the cached count only in a
+# shared cache; with a per-process cache other workers lag by up to this long
+CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_COUNTER_CACHE_TIMEOUT', 60)
+BATCH_SIZE = 1000
+
+
+def _key(user_id):
+    return f'unread_notifications:{user_id}'
+
+
+def get(user_id):
+    """
+    Return a user's unread notification count.
+
+    One cache get when warm; on a miss the denormalized column is read and
+    cached.
+    """
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = User.objects.filter(pk=user_id).values_list('unread_notification_count', flat=True).first() or 0
+        cache.add(_key(user_id), count, CACHE_TIMEOUT)
+    return max(count, 0)
+
+
+def get_many(user_ids):
+    """Return ``{user_id: unread count}``, reading the column once for every cache miss."""
+    user_ids = set(user_ids)
+    cached = cache.get_many([_key(user_id) for user_id in user_ids])
+    counts = {user_id: cached[_key(user_id)] for user_id in user_ids if _key(user_id) in cached}
+    missing = user_ids - counts.keys()
+    if missing:
+        loaded = dict.fromkeys(missing, 0)
+        loaded.update(User.objects.filter(pk__in=missing).values_list('pk', 'unread_notification_count'))
+        cache.set_many({_key(user_id): count for user_id, count in loaded.items()}, CACHE_TIMEOUT)
+        counts.update(loaded)
+    return {user_id: max(count, 0) for user_id, count in counts.items()}
+
+
+_local = threading.local()
+
+
+@contextmanager
+def deferred():
+    """
+    Collect the adjustments made inside the block and apply them once at the end.
+
+    For deleting many notifications, whose ``post_delete`` handlers would
+    otherwise issue an UPDATE per row. Yields the collected
+    ``{user_id: delta}``.
+    """
+    deltas = _local.deltas = defaultdict(int)
+    try:
+        yield deltas
+    finally:
+        _local.deltas = None
+    adjust(deltas)
+
+
+def is_deferred():
+    return getattr(_local, 'deltas', None) is not None
+
+
+def adjust(deltas):
+    """
+    Move the unread counts of several users, given ``{user_id: delta}``.
+
+    Users moving by the same amount share one UPDATE. The column is the
+    source of truth: once the transaction commits, the cached counts are
+    deleted and reloaded from it on the next read.
+    """
+    if is_deferred():
+        for user_id, delta in deltas.items():
+            _local.deltas[user_id] += delta
+        return
+    groups = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            groups[delta].append(user_id)
+    for delta, user_ids in groups.items():
+        User.objects.filter(pk__in=user_ids).update(
+            unread_notification_count=Greatest(F('unread_notification_count') + Value(delta), Value(0))
+        )
+    if groups:
+        keys = [_key(user_id) for user_ids in groups.values() for user_id in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def count_new(notifications):
+    """Count freshly inserted notifications, for inserts that send no ``post_save``."""
+    deltas = defaultdict(int)
+    for notification in notifications:
+        if not notification.is_read:
+            deltas[notification.recipient_id] += 1
+    adjust(deltas)
+
+
+def reconcile(user_ids=None):
+    """
+    Recount unread notifications and overwrite the column and the cache.
+
+    For drift from writes that bypass :func:`adjust`, such as raw SQL and
+    bulk deletes. Meant to run periodically. Returns the number of users
+    updated.
+    """
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    unread = Notification.objects.filter(recipient=OuterRef('pk'), is_read=False)
+    counted = unread.order_by().values('recipient').annotate(total=Count('pk')).values('total')
+    updated = users.update(unread_notification_count=Coalesce(Subquery(counted), 0))
+
+    batch = {}
+    for user_id, count in users.values_list('pk', 'unread_notification_count').iterator():
+        batch[_key(user_id)] = count
+        if len(batch) >= BATCH_SIZE:
+            cache.set_many(batch, CACHE_TIMEOUT)
+            batch = {}
+    if batch:
+        cache.set_many(batch, CACHE_TIMEOUT)
+    return updated
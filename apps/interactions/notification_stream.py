@@ -0,0 +1,185 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import notification_counter
+from .hub import get_hub
+from .models import NotificationEvent
+from .serializers import NotificationSerializer
+
+
+# Seconds between comment lines that keep idle connections open through proxies
+HEARTBEAT = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+# Events replayed at most to a client resuming with Last-Event-ID, and how long they are kept
+REPLAY_SIZE = getattr(settings, 'NOTIFICATION_STREAM_REPLAY_SIZE', 100)
+REPLAY_TTL = getattr(settings, 'NOTIFICATION_STREAM_REPLAY_TTL', 60 * 60)
+# Seconds before a stream is ended so the client reconnects and resumes
+MAX_AGE = getattr(settings, 'NOTIFICATION_STREAM_MAX_AGE', 60 * 5)
+# Milliseconds browsers wait before reconnecting
+RETRY = getattr(settings, 'NOTIFICATION_STREAM_RETRY', 3000)
+
+
+def notification_channel(user_id):
+    return f'notifications.{user_id}'
+
+
+def frame(event_id, event, data):
+    """Encode one Server-Sent Event."""
+    return _frame(event_id, event, json.dumps(data))
+
+
+def _frame(event_id, event, payload):
+    return f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'
+
+
+def frame_id(text):
+    """Return the id of a frame built by :func:`frame`."""
+    return int(text[4:text.index('\n')])
+
+
+def current_id(user_id):
+    """Return the id of the user's latest stored event, or 0."""
+    return NotificationEvent.objects.filter(recipient_id=user_id).aggregate(latest=Max('id'))['latest'] or 0
+
+
+_pruned_at = 0
+
+
+def push_many(events):
+    """
+    Store ``(user_id, event, data)`` events for replay and send them to the users' streams.
+
+    The events are inserted with one ``bulk_create`` and numbered by their
+    primary keys, so every worker hands out ids from the same sequence.
+    Events older than ``REPLAY_TTL`` are pruned at most once a minute per
+    process.
+    """
+    global _pruned_at
+    rows = NotificationEvent.objects.bulk_create([
+        NotificationEvent(recipient_id=user_id, event=event, data=json.dumps(data))
+        for user_id, event, data in events
+    ])
+    hub = get_hub()
+    for row in rows:
+        hub.publish(notification_channel(row.recipient_id), _frame(row.pk, row.event, row.data))
+
+    if time.monotonic() - _pruned_at > 60:
+        _pruned_at = time.monotonic()
+        NotificationEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=REPLAY_TTL)).delete()
+    return rows
+
+
+def publish_notifications(notifications):
+    """
+    Push new notifications to their recipients, then each recipient's unread count.
+
+    Recipients are loaded once per batch, unread counts come from the
+    counter and events are stored with one insert, so a ``bulk_create`` of
+    many notifications costs at most three queries.
+    """
+    from apps.users.models import User
+
+    notifications = [notification for notification in notifications if notification.pk is not None]
+    if not notifications:
+        return
+    by_recipient = defaultdict(list)
+    for notification in notifications:
+        by_recipient[notification.recipient_id].append(notification)
+    recipients = User.objects.in_bulk(list(by_recipient))
+    counts = notification_counter.get_many(list(by_recipient))
+
+    events = []
+    for user_id, batch in by_recipient.items():
+        for notification in batch:
+            notification.recipient = recipients[user_id]
+            events.append((user_id, 'notification', NotificationSerializer(notification).data))
+        events.append((user_id, 'unread_count', {'unread_count': counts[user_id]}))
+    push_many(events)
+
+
+def publish_unread_counts(user_ids):
+    """Push the current unread count of each user."""
+    push_many([
+        (user_id, 'unread_count', {'unread_count': count})
+        for user_id, count in notification_counter.get_many(set(user_ids)).items()
+    ])
+
+
+def publish_notifications_on_commit(notifications):
+    notifications = list(notifications)
+    transaction.on_commit(lambda: publish_notifications(notifications))
+
+
+def publish_unread_counts_on_commit(user_ids):
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: publish_unread_counts(user_ids))
+
+
+def replay(user_id, last_event_id):
+    """
+    Return the frames after ``last_event_id``, or None if they are gone.
+
+    Frames are gone when the client fell more than ``REPLAY_SIZE`` events
+    behind, or the event it last saw has been pruned.
+    """
+    rows = list(
+        NotificationEvent.objects.filter(recipient_id=user_id, id__gt=last_event_id).order_by('id')[:REPLAY_SIZE + 1]
+    )
+    if len(rows) > REPLAY_SIZE:
+        return None
+    if last_event_id and not NotificationEvent.objects.filter(recipient_id=user_id, pk=last_event_id).exists():
+        return None
+    return [_frame(row.pk, row.event, row.data) for row in rows]
+
+
+def opening_frames(user_id, last_event_id=None):
+    """
+    Return the frames a new stream starts with.
+
+    A resuming client gets the events it missed. Everyone else gets the
+    current unread count, as a ``reset`` event when a resume was asked for
+    but the events are no longer available, so the client reloads its list.
+    """
+    if last_event_id is not None:
+        frames = replay(user_id, last_event_id)
+        if frames is not None:
+            return frames
+    event = 'unread_count' if last_event_id is None else 'reset'
+    return [frame(current_id(user_id), event, {'unread_count': notification_counter.get(user_id)})]
+
+
+async def events(subscription, opening):
+    """
+    Yield the body of a stream: the opening frames, then live events and heartbeats.
+
+    The subscription is opened before the opening frames are read, so live
+    events they already contain are skipped rather than sent twice. Ids
+    are not compared otherwise: workers commit in their own order, so a
+    live event may carry a lower id than one already sent.
+    """
+    started = time.monotonic()
+    opened = {frame_id(text) for text in opening}
+    try:
+        yield f'retry: {RETRY}\n\n'
+        for text in opening:
+            yield text
+        while True:
+            remaining = MAX_AGE - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            try:
+                text = await asyncio.wait_for(subscription.get(), min(HEARTBEAT, remaining))
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if frame_id(text) not in opened:
+                yield text
+    finally:
+        subscription.close()
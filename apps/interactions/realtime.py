@@ -0,0 +1,206 @@
+import asyncio
+import json
+import re
+from functools import wraps
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, transaction
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from . import inbox
+from .hub import get_hub
+from .models import Conversation
+from .serializers import ConversationMessageSerializer
+
+
+# Close codes sent before the handshake completes
+UNAUTHORIZED = 4401
+FORBIDDEN = 4403
+NOT_FOUND = 4404
+
+ROUTES = [
+    (re.compile(r'^/ws/conversations/$'), 'inbox'),
+    (re.compile(r'^/ws/conversations/(?P<conversation_id>\d+)/$'), 'conversation'),
+]
+
+
+def conversation_channel(conversation_id):
+    return f'conversation.{conversation_id}'
+
+
+def user_channel(user_id):
+    return f'user.{user_id}'
+
+
+def publish_message(message):
+    """
+    Push a new conversation message to its participants' sockets.
+
+    Sent to the conversation's channel and to every participant's inbox
+    channel; call it once the message is committed.
+    """
+    event = json.dumps({
+        'type': 'message',
+        'conversation': message.conversation_id,
+        'message': ConversationMessageSerializer(message).data,
+    })
+    participant_ids = Conversation.participants.through.objects.filter(
+        conversation_id=message.conversation_id
+    ).values_list('user_id', flat=True)
+
+    hub = get_hub()
+    hub.publish(conversation_channel(message.conversation_id), event)
+    for user_id in participant_ids:
+        hub.publish(user_channel(user_id), event)
+
+
+def publish_on_commit(message):
+    transaction.on_commit(lambda: publish_message(message))
+
+
+def authenticate(scope):
+    """Return the user of the JWT access token in the query string or Authorization header."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    raw_token = query.get('token', [None])[0]
+    if raw_token is None:
+        headers = dict(scope.get('headers', ()))
+        header = headers.get(b'authorization', b'').decode().split()
+        if len(header) == 2 and header[0] == 'Bearer':
+            raw_token = header[1]
+    return user_for_token(raw_token)
+
+
+def user_for_token(raw_token):
+    """Return the active user of a raw JWT access token, or None."""
+    if not raw_token:
+        return None
+
+    authentication = JWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+def database_sync_to_async(function):
+    """
+    Wrap a function that uses the database for calling from a socket.
+
+    Like ``sync_to_async``, but stale connections are closed before and
+    after each call, as Django does around every request; a socket may
+    stay open far longer than the connection's ``CONN_MAX_AGE``.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper)
+
+
+def conversation_for(user, conversation_id):
+    """Return ``(conversation, is_participant)``, or ``(None, False)`` if it does not exist."""
+    conversation = Conversation.objects.filter(pk=conversation_id).first()
+    if conversation is None:
+        return None, False
+    return conversation, conversation.participants.filter(pk=user.pk).exists()
+
+
+def send_message(user, conversation, data):
+    """
+    Create a message sent over a socket, as the messages endpoint does; returns errors or None.
+
+    Raises ``PermissionDenied`` if the user has left the conversation since
+    the socket connected.
+    """
+    serializer = ConversationMessageSerializer(data=data)
+    if not serializer.is_valid():
+        return serializer.errors
+    if not conversation.participants.filter(pk=user.pk).exists():
+        raise PermissionDenied("You are no longer a participant in this conversation.")
+    with transaction.atomic():
+        message = serializer.save(conversation=conversation, sender=user)
+        inbox.record_message(message)
+        publish_on_commit(message)
+    return None
+
+
+async def _forward(send, subscription):
+    while True:
+        await send({'type': 'websocket.send', 'text': await subscription.get()})
+
+
+async def websocket_application(scope, receive, send):
+    """
+    ASGI application for real-time messaging.
+
+    ``/ws/conversations/`` streams new messages from all of the user's
+    conversations; ``/ws/conversations/<id>/`` streams one conversation and
+    also accepts ``{"type": "message", "body": ...}`` to send a message.
+    Clients authenticate with a JWT access token, passed as ``?token=``
+    since browsers cannot set headers on WebSocket requests.
+    """
+    if (await receive())['type'] != 'websocket.connect':
+        return
+
+    for pattern, route in ROUTES:
+        match = pattern.match(scope['path'])
+        if match:
+            break
+    else:
+        await send({'type': 'websocket.close', 'code': NOT_FOUND})
+        return
+
+    user = await database_sync_to_async(authenticate)(scope)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': UNAUTHORIZED})
+        return
+
+    conversation = None
+    if route == 'conversation':
+        conversation, is_participant = await database_sync_to_async(conversation_for)(
+            user, match['conversation_id']
+        )
+        if conversation is None:
+            await send({'type': 'websocket.close', 'code': NOT_FOUND})
+            return
+        if not is_participant:
+            await send({'type': 'websocket.close', 'code': FORBIDDEN})
+            return
+        channels = [conversation_channel(conversation.pk)]
+    else:
+        channels = [user_channel(user.pk)]
+
+    subscription = get_hub().subscribe(channels)
+    await send({'type': 'websocket.accept'})
+    forwarder = asyncio.ensure_future(_forward(send, subscription))
+    try:
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                break
+            if event['type'] != 'websocket.receive' or conversation is None:
+                continue
+            try:
+                data = json.loads(event.get('text') or '')
+            except ValueError:
+                data = None
+            if not isinstance(data, dict) or data.get('type') != 'message':
+                errors = {'detail': 'Expected a JSON object with type "message".'}
+            else:
+                try:
+                    errors = await database_sync_to_async(send_message)(user, conversation, data)
+                except PermissionDenied:
+                    await send({'type': 'websocket.close', 'code': FORBIDDEN})
+                    break
+            if errors:
+                await send({'type': 'websocket.send', 'text': json.dumps({'type': 'error', 'errors': errors})})
+    finally:
+        forwarder.cancel()
+        subscription.close()
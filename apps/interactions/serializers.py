@@ -6,6 +6,7 @@ from .models import (
     CollaborativeSpace, SpaceMembership
 )
 from apps.users.serializers import UserSerializer
+from . import inbox
 
 User = get_user_model()
 
@@ -107,43 +108,26 @@ class ConversationReadSerializer(serializers.ModelSerializer):
 class ConversationSerializer(serializers.ModelSerializer):
     """Serializer for the Conversation model."""
     participants = UserSerializer(many=True, read_only=True)
-    last_message = serializers.SerializerMethodField()
+    last_message = ConversationMessageSerializer(read_only=True)
     unread_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Conversation
         fields = [
             'id', 'participants', 'created_at', 'updated_at',
-            'is_group', 'name', 'last_message', 'unread_count'
+            'is_group', 'name', 'last_message', 'last_message_preview', 'unread_count'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_last_message(self, obj):
-        """Get the last message in the conversation."""
-        last_message = obj.messages.order_by('-created_at').first()
-        if last_message:
-            return ConversationMessageSerializer(last_message).data
-        return None
+        read_only_fields = ['id', 'created_at', 'updated_at', 'last_message_preview']
     
     def get_unread_count(self, obj):
         """Get the count of unread messages for the current user."""
-        user = self.context.get('request').user
-        if not user:
+        # Annotated by inbox.inbox_queryset() on list and detail requests
+        if hasattr(obj, 'unread_count'):
+            return obj.unread_count
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
             return 0
-        
-        # Get the last time the user read this conversation
-        read_mark = ConversationRead.objects.filter(
-            conversation=obj,
-            user=user
-        ).first()
-        
-        if not read_mark:
-            return obj.messages.exclude(sender=user).count()
-        
-        # Count messages after the last read time
-        return obj.messages.filter(
-            created_at__gt=read_mark.last_read_at
-        ).exclude(sender=user).count()
+        return inbox.unread_count(obj, request.user)
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -154,10 +138,11 @@ class NotificationSerializer(serializers.ModelSerializer):
         model = Notification
         fields = [
             'id', 'recipient', 'notification_type', 'title',
-            'message', 'link', 'is_read', 'read_at', 'created_at'
+            'message', 'link', 'actor_count', 'recent_actors', 'is_read', 'read_at', 'created_at',
+            'last_event_at'
         ]
         read_only_fields = [
-            'id', 'recipient', 'created_at'
+            'id', 'recipient', 'actor_count', 'recent_actors', 'created_at', 'last_event_at'
         ]
 
 
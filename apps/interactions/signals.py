@@ -1 +1,41 @@
-# Interactions app signals will be defined here 
\ No newline at end of file
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import inbox, notification_counter, notification_stream
+from .models import ConversationMessage, Notification
+
+
+@receiver(post_init, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    """Remember whether a notification is counted as unread; new rows are not counted yet."""
+    # Read from __dict__ so a deferred is_read is not fetched
+    instance._counted_unread = instance.pk is not None and instance.__dict__.get('is_read') is False
+
+
+@receiver(post_save, sender=Notification)
+def count_and_stream_notification(sender, instance, created, **kwargs):
+    """Move the recipient's unread counter, and push changes to open streams once committed."""
+    unread = not instance.is_read
+    delta = unread - instance._counted_unread
+    instance._counted_unread = unread
+    if delta:
+        notification_counter.adjust({instance.recipient_id: delta})
+    if created:
+        notification_stream.publish_notifications_on_commit([instance])
+    elif delta:
+        notification_stream.publish_unread_counts_on_commit([instance.recipient_id])
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    """Take a deleted unread notification off the counter; deferred deletes publish once themselves."""
+    if instance._counted_unread:
+        notification_counter.adjust({instance.recipient_id: -1})
+        if not notification_counter.is_deferred():
+            notification_stream.publish_unread_counts_on_commit([instance.recipient_id])
+
+
+@receiver(post_delete, sender=ConversationMessage)
+def repoint_conversation(sender, instance, **kwargs):
+    """Move the conversation's last message back when its newest one is deleted."""
+    inbox.forget_message(instance)
@@ -16,6 +16,7 @@ urlpatterns = [
     path('conversations/<int:conversation_id>/read/', views.MarkConversationReadView.as_view(), name='mark-conversation-read'),
     path('notifications/read-all/', views.MarkAllNotificationsReadView.as_view(), name='mark-all-notifications-read'),
     path('notifications/read_all/', views.MarkAllNotificationsReadView.as_view(), name='mark-all-notifications-read-underscore'),
+    path('notifications/stream/', views.NotificationStreamView.as_view(), name='notification-stream'),
 ]
 
 urlpatterns += router.urls 
\ No newline at end of file
@@ -3,8 +3,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.views import View
 from django.db.models import Q, Count
 
 from .models import (
@@ -18,10 +21,15 @@ from .serializers import (
     ConversationReadSerializer, NotificationSerializer,
     CollaborativeSpaceSerializer, SpaceMembershipSerializer
 )
+from . import inbox, notification_counter, notification_stream, realtime
+from .hub import get_hub
 from apps.users.models import User
+from socisphere.pagination import KeysetPagination, OldestFirstKeysetPagination
+from socisphere.compiled_serializers import CompiledListMixin
+from socisphere.query_planner import QueryPlannerMixin, plan_queryset
 
 
-class ConnectionViewSet(viewsets.ModelViewSet):
+class ConnectionViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing user connections."""
     serializer_class = ConnectionSerializer
     permission_classes = [IsAuthenticated]
@@ -35,10 +43,11 @@ class ConnectionViewSet(viewsets.ModelViewSet):
         serializer.save(follower=self.request.user)
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing direct messages."""
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Return messages the current user has sent or received."""
@@ -95,7 +104,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ConversationViewSet(viewsets.ModelViewSet):
+class ConversationViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing conversations."""
     serializer_class = ConversationSerializer
     permission_classes = [IsAuthenticated]
@@ -106,9 +115,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Conversation.objects.none()
         
-        return Conversation.objects.filter(
-            participants=self.request.user
-        ).order_by('-updated_at')
+        return inbox.inbox_queryset(self.request.user)
 
     def perform_create(self, serializer):
         """Create a new conversation."""
@@ -172,10 +179,11 @@ class ConversationViewSet(viewsets.ModelViewSet):
         )
 
 
-class ConversationMessagesView(generics.ListCreateAPIView):
+class ConversationMessagesView(QueryPlannerMixin, generics.ListCreateAPIView):
     """View for listing and creating messages in a conversation."""
     serializer_class = ConversationMessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OldestFirstKeysetPagination
 
     def get_queryset(self):
         """Return messages for a specific conversation."""
@@ -203,14 +211,14 @@ class ConversationMessagesView(generics.ListCreateAPIView):
             )
         
         # Create the message
-        serializer.save(
+        message = serializer.save(
             conversation=conversation,
             sender=self.request.user
         )
         
-        # Update the conversation's updated_at time
-        conversation.updated_at = timezone.now()
-        conversation.save()
+        # Move the inbox pointer and the other participants' unread counters
+        inbox.record_message(message)
+        realtime.publish_on_commit(message)
 
 
 class MarkConversationReadView(APIView):
@@ -228,12 +236,8 @@ class MarkConversationReadView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Update or create the read mark
-        read_mark, created = ConversationRead.objects.update_or_create(
-            conversation=conversation,
-            user=request.user,
-            defaults={"last_read_at": timezone.now()}
-        )
+        # Update or create the read mark, clearing the unread counter
+        read_mark = inbox.mark_read(conversation, request.user)
         
         serializer = ConversationReadSerializer(read_mark)
         return Response(serializer.data)
@@ -295,10 +299,11 @@ class UnfollowUserView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(CompiledListMixin, QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing notifications."""
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Return the current user's notifications, filtered if requested."""
@@ -346,11 +351,50 @@ class MarkAllNotificationsReadView(APIView):
             recipient=request.user,
             is_read=False
         ).update(is_read=True, read_at=now)
+        if count:
+            notification_counter.adjust({request.user.pk: -count})
+            notification_stream.publish_unread_counts_on_commit([request.user.pk])
         
         return Response({"count": count, "status": "all notifications marked as read"})
 
 
-class CollaborativeSpaceViewSet(viewsets.ModelViewSet):
+class NotificationStreamView(View):
+    """
+    Server-Sent Events stream of the current user's notifications.
+
+    Sends ``notification`` and ``unread_count`` events as they are committed,
+    resumes from ``Last-Event-ID`` and sends heartbeats. Browsers cannot set
+    headers on an ``EventSource``, so the JWT access token may be passed as
+    ``?token=``. Served asynchronously, so it needs the ASGI server.
+    """
+
+    async def get(self, request):
+        raw_token = request.GET.get('token')
+        if raw_token is None:
+            header = request.headers.get('Authorization', '').split()
+            if len(header) == 2 and header[0] == 'Bearer':
+                raw_token = header[1]
+        user = await sync_to_async(realtime.user_for_token)(raw_token)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            last_event_id = int(request.headers['Last-Event-ID'])
+        except (KeyError, ValueError):
+            last_event_id = None
+
+        subscription = get_hub().subscribe([notification_stream.notification_channel(user.pk)])
+        opening = await sync_to_async(notification_stream.opening_frames)(user.pk, last_event_id)
+        response = StreamingHttpResponse(
+            notification_stream.events(subscription, opening), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keep nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class CollaborativeSpaceViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing collaborative spaces."""
     serializer_class = CollaborativeSpaceSerializer
     permission_classes = [IsAuthenticated]
@@ -541,9 +585,12 @@ class CollaborativeSpaceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        memberships = SpaceMembership.objects.filter(
-            space=space
-        ).order_by('role', 'joined_at')
+        memberships = plan_queryset(
+            SpaceMembership.objects.filter(
+                space=space
+            ).order_by('role', 'joined_at'),
+            SpaceMembershipSerializer
+        )
         
         serializer = SpaceMembershipSerializer(memberships, many=True)
         return Response(serializer.data) 
\ No newline at end of file
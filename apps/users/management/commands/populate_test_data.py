@@ -20,6 +20,7 @@ from apps.interactions.models import (
     Connection, Message, Conversation, ConversationMessage,
     ConversationRead, Notification, CollaborativeSpace, SpaceMembership
 )
+from apps.interactions import inbox
 
 User = get_user_model()
 
@@ -80,6 +81,8 @@ class Command(BaseCommand):
                 
             if section in ['conversations', 'all']:
                 self.create_conversations()
+                # Messages and read marks are written directly, so derive the inbox from them
+                inbox.rebuild()
                 
             if section in ['spaces', 'all']:
                 self.create_collaborative_spaces()
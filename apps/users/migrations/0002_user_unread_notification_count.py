@@ -0,0 +1,30 @@
+# Generated by Django 4.2.20 on 2026-10-18 05:18
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_unread_notifications(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Notification = apps.get_model('interactions', 'Notification')
+    counted = Notification.objects.filter(
+        recipient=models.OuterRef('pk'), is_read=False
+    ).order_by().values('recipient').annotate(total=models.Count('id')).values('total')
+    User.objects.update(unread_notification_count=Coalesce(models.Subquery(counted), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('interactions', '0006_conversation_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_unread_notifications, migrations.RunPython.noop),
+    ]
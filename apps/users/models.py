@@ -27,6 +27,9 @@ class User(AbstractUser):
     # Verification
     is_verified = models.BooleanField(default=False)
     
+    # Denormalized counters, kept by apps.interactions.notification_counter
+    unread_notification_count = models.PositiveIntegerField(default=0)
+    
     REQUIRED_FIELDS = ['email']
     
     def __str__(self):
@@ -9,6 +9,7 @@ from .serializers import (
     MoodBoardSerializer, MoodBoardItemSerializer, WellbeingDataSerializer
 )
 from datetime import time
+from socisphere.query_planner import QueryPlannerMixin
 
 User = get_user_model()
 
@@ -46,7 +47,7 @@ class CurrentUserView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing users."""
     queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
@@ -64,7 +65,7 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response([])
 
 
-class UserPreferenceViewSet(viewsets.ModelViewSet):
+class UserPreferenceViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing user preferences."""
     serializer_class = UserPreferenceSerializer
     permission_classes = [IsAuthenticated]
@@ -73,7 +74,7 @@ class UserPreferenceViewSet(viewsets.ModelViewSet):
         return UserPreference.objects.filter(user=self.request.user).order_by('id')
 
 
-class MoodBoardViewSet(viewsets.ModelViewSet):
+class MoodBoardViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing mood boards."""
     serializer_class = MoodBoardSerializer
     permission_classes = [IsAuthenticated]
@@ -99,7 +100,7 @@ class MoodBoardViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class WellbeingDataViewSet(viewsets.ModelViewSet):
+class WellbeingDataViewSet(QueryPlannerMixin, viewsets.ModelViewSet):
     """ViewSet for managing wellbeing data."""
     serializer_class = WellbeingDataSerializer
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,249 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+
+# DRF fields whose to_representation() returns database values unchanged.
+_IDENTITY_FIELDS = (
+    (serializers.CharField, (models.CharField, models.TextField)),
+    (serializers.IntegerField, (models.IntegerField, models.AutoField)),
+    (serializers.BooleanField, (models.BooleanField,)),
+    (serializers.FloatField, (models.FloatField,)),
+)
+
+
+def _is_identity(field, model_field):
+    for serializer_field, model_fields in _IDENTITY_FIELDS:
+        if type(field).to_representation is serializer_field.to_representation:
+            return isinstance(model_field, model_fields)
+    return False
+
+
+def _file_converter(field, model_field):
+    """Mirror ``FileField.to_representation`` for a stored file name."""
+    use_url = getattr(field, 'use_url', serializers.api_settings.UPLOADED_FILES_USE_URL)
+    storage = model_field.storage
+
+    def convert(name, request):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+class CompiledSerializer:
+    """
+    Read-only renderer generated from a ``ModelSerializer`` definition.
+
+    The serializer's fields are resolved once into the columns to fetch with
+    ``.values()`` and the related rows to batch-load per page, and a flat
+    function is generated that builds each output dict directly from a row.
+    Fields that define ``batch_load(model, ids)`` are loaded the same way,
+    once per page. Output matches ``serializer.data`` field for field.
+    Serializers with fields that cannot be derived from rows (such as
+    ``SerializerMethodField``) raise ``ImproperlyConfigured`` when compiled.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.pk_attname = self.model._meta.pk.attname
+        self.columns = [self.pk_attname]
+        self.needs_instance = False
+        self.nested = []
+        self.namespace = {}
+        entries = []
+
+        for index, field in enumerate(serializer_class()._readable_fields):
+            entries.append((field.field_name, self._compile_field(index, field)))
+
+        if self.needs_instance:
+            self.columns = [field.attname for field in self.model._meta.concrete_fields]
+        self._render_all = self._generate(entries)
+
+    def _add_column(self, attname):
+        if attname not in self.columns:
+            self.columns.append(attname)
+        return f"row[{attname!r}]"
+
+    def _fail(self, field, reason):
+        raise ImproperlyConfigured(
+            f"Cannot compile {self.serializer_class.__name__}.{field.field_name}: {reason}"
+        )
+
+    def _compile_field(self, index, field):
+        if hasattr(field, 'batch_load'):
+            column = self._add_column(self.pk_attname)
+            self.nested.append((f'n_{index}', 'batch', field, None))
+            return f"n_{index}[{column}]"
+        if isinstance(field, (serializers.SerializerMethodField, serializers.ManyRelatedField)) or (
+                isinstance(field, serializers.RelatedField) and not isinstance(field, PrimaryKeyRelatedField)):
+            self._fail(field, f"{type(field).__name__} is not supported")
+        if field.source == '*' or len(field.source_attrs) != 1:
+            self._fail(field, "only direct model attributes are supported")
+        attr = field.source_attrs[0]
+        try:
+            model_field = self.model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            model_field = None
+
+        if isinstance(field, serializers.ListSerializer):
+            return self._compile_many(index, field, model_field)
+        if isinstance(field, serializers.BaseSerializer):
+            return self._compile_one(index, field, model_field)
+        if isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None or model_field is None or not model_field.many_to_one:
+                self._fail(field, "only plain foreign key ids are supported")
+            return self._add_column(model_field.attname)
+
+        if model_field is None:
+            # A model property or method: read it off an instance built from the row.
+            self.needs_instance = True
+            self.namespace[f'g_{index}'] = field.get_attribute
+            self.namespace[f'c_{index}'] = field.to_representation
+            return f"(None if (v := g_{index}(inst)) is None else c_{index}(v))"
+        if model_field.is_relation:
+            self._fail(field, "relations must use a nested serializer or primary key field")
+
+        column = self._add_column(model_field.attname)
+        if isinstance(model_field, models.FileField):
+            self.namespace[f'c_{index}'] = _file_converter(field, model_field)
+            return f"c_{index}({column}, request)"
+        if _is_identity(field, model_field):
+            return column
+        self.namespace[f'c_{index}'] = field.to_representation
+        return f"(None if (v := {column}) is None else c_{index}(v))"
+
+    def _compile_one(self, index, field, model_field):
+        if model_field is None or not (model_field.many_to_one or model_field.one_to_one) \
+                or not model_field.concrete:
+            self._fail(field, "nested serializers must follow a forward foreign key")
+        column = self._add_column(model_field.attname)
+        self.nested.append((f'n_{index}', 'one', model_field, compile_serializer(type(field))))
+        return f"n_{index}.get({column})"
+
+    def _compile_many(self, index, field, model_field):
+        child = compile_serializer(type(field.child))
+        if model_field is not None and model_field.many_to_many and model_field.concrete:
+            kind, owner = 'm2m', self.pk_attname
+        elif model_field is not None and model_field.one_to_many:
+            kind, owner = 'reverse', model_field.field.target_field.attname
+        else:
+            self._fail(field, "nested lists must follow a many-to-many or reverse foreign key")
+        column = self._add_column(owner)
+        self.nested.append((f'n_{index}', kind, model_field, child))
+        return f"n_{index}.get({column}, [])"
+
+    def _generate(self, entries):
+        params = ['rows', 'request', 'make_instance'] + [name for name, *_ in self.nested]
+        lines = [f"def render_all({', '.join(params)}):", "    out = []", "    append = out.append",
+                 "    for row in rows:"]
+        if self.needs_instance:
+            lines.append("        inst = make_instance(row)")
+        lines.append("        append({")
+        lines.extend(f"            {name!r}: {expression}," for name, expression in entries)
+        lines.extend(["        })", "    return out"])
+        source = '\n'.join(lines)
+
+        namespace = dict(self.namespace)
+        exec(compile(source, f'<compiled {self.serializer_class.__name__}>', 'exec'), namespace)
+        self.source = source
+        return namespace['render_all']
+
+    def values(self, queryset, extra=()):
+        """Return the queryset as ``.values()`` rows carrying every needed column."""
+        columns = self.columns + [column for column in extra if column not in self.columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def render(self, queryset, request=None):
+        """Render a queryset of the serializer's model."""
+        return self.render_rows(list(self.values(queryset)), request)
+
+    def render_rows(self, rows, request=None):
+        """Render rows previously fetched with ``values()``."""
+        batches = {name: self._load(kind, model_field, child, rows, request)
+                   for name, kind, model_field, child in self.nested}
+        return self._render_all(rows, request, self._make_instance, **batches)
+
+    def _make_instance(self, row):
+        return self.model.from_db(None, self.columns, [row[column] for column in self.columns])
+
+    def _ordered(self, queryset):
+        return queryset if queryset.ordered else queryset.order_by('pk')
+
+    def _render_by_pk(self, child, ids, request):
+        rows = list(child.values(self._ordered(child.model._default_manager.filter(pk__in=ids))))
+        return rows, child.render_rows(rows, request)
+
+    def _load(self, kind, model_field, child, rows, request):
+        if kind == 'batch':
+            return model_field.batch_load(self.model, [row[self.pk_attname] for row in rows])
+        if kind == 'one':
+            ids = {row[model_field.attname] for row in rows} - {None}
+            if not ids:
+                return {}
+            child_rows, rendered = self._render_by_pk(child, ids, request)
+            return {row[child.pk_attname]: data for row, data in zip(child_rows, rendered)}
+
+        grouped = {}
+        if kind == 'reverse':
+            foreign_key = model_field.field
+            owner_ids = {row[foreign_key.target_field.attname] for row in rows}
+            if not owner_ids:
+                return grouped
+            queryset = child.model._default_manager.filter(**{f'{foreign_key.name}__in': owner_ids})
+            child_rows = list(child.values(self._ordered(queryset), extra=[foreign_key.attname]))
+            for row, data in zip(child_rows, child.render_rows(child_rows, request)):
+                grouped.setdefault(row[foreign_key.attname], []).append(data)
+            return grouped
+
+        # Many-to-many: read the through table, then render each target once.
+        through = model_field.remote_field.through
+        source = through._meta.get_field(model_field.m2m_field_name()).attname
+        target = through._meta.get_field(model_field.m2m_reverse_field_name()).attname
+        pairs = list(through.objects.filter(**{f'{source}__in': {row[self.pk_attname] for row in rows}})
+                     .values_list(source, target))
+        if not pairs:
+            return grouped
+        child_rows, rendered = self._render_by_pk(child, {target_id for _, target_id in pairs}, request)
+        position = {row[child.pk_attname]: i for i, row in enumerate(child_rows)}
+        for owner_id, target_id in sorted(pairs, key=lambda pair: position[pair[1]]):
+            grouped.setdefault(owner_id, []).append(rendered[position[target_id]])
+        return grouped
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """Return the cached ``CompiledSerializer`` for a serializer class."""
+    return CompiledSerializer(serializer_class)
+
+
+class CompiledListMixin:
+    """
+    View mixin that renders list responses with the compiled serializer.
+
+    The page is fetched as ``.values()`` rows, so the pagination class must
+    read cursor positions from dicts, as ``KeysetPagination`` does.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class())
+        ordering = getattr(self.pagination_class, 'ordering', ())
+        queryset = compiled.values(
+            self.filter_queryset(self.get_queryset()),
+            extra=[field.lstrip('-') for field in ordering]
+        )
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        data = compiled.render_rows(rows, request)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,113 @@
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the full ``(created_at, id)`` ordering.
+
+    DRF's ``CursorPagination`` only seeks on the first ordering field and
+    falls back to an OFFSET for ties. Here the cursor stores the value of
+    every ordering field of the boundary row, so each page is a single
+    ``WHERE (created_at, id) < (...) ORDER BY ... LIMIT n`` with no COUNT,
+    and rows inserted while a client scrolls never shift later pages.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor.reverse)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(_invert(field) for field in ordering)
+
+        if self.cursor is not None:
+            queryset = queryset.filter(self._keyset_filter(self.cursor_values, ordering))
+
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+
+        try:
+            self.cursor_values = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(self.cursor_values, list) or len(self.cursor_values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return json.dumps(values, separators=(',', ':'))
+
+    def _keyset_filter(self, values, ordering):
+        """Build the lexicographic ``row > cursor`` predicate for the ordering."""
+        condition = Q()
+        preceding_equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= preceding_equal & Q(**{f'{name}__{lookup}': value})
+            preceding_equal &= Q(**{name: value})
+        return condition
+
+
+class OldestFirstKeysetPagination(KeysetPagination):
+    """Keyset pagination for chronological lists such as conversation threads."""
+    ordering = ('created_at', 'id')
+
+
+def _invert(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
@@ -0,0 +1,196 @@
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import QuerySet, prefetch_related_objects
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+
+logger = logging.getLogger(__name__)
+
+
+def _relation_path(model, source_attrs):
+    """
+    Resolve a field source against a model.
+
+    Returns ``(lookup, related_model, many)`` or ``None`` when the source is
+    not a chain of model relations (a property, a method or a plain column).
+    """
+    parts = []
+    many = False
+    for attr in source_attrs:
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation:
+            return None
+        parts.append(attr)
+        # Generic foreign keys have no related model and can only be prefetched.
+        many = many or field.many_to_many or field.one_to_many or field.related_model is None
+        model = field.related_model
+    return ('__'.join(parts), model, many) if parts else None
+
+
+def _walk(serializer, model, prefix, in_prefetch, select, prefetch):
+    meta = getattr(serializer, 'Meta', None)
+    for lookup in getattr(meta, 'select_related', ()):
+        (prefetch if in_prefetch else select).add(prefix + lookup)
+    for lookup in getattr(meta, 'prefetch_related', ()):
+        prefetch.add(prefix + lookup)
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        elif isinstance(field, serializers.BaseSerializer):
+            child = field
+        elif isinstance(field, ManyRelatedField):
+            child = None
+        elif isinstance(field, RelatedField) and not isinstance(field, PrimaryKeyRelatedField):
+            child = None
+        else:
+            # Scalars, and primary keys read straight from the ``*_id`` column.
+            continue
+
+        resolved = _relation_path(model, field.source_attrs)
+        if resolved is None:
+            continue
+        lookup, related_model, many = resolved
+        lookup = prefix + lookup
+
+        if many or in_prefetch:
+            prefetch.add(lookup)
+        else:
+            select.add(lookup)
+
+        if child is not None and related_model is not None:
+            _walk(child, related_model, lookup + '__', many or in_prefetch, select, prefetch)
+
+
+@lru_cache(maxsize=None)
+def plan(serializer_class):
+    """
+    Return the ``(select_related, prefetch_related)`` lookups a serializer needs.
+
+    Nested serializers and related fields reached through forward foreign
+    keys are joined; anything reached through a to-many relation is
+    prefetched, along with everything nested beneath it. Method fields can
+    declare the relations they read with ``Meta.select_related`` and
+    ``Meta.prefetch_related``.
+    """
+    model = serializer_class.Meta.model
+    select, prefetch = set(), set()
+    _walk(serializer_class(), model, '', False, select, prefetch)
+    # A lookup joined by select_related is already loaded; drop its prefixes.
+    select = {lookup for lookup in select if not any(
+        other.startswith(lookup + '__') for other in select
+    )}
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+def plan_queryset(queryset, serializer_class):
+    """
+    Apply the serializer's query plan to a queryset.
+
+    Lists of already loaded instances, such as ranked search or trending
+    results, get the same relations fetched in place with
+    ``prefetch_related_objects``; joins become prefetches there.
+    """
+    model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+    if model is None:
+        return queryset
+    if isinstance(queryset, list):
+        if queryset and all(isinstance(instance, model) for instance in queryset):
+            select, prefetch = plan(serializer_class)
+            prefetch_related_objects(queryset, *select, *prefetch)
+        return queryset
+    if not isinstance(queryset, QuerySet) or not issubclass(queryset.model, model):
+        return queryset
+    if queryset._fields is not None or queryset.query.combinator:
+        return queryset
+
+    select, prefetch = plan(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def debug_enabled():
+    return getattr(settings, 'QUERY_PLANNER_DEBUG', False)
+
+
+class LazyLoadRecorder:
+    """Database execute wrapper that records every query run while active."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryPlannerMixin:
+    """
+    View mixin that plans eager loading from the view's serializer.
+
+    The plan is applied in ``filter_queryset()`` so it covers both list and
+    detail requests whatever ``get_queryset()`` returns. Lists of instances
+    are planned once paginated, so only the page is loaded. With
+    ``QUERY_PLANNER_DEBUG`` enabled, any query issued while a response is
+    being serialized is a lazy load the plan missed: those are logged and
+    counted in the ``X-Lazy-Loads`` response header.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if isinstance(queryset, list) and self.paginator is not None:
+            return queryset
+        return plan_queryset(queryset, self.get_serializer_class())
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and isinstance(queryset, list):
+            plan_queryset(page, self.get_serializer_class())
+        return page
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if debug_enabled() and args and 'data' not in kwargs:
+            self._record_lazy_loads(serializer)
+        return serializer
+
+    def _record_lazy_loads(self, serializer):
+        to_representation = serializer.to_representation
+
+        def recorded(instance):
+            if isinstance(instance, QuerySet):
+                instance = list(instance)
+            recorder = LazyLoadRecorder()
+            with connection.execute_wrapper(recorder):
+                data = to_representation(instance)
+            self.lazy_loads = getattr(self, 'lazy_loads', []) + recorder.queries
+            if recorder.queries:
+                logger.warning(
+                    "%s issued %d lazy loads while serializing, first: %s",
+                    type(self).__name__, len(recorder.queries), recorder.queries[0]
+                )
+            return data
+
+        serializer.to_representation = recorded
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if debug_enabled():
+            response['X-Lazy-Loads'] = str(len(getattr(self, 'lazy_loads', [])))
+        return response
@@ -194,3 +194,106 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+# Home timeline settings
+TIMELINE_FANOUT_MAX_FOLLOWERS = 5000  # Larger audiences are merged at read time
+TIMELINE_BACKFILL_SIZE = 100  # Recent posts copied into a timeline on follow
+
+# Engagement score settings
+ENGAGEMENT_HALF_LIFE_HOURS = 24
+ENGAGEMENT_WEIGHTS = {
+    'view': 0.1,
+    'reaction': 1.0,
+    'comment': 2.0,
+    'save': 3.0,
+}
+
+# Buffered view counter settings
+VIEW_COUNTER_FLUSH_INTERVAL = 5.0  # seconds
+VIEW_COUNTER_MAX_PENDING = 1000  # buffered views before a forced flush
+VIEW_COUNTER_BACKGROUND_FLUSH = True
+
+# Trending settings
+TRENDING_WINDOW_HOURS = 24  # Sliding window of hourly activity buckets
+TRENDING_SNAPSHOT_SIZE = 50  # Top-K posts and tags kept in the snapshot
+TRENDING_REFRESH_SECONDS = 300  # Snapshot age before it is recomputed
+
+# Search settings
+SEARCH_BACKEND = 'auto'  # 'auto' prefers SQLite FTS5, 'python' forces the inverted index
+SEARCH_MAX_CANDIDATES = 500  # Ranked matches fetched before visibility filtering
+
+# Post visibility settings
+VISIBILITY_CACHE_TIMEOUT = 60  # Lifetime of cached followed-author sets; keep short unless CACHES is shared by all workers
+VISIBILITY_MAX_INLINE_IDS = 1000  # Larger sets are filtered with a subquery
+
+# Query planner settings
+QUERY_PLANNER_DEBUG = False  # Log lazy loads during serialization and report them in X-Lazy-Loads
+
+# Comment thread settings
+COMMENT_THREAD_PAGE_SIZE = 100  # Comments per thread page
+COMMENT_THREAD_MAX_PAGE_SIZE = 500  # Upper bound for the page_size parameter
+
+# Reaction settings
+REACTION_BATCH_MAX_SIZE = 100  # Reactions applied by one batch request
+
+# Bulk post import settings
+INGEST_BATCH_SIZE = 500  # Posts written together by one batch
+INGEST_MAX_REPORTED_ERRORS = 100  # Failed lines reported in detail
+
+# Mention notification settings
+MENTION_NOTIFY_ASYNC = True  # Deliver mention notifications on worker threads after commit
+MENTION_NOTIFY_WORKERS = 2  # Worker threads delivering mention notifications
+
+# Content expiry settings
+EXPIRY_MODELS = ['content.Post', 'communities.CommunityPost']  # Models swept for expired rows
+EXPIRY_ACTION = 'delete'  # 'delete' or 'archive' expired rows
+EXPIRY_BATCH_SIZE = 500  # Rows removed per transaction
+EXPIRY_BATCH_PAUSE = 0.05  # Seconds between batches, letting other writers in
+
+# Media processing settings
+MEDIA_THUMBNAIL_WIDTHS = [320, 640, 1280]  # Widths of the resized copies of every image
+MEDIA_THUMBNAIL_FORMATS = ['webp', 'jpeg']  # Encodings stored for every width
+MEDIA_THUMBNAIL_QUALITY = 80
+MEDIA_VARIANT_DIR = 'post_media/variants'
+MEDIA_PROCESSING_ASYNC = True  # Decode in a process pool after commit, off the request thread
+MEDIA_PROCESSING_WORKERS = 2
+MEDIA_PROCESSING_TIMEOUT = 60  # Seconds allowed to decode one image
+MEDIA_PROCESSING_STALE_AFTER = 60 * 15  # Seconds before a claim left by a dead worker is taken over
+
+# Content-addressed upload storage settings
+BLOB_DIR = 'blobs'  # Directory under MEDIA_ROOT holding deduplicated uploads
+BLOB_GC_GRACE_SECONDS = 60 * 60 * 24  # Age before an unreferenced blob may be collected
+
+# Resumable upload settings
+UPLOAD_DIR = 'uploads/partial'  # Directory under MEDIA_ROOT holding unfinished uploads
+UPLOAD_MAX_FILE_SIZE = 512 * 1024 * 1024  # Largest file accepted, in bytes
+UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024  # Largest chunk accepted by one request
+UPLOAD_EXPIRY_SECONDS = 60 * 60 * 24  # Uploads idle this long are discarded
+
+# Media serving settings
+MEDIA_SERVE_MODE = 'direct'  # 'direct', or 'x-accel' / 'x-sendfile' to hand transfers to the front server
+MEDIA_ACCEL_PREFIX = '/protected-media/'  # Internal nginx location aliased to MEDIA_ROOT
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365  # Seconds clients may cache media; blobs never change
+
+# Conversation inbox settings
+INBOX_PREVIEW_LENGTH = 100  # Characters of the last message kept on each conversation
+
+# Real-time messaging settings
+REALTIME_BACKEND = 'apps.interactions.hub.LocalBackend'  # SQLiteBackend fans out across local worker processes
+REALTIME_BACKEND_OPTIONS = {}  # e.g. {'path': BASE_DIR / 'realtime.sqlite3', 'poll_interval': 0.02}
+REALTIME_QUEUE_SIZE = 100  # Events buffered per socket before the oldest are dropped
+
+# Notification stream settings
+NOTIFICATION_STREAM_HEARTBEAT = 15  # Seconds between keep-alive comments on idle streams
+NOTIFICATION_STREAM_REPLAY_SIZE = 100  # Most events replayed to a client resuming with Last-Event-ID
+NOTIFICATION_STREAM_REPLAY_TTL = 60 * 60  # Seconds stored stream events are kept for resume
+NOTIFICATION_STREAM_MAX_AGE = 60 * 5  # Seconds before a stream ends and the client resumes on a new one
+NOTIFICATION_STREAM_RETRY = 3000  # Milliseconds browsers wait before reconnecting
+
+# Unread notification counter settings
+NOTIFICATION_COUNTER_CACHE_TIMEOUT = 60  # Seconds a cached count lives; raise it only when CACHES is shared by all workers
+
+# Notification coalescing settings
+NOTIFICATION_COALESCE_WINDOW = 60 * 60 * 24  # Seconds after a group's latest event within which new ones join it
+NOTIFICATION_COALESCE_TYPES = ['like', 'comment', 'follow']  # Grouped by (recipient, type, target)
+NOTIFICATION_RECENT_ACTORS = 3  # Actors named on a coalesced notification
@@ -31,6 +31,7 @@ from rest_framework_simplejwt.views import (
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from apps.content.views import MediaFileView
 
 # Create the schema view for Swagger documentation
 schema_view = get_schema_view(
@@ -105,9 +106,10 @@ urlpatterns = [
     path('messages/', messages_view, name='messages'),
     path('communities/', communities_view, name='communities'),
     path('notifications/', notifications_view, name='notifications'),
+    # Uploaded media, with range requests and access checks
+    re_path(rf'^{settings.MEDIA_URL.strip("/")}/(?P<name>.+)$', MediaFileView.as_view(), name='media-file'),
 ]
 
-# Serve media files in development
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
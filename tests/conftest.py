@@ -11,6 +11,29 @@ import os
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Drop cached per-user state that would outlive the test database."""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def inline_mention_delivery(monkeypatch):
+    """Deliver mention notifications on the test thread, inside the test transaction."""
+    from apps.content import mentions
+    monkeypatch.setattr(mentions, 'ASYNC', False)
+
+
+@pytest.fixture(autouse=True)
+def inline_media_processing(monkeypatch):
+    """Process media on the test thread, inside the test transaction."""
+    from apps.content import media_processing
+    monkeypatch.setattr(media_processing, 'ASYNC', False)
+
+
 @pytest.fixture
 def api_client():
     """Return an API client for testing."""
@@ -0,0 +1,137 @@
+import os
+import pytest
+from io import BytesIO, StringIO
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+
+from apps.content import blobs
+from apps.content.models import Post, Media, Blob
+from apps.interactions.models import Message, MessageAttachment
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Store blobs in a temporary directory."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def post(create_user):
+    """Create a post to attach media to."""
+    return Post.objects.create(user=create_user, body="Meme")
+
+
+@pytest.fixture
+def message(create_user):
+    """Create a private message to attach files to."""
+    friend = User.objects.create_user(username="friend", email="friend@example.com", password="password123")
+    return Message.objects.create(sender=create_user, recipient=friend, body="Look")
+
+
+def _media(post, data, name="meme.png"):
+    media = Media(post=post, type='document')
+    media.file.save(name, ContentFile(data), save=False)
+    media.save()
+    return media
+
+
+def _blob_files(root):
+    return [os.path.join(d, f) for d, _, files in os.walk(root / 'blobs') for f in files]
+
+
+@pytest.mark.django_db
+class TestContentAddressedStorage:
+    """Test deduplicated storage and reference counting."""
+
+    def test_same_content_is_stored_once(self, post, message, media_root):
+        """Test that repeated uploads share one blob across models."""
+        first = _media(post, b"same bytes")
+        second = _media(post, b"same bytes", name="copy.png")
+        attachment = MessageAttachment(message=message, type='image', file_name="meme.png", file_size=10)
+        attachment.file.save("meme.png", ContentFile(b"same bytes"))
+
+        assert first.file.name == second.file.name == attachment.file.name
+        assert first.file.name.startswith('blobs/')
+        assert len(_blob_files(media_root)) == 1
+        assert Blob.objects.get().ref_count == 3
+
+    def test_replacing_and_deleting_release_references(self, post):
+        """Test that counts follow file changes and deletes."""
+        media = _media(post, b"one")
+        old_name = media.file.name
+
+        media.file.save("two.png", ContentFile(b"two"))
+        assert Blob.objects.get(name=old_name).ref_count == 0
+        assert Blob.objects.get(name=media.file.name).ref_count == 1
+
+        Media.objects.get(pk=media.pk).delete()
+        assert not Blob.objects.filter(ref_count__gt=0).exists()
+
+    def test_garbage_collection_respects_grace(self, post, media_root):
+        """Test that orphans are kept through the grace period, then removed."""
+        kept = _media(post, b"kept")
+        _media(post, b"orphan").delete()
+
+        assert blobs.collect_garbage() == (0, 0)
+
+        out = StringIO()
+        call_command('collect_blobs', '--grace', '0', stdout=out)
+
+        assert "Removed 1 orphaned blobs, freeing 6 bytes" in out.getvalue()
+        assert list(Blob.objects.values_list('name', flat=True)) == [kept.file.name]
+        assert len(_blob_files(media_root)) == 1
+
+    def test_scan_removes_files_without_rows(self, post, media_root):
+        """Test that stray files in the blob directory are collected."""
+        _media(post, b"kept")
+        stray = media_root / 'blobs' / 'tmp' / 'upload-crashed'
+        stray.write_bytes(b"partial")
+        os.utime(stray, (0, 0))
+
+        assert blobs.collect_garbage(grace_seconds=60, scan=True) == (1, 7)
+        assert not stray.exists()
+        assert len(_blob_files(media_root)) == 1
+
+    def test_collection_does_not_race_new_uploads(self, post, media_root, monkeypatch):
+        """Test that files are removed before the rows commit, and reused strays are kept."""
+        _media(post, b"orphan").delete()
+        storage = blobs.blob_storage()
+        delete = storage.delete
+        # The test itself runs in a transaction, so count the blocks opened since
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        def recording_delete(name):
+            depths.append(len(connection.atomic_blocks) - depth)
+            delete(name)
+        monkeypatch.setattr(storage, 'delete', recording_delete)
+
+        assert blobs.collect_garbage(grace_seconds=0) == (1, 6)
+        assert depths == [1]
+
+        stray = _media(post, b"stray")
+        Blob.objects.all().delete()
+        os.utime(stray.file.path, (0, 0))
+        _media(post, b"stray")
+
+        assert blobs.collect_garbage(grace_seconds=60, scan=True) == (0, 0)
+        assert os.path.exists(stray.file.path)
+
+    def test_media_variants_are_referenced(self, post, django_capture_on_commit_callbacks):
+        """Test that processed variants are counted and released with their media."""
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200)).save(buffer, 'PNG')
+        with django_capture_on_commit_callbacks(execute=True):
+            media = Media(post=post, type='image')
+            media.file.save("photo.png", ContentFile(buffer.getvalue()))
+
+        variant_names = [variant['name'] for variant in Media.objects.get().variants]
+        assert variant_names
+        assert set(Blob.objects.filter(name__in=variant_names).values_list('ref_count', flat=True)) == {1}
+
+        media.delete()
+        assert not Blob.objects.filter(ref_count__gt=0).exists()
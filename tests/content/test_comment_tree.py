@@ -0,0 +1,178 @@
+import importlib
+import pytest
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content import comment_tree
+from apps.content.models import Post, Comment
+
+
+@pytest.fixture
+def post(create_user):
+    """Create a post to comment on."""
+    return Post.objects.create(user=create_user, body="Discuss")
+
+
+@pytest.fixture
+def comment(create_user, post):
+    """Return a helper that adds a comment to the post."""
+    content_type = ContentType.objects.get_for_model(Post)
+
+    def add(body, parent=None):
+        return Comment.objects.create(
+            user=create_user, content_type=content_type, object_id=post.id,
+            parent=parent, body=body
+        )
+    return add
+
+
+@pytest.fixture
+def thread(comment):
+    """
+    Build a thread:
+
+    a
+      a1
+        a1x
+      a2
+      a3
+    b
+    """
+    a = comment("a")
+    a1 = comment("a1", parent=a)
+    a2 = comment("a2", parent=a)
+    a1x = comment("a1x", parent=a1)
+    a3 = comment("a3", parent=a)
+    b = comment("b")
+    return {'a': a, 'a1': a1, 'a2': a2, 'a1x': a1x, 'a3': a3, 'b': b}
+
+
+def _bodies(response):
+    return [item['body'] for item in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestCommentTree:
+    """Test materialized paths and reply counters."""
+
+    def test_paths_and_counters(self, thread):
+        """Test that replies extend the parent's path and bump its count."""
+        a, a1, a1x = (Comment.objects.get(pk=thread[name].pk) for name in ('a', 'a1', 'a1x'))
+
+        assert a1x.path == a.path + comment_tree.encode_segment(a1.pk) + comment_tree.encode_segment(a1x.pk)
+        assert (a.depth, a1.depth, a1x.depth) == (0, 1, 2)
+        assert (a.reply_count, a1.reply_count) == (3, 1)
+        assert Comment.objects.get(pk=thread['a3'].pk).branch_rank == 3
+
+    def test_delete_decrements_reply_count(self, thread):
+        """Test that deleting a reply updates the parent's count."""
+        thread['a2'].delete()
+
+        assert Comment.objects.get(pk=thread['a'].pk).reply_count == 2
+
+    def test_migration_backfill_matches_signals(self, thread):
+        """Test that the migration rebuilds the same tree for existing rows."""
+        fields = ('path', 'depth', 'branch_rank', 'reply_count')
+        expected = list(Comment.objects.order_by('id').values_list(*fields))
+        Comment.objects.update(path='', depth=0, branch_rank=0, reply_count=0)
+
+        migration = importlib.import_module('apps.content.migrations.0007_comment_tree')
+        migration.build_paths(apps, None)
+
+        assert list(Comment.objects.order_by('id').values_list(*fields)) == expected
+
+    def test_replies_count_is_served_from_the_column(self, authenticated_client, post, thread):
+        """Test that the serializer reports the denormalized count."""
+        response = authenticated_client.get(reverse('posts-comments', args=[post.id]))
+
+        assert {item['body']: item['replies_count'] for item in response.data} == {'a': 3, 'b': 0}
+
+
+@pytest.mark.django_db
+class TestThreadEndpoints:
+    """Test loading whole threads and windows of them."""
+
+    def test_whole_thread_in_one_query(self, authenticated_client, post, thread, django_assert_max_num_queries):
+        """Test that the whole thread comes back depth-first."""
+        url = reverse('posts-thread', args=[post.id])
+        authenticated_client.get(url)  # Warm caches
+
+        with django_assert_max_num_queries(6):
+            response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert _bodies(response) == ["a", "a1", "a1x", "a2", "a3", "b"]
+        assert response.data['next'] is None
+
+    def test_depth_and_width_window(self, authenticated_client, post, thread):
+        """Test that the window drops deep levels and later siblings."""
+        url = reverse('posts-thread', args=[post.id])
+
+        response = authenticated_client.get(url, {'max_depth': 2, 'max_width': 1})
+
+        assert _bodies(response) == ["a", "a1", "b"]
+
+    def test_cursor_continuation(self, authenticated_client, post, thread):
+        """Test that pages follow each other without gaps or repeats."""
+        url = reverse('posts-thread', args=[post.id])
+        bodies = []
+
+        response = authenticated_client.get(url, {'page_size': 4})
+        bodies += _bodies(response)
+        response = authenticated_client.get(response.data['next'])
+        bodies += _bodies(response)
+
+        assert bodies == ["a", "a1", "a1x", "a2", "a3", "b"]
+        assert response.data['next'] is None
+
+    def test_subtree_continuation(self, authenticated_client, thread):
+        """Test loading the rest of a branch below a comment."""
+        url = reverse('comments-thread', args=[thread['a'].pk])
+
+        response = authenticated_client.get(url, {'max_width': 1})
+        assert _bodies(response) == ["a1", "a1x"]
+
+        response = authenticated_client.get(url, {'max_depth': 1})
+        assert _bodies(response) == ["a1", "a2", "a3"]
+
+    def test_wide_thread_continuation(self, authenticated_client, post, comment):
+        """Test that a continuation returns the next max_width siblings, page by page."""
+        top = comment("top")
+        replies = [comment(f"r{i}", parent=top) for i in range(1, 4)]
+        for i in range(1, 5):
+            comment(f"c{i}", parent=replies[1])
+
+        response = authenticated_client.get(reverse('posts-thread', args=[post.id]), {'max_width': 2})
+        assert _bodies(response) == ["top", "r1", "r2", "c1", "c2"]
+
+        url = reverse('comments-thread', args=[replies[1].pk])
+        response = authenticated_client.get(url, {'max_width': 1})
+        assert _bodies(response) == ["c3"]
+
+        response = authenticated_client.get(url, {'max_width': 2, 'page_size': 1})
+        assert _bodies(response) == ["c3"]
+        response = authenticated_client.get(response.data['next'])
+        assert _bodies(response) == ["c4"]
+        assert response.data['next'] is None
+
+    def test_invalid_window(self, authenticated_client, post):
+        """Test that bad window parameters are rejected."""
+        response = authenticated_client.get(reverse('posts-thread', args=[post.id]), {'max_depth': 0})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_reply_depth_limit(self, authenticated_client, thread, monkeypatch):
+        """Test that replies below the maximum depth are refused."""
+        monkeypatch.setattr(comment_tree, 'MAX_DEPTH', 1)
+        url = reverse('comments-add-reply', args=[thread['a1'].pk])
+
+        response = authenticated_client.post(url, {
+            'body': "Too deep",
+            'content_type': thread['a1'].content_type_id,
+            'object_id': thread['a1'].object_id,
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['detail'] == "Maximum reply depth reached."
@@ -0,0 +1,108 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from apps.content.models import Post, Tag, Media
+from apps.content.serializers import PostSerializer, CommentSerializer
+from apps.content.visibility import visible_posts_q
+from apps.interactions.models import Notification
+from apps.interactions.serializers import NotificationSerializer
+from apps.users.models import User
+from socisphere.compiled_serializers import compile_serializer
+
+
+def _render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.fixture
+def posts(create_user):
+    """Create posts covering nested, nullable and derived fields."""
+    other = User.objects.create_user(
+        username="other",
+        email="other@example.com",
+        password="password123",
+        profile_image="profile_images/other.png"
+    )
+    python = Tag.objects.create(name="Python", slug="python")
+    django = Tag.objects.create(name="Django", slug="django")
+
+    tagged = Post.objects.create(user=create_user, title="Tagged", body="Two tags")
+    tagged.tags.add(python, django)
+    Media.objects.create(post=tagged, type='image', file="post_media/b.jpg", position=1, width=10)
+    Media.objects.create(post=tagged, type='image', file="post_media/a.jpg", position=0)
+
+    expired = Post.objects.create(
+        user=other, body="Gone", visibility="followers",
+        expires_at=timezone.now() - timedelta(hours=1)
+    )
+    expired.tags.add(python)
+    plain = Post.objects.create(user=other, body="No extras", visibility="private")
+    return [plain, expired, tagged]
+
+
+@pytest.mark.django_db
+class TestCompiledParity:
+    """Test that compiled rendering is byte-identical to the serializers."""
+
+    def test_post_serializer(self, posts):
+        """Test posts with nested users, tags and media."""
+        queryset = Post.objects.order_by('-id')
+        expected = _render(PostSerializer(queryset, many=True).data)
+
+        assert _render(compile_serializer(PostSerializer).render(queryset)) == expected
+
+    def test_absolute_file_urls(self, posts):
+        """Test that file URLs are built from the request like DRF does."""
+        request = APIRequestFactory().get('/')
+        queryset = Post.objects.order_by('-id')
+        expected = _render(PostSerializer(queryset, many=True, context={'request': request}).data)
+
+        assert _render(compile_serializer(PostSerializer).render(queryset, request)) == expected
+
+    @override_settings(TIME_ZONE='Asia/Jerusalem')
+    def test_notification_serializer(self, create_user):
+        """Test notifications, including null and set timestamps."""
+        Notification.objects.create(recipient=create_user, notification_type='like', title="Liked", message="x")
+        Notification.objects.create(
+            recipient=create_user, notification_type='system', title="Read", message="y",
+            link="https://example.com", is_read=True, read_at=timezone.now()
+        )
+        queryset = Notification.objects.order_by('id')
+        expected = _render(NotificationSerializer(queryset, many=True).data)
+
+        assert _render(compile_serializer(NotificationSerializer).render(queryset)) == expected
+
+    def test_list_endpoint(self, authenticated_client, create_user, posts):
+        """Test that the compiled list endpoint returns the serializer output."""
+        Post.objects.create(user=posts[0].user, body="Public")
+        response = authenticated_client.get(reverse('posts-list'))
+
+        visible = Post.objects.filter(visible_posts_q(create_user)).order_by('-created_at', '-id')
+        assert len(visible) == 2
+        request = response.wsgi_request
+        expected = PostSerializer(visible, many=True, context={'request': request}).data
+        assert _render(response.data['results']) == _render(expected)
+
+    def test_method_fields_are_rejected(self):
+        """Test that serializers with method fields cannot be compiled."""
+        with pytest.raises(ImproperlyConfigured):
+            compile_serializer(CommentSerializer)
+
+
+@pytest.mark.django_db
+def test_benchmark_command(posts):
+    """Test that the benchmark reports throughput for both modes."""
+    out = StringIO()
+    call_command('benchmark_serializers', '--repeat', '2', stdout=out)
+
+    assert "serializer:" in out.getvalue()
+    assert "compiled:" in out.getvalue()
+    assert "rows/sec" in out.getvalue()
@@ -0,0 +1,81 @@
+import math
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+
+from apps.content import engagement
+from apps.content.models import Post, Reaction, Comment, SavedContent
+from apps.users.models import User
+
+
+@pytest.mark.django_db
+class TestEngagementScores:
+    """Test incremental time-decayed engagement scores."""
+
+    @pytest.fixture
+    def fan(self):
+        """Create a user who engages with posts."""
+        return User.objects.create_user(
+            username="fan",
+            email="fan@example.com",
+            password="password123"
+        )
+
+    @pytest.fixture
+    def post(self, create_user):
+        """Create a post for testing."""
+        return Post.objects.create(user=create_user, body="Engaging content")
+
+    def _engage(self, post, user):
+        content_type = ContentType.objects.get_for_model(Post)
+        Reaction.objects.create(user=user, content_type=content_type, object_id=post.id, reaction_type='like')
+        Comment.objects.create(user=user, content_type=content_type, object_id=post.id, body="Nice")
+        SavedContent.objects.create(user=user, content_type=content_type, object_id=post.id)
+
+    def test_events_update_score_incrementally(self, post, fan):
+        """Test that reactions, comments and saves raise the score."""
+        self._engage(post, fan)
+        post.refresh_from_db()
+
+        expected = math.log(sum(engagement.WEIGHTS[k] for k in ('reaction', 'comment', 'save')))
+        expected += engagement.DECAY_RATE * (post.created_at - engagement.EPOCH).total_seconds()
+        assert post.engagement_score == pytest.approx(expected, abs=1e-3)
+
+    def test_recent_engagement_outranks_old(self, create_user, fan):
+        """Test that equal engagement scores higher when it happened later."""
+        old_post = Post.objects.create(user=create_user, body="Old")
+        new_post = Post.objects.create(user=create_user, body="New")
+        earlier = new_post.created_at - timedelta(hours=engagement.HALF_LIFE_HOURS)
+
+        engagement.record_engagement(Post, old_post.id, 'reaction', at=earlier)
+        engagement.record_engagement(Post, new_post.id, 'reaction', at=new_post.created_at)
+        old_post.refresh_from_db()
+        new_post.refresh_from_db()
+
+        # One half-life apart is exactly a factor of two in linear space
+        assert new_post.engagement_score - old_post.engagement_score == pytest.approx(math.log(2))
+
+    def test_recompute_matches_incremental(self, post, fan):
+        """Test that the bulk recompute agrees with the incremental path."""
+        self._engage(post, fan)
+        post.refresh_from_db()
+        incremental = post.engagement_score
+
+        Post.objects.filter(id=post.id).update(engagement_score=0.0)
+        out = StringIO()
+        call_command('recompute_engagement', stdout=out)
+        post.refresh_from_db()
+
+        assert post.engagement_score == pytest.approx(incremental, abs=1e-3)
+        assert "Recomputed engagement scores for 1 posts" in out.getvalue()
+
+    def test_recompute_resets_posts_without_engagement(self, post):
+        """Test that drifted scores without events are reset."""
+        Post.objects.filter(id=post.id).update(engagement_score=42.0)
+
+        engagement.recompute_scores(Post)
+        post.refresh_from_db()
+
+        assert post.engagement_score == 0.0
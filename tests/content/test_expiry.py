@@ -0,0 +1,102 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.communities.models import Community, CommunityPost
+from apps.content import expiry
+from apps.content.models import Post, Tag, ArchivedContent
+
+
+@pytest.fixture
+def posts(create_user):
+    """Create live, expired and never-expiring posts."""
+    now = timezone.now()
+    tag = Tag.objects.create(name="Flash", slug="flash")
+    expired = [
+        Post.objects.create(user=create_user, body=f"Gone {i}", expires_at=now - timedelta(hours=i + 1))
+        for i in range(3)
+    ]
+    expired[0].tags.add(tag)
+    live = Post.objects.create(user=create_user, body="Still here", expires_at=now + timedelta(hours=1))
+    forever = Post.objects.create(user=create_user, body="Forever")
+    return {'expired': expired, 'live': live, 'forever': forever}
+
+
+@pytest.mark.django_db
+class TestExpiryExclusion:
+    """Test that expired posts disappear before the sweeper runs."""
+
+    def test_post_list_and_feed_skip_expired(self, authenticated_client, posts):
+        """Test that lists only return unexpired posts."""
+        expected = {"Still here", "Forever"}
+
+        response = authenticated_client.get(reverse('posts-list'))
+        assert {item['body'] for item in response.data['results']} == expected
+
+        response = authenticated_client.get(reverse('feed'))
+        assert {item['body'] for item in response.data['results']} == expected
+
+    def test_expired_post_detail_is_gone(self, authenticated_client, posts):
+        """Test that an expired post cannot be fetched directly."""
+        response = authenticated_client.get(reverse('posts-detail', args=[posts['expired'][0].id]))
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestExpirySweeper:
+    """Test removing expired rows in batches."""
+
+    def test_sweep_in_batches_reports_progress(self, posts):
+        """Test that the oldest rows go first, one bounded batch at a time."""
+        calls = []
+
+        removed = expiry.sweep(Post, batch_size=2, max_batches=1, pause=0,
+                               progress=lambda model, count, lag: calls.append((count, lag)))
+
+        assert removed == 2
+        assert set(Post.objects.values_list('body', flat=True)) == {"Gone 0", "Still here", "Forever"}
+        assert calls[0][0] == 2
+        assert 3000 < calls[0][1] < 4000
+        assert expiry.stats()['content.Post']['pending'] == 1
+
+        assert expiry.sweep(Post, batch_size=2, pause=0) == 1
+        assert expiry.stats()['content.Post'] == {'pending': 0, 'lag_seconds': 0.0}
+
+    def test_archive_keeps_a_copy(self, posts):
+        """Test that archiving copies columns and tags before deleting."""
+        expiry.sweep(Post, action='archive', pause=0)
+
+        archived = ArchivedContent.objects.get(object_id=posts['expired'][0].id)
+        assert archived.data['body'] == "Gone 0"
+        assert archived.data['tags'] == [Tag.objects.get().id]
+        assert ArchivedContent.objects.count() == 3
+        assert not Post.objects.filter(body__startswith="Gone").exists()
+
+    def test_command_sweeps_community_posts(self, create_user):
+        """Test that the command covers community posts too."""
+        community = Community.objects.create(
+            name="Test", slug="test", description="Test community", creator=create_user
+        )
+        CommunityPost.objects.create(
+            user=create_user, community=community, title="Old", body="Old",
+            expires_at=timezone.now() - timedelta(minutes=5)
+        )
+        out = StringIO()
+
+        call_command('sweep_expired_content', '--pause', '0', stdout=out)
+
+        assert not CommunityPost.objects.exists()
+        assert "communities.CommunityPost: 1 removed" in out.getvalue()
+        assert "Swept 1 expired rows (delete)" in out.getvalue()
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason="checks the SQLite query plan")
+    def test_sweeper_uses_partial_index(self):
+        """Test that the expired-row scan reads the partial index."""
+        plan = Post.objects.filter(expires_at__lte=timezone.now()).order_by('expires_at').explain()
+
+        assert 'post_expires_at_idx' in plan
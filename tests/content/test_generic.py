@@ -0,0 +1,67 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content.generic import resolve
+from apps.content.models import Post, Comment, SavedContent
+
+
+@pytest.fixture
+def posts(create_user):
+    """Create a few posts to save and comment on."""
+    return [Post.objects.create(user=create_user, title=f"Post {i}", body="Body") for i in range(3)]
+
+
+def _save(user, obj):
+    return SavedContent.objects.create(
+        user=user, content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk
+    )
+
+
+@pytest.mark.django_db
+class TestGenericResolution:
+    """Test batched generic foreign key loading."""
+
+    def test_one_query_per_content_type(self, create_user, posts, django_assert_num_queries):
+        """Test that targets of mixed types load with one query per type."""
+        comment = Comment.objects.create(user=create_user, content_object=posts[0], body="Nice")
+        for obj in posts + [comment]:
+            _save(create_user, obj)
+        saved = list(SavedContent.objects.all())
+
+        with django_assert_num_queries(2):
+            resolve(saved, select_related=['user'])
+        with django_assert_num_queries(0):
+            assert [str(row.content_object) for row in saved[:3]] == [str(post) for post in posts]
+            assert saved[3].content_object == comment
+
+    def test_missing_targets_resolve_to_none(self, create_user, posts, django_assert_num_queries):
+        """Test that rows pointing at deleted objects do not query again."""
+        _save(create_user, posts[0])
+        posts[0].delete()
+        saved = list(SavedContent.objects.prefetch_generic())
+
+        with django_assert_num_queries(0):
+            assert saved[0].content_object is None
+
+    def test_saved_content_list_has_a_constant_query_count(self, authenticated_client, create_user, posts):
+        """Test that listing saved content does not query per row."""
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = authenticated_client.get(reverse('saved-content-list'))
+            assert response.status_code == status.HTTP_200_OK
+            return len(queries)
+
+        _save(create_user, posts[0])
+        few = count_queries()
+        for post in posts[1:]:
+            _save(create_user, post)
+        for i in range(3):
+            _save(create_user, Post.objects.create(user=create_user, body=f"More {i}"))
+
+        assert count_queries() == few
+        response = authenticated_client.get(reverse('saved-content-list'))
+        assert response.data['results'][-1]['content_object_repr'] == str(posts[0])
@@ -0,0 +1,135 @@
+import json
+import pytest
+from io import StringIO
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content import ingest, search
+from apps.content.models import Blob, Post, Tag, Media, TimelineEntry
+from apps.content.storage import blob_storage
+from apps.interactions.models import Connection, Notification
+from apps.users.models import User
+
+
+@pytest.fixture
+def admin_client(api_client):
+    """Return a client authenticated as a staff user."""
+    admin = User.objects.create_user(
+        username="admin", email="admin@example.com", password="password123", is_staff=True
+    )
+    api_client.force_authenticate(user=admin)
+    return api_client
+
+
+@pytest.fixture
+def author():
+    """Create the author of the imported posts."""
+    return User.objects.create_user(username="author", email="author@example.com", password="password123")
+
+
+def _ndjson(*rows):
+    return '\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows) + '\n'
+
+
+@pytest.mark.django_db
+class TestIngestEndpoint:
+    """Test importing posts over the API."""
+
+    def test_ingest_writes_posts_and_side_effects(self, admin_client, author, create_user):
+        """Test that posts, tags, media, mentions and timelines are written in batch."""
+        Connection.objects.create(follower=create_user, followed=author)
+        body = _ndjson(
+            {'user': author.id, 'body': "Hello @testuser", 'tags': ['Travel', 'travel'],
+             'created_at': '2024-05-01T12:00:00Z'},
+            {'user': author.id, 'title': "Gallery", 'body': "Photos", 'tags': ['Photos'],
+             'media': [{'type': 'image', 'file': 'post_media/a.jpg', 'width': 640, 'height': 480}]},
+            '{not json',
+            {'user': 9999, 'body': "Nobody"},
+            {'user': author.id, 'body': "Bad", 'visibility': 'secret'},
+        )
+
+        response = admin_client.post(
+            reverse('posts-ingest'), body, content_type='application/x-ndjson'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert (response.data['received'], response.data['created'], response.data['failed']) == (5, 2, 3)
+        assert [error['line'] for error in response.data['errors']] == [3, 4, 5]
+
+        first = Post.objects.get(body="Hello @testuser")
+        assert first.created_at.year == 2024
+        assert list(first.tags.values_list('slug', flat=True)) == ['travel']
+        assert set(Tag.objects.values_list('slug', flat=True)) == {'travel', 'photos'}
+        assert Media.objects.get().width == 640
+        assert Notification.objects.filter(recipient=create_user, notification_type='mention').count() == 1
+        assert TimelineEntry.objects.filter(user=create_user).count() == 2
+        assert [post_id for post_id, _ in search.search_post_ids("gallery")] == [
+            Post.objects.get(title="Gallery").id
+        ]
+
+    def test_ingest_requires_admin(self, authenticated_client, author):
+        """Test that regular users cannot import posts."""
+        response = authenticated_client.post(
+            reverse('posts-ingest'), _ndjson({'user': author.id, 'body': "Hi"}),
+            content_type='application/x-ndjson'
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not Post.objects.exists()
+
+    def test_failed_batch_is_retried_row_by_row(self, author, monkeypatch):
+        """Test that one bad row does not lose the rest of its batch."""
+        notify = ingest.mentions.notify_mentions
+
+        def fail_on_boom(posts):
+            if any('boom' in post.body for post in posts):
+                raise DatabaseError("boom")
+            return notify(posts)
+        monkeypatch.setattr(ingest.mentions, 'notify_mentions', fail_on_boom)
+
+        report = ingest.ingest_lines(
+            _ndjson(*({'user': author.id, 'body': body} for body in ["one", "boom", "three"])).splitlines()
+        )
+
+        assert (report.created, report.failed) == (2, 1)
+        assert report.errors[0]['line'] == 2
+        assert set(Post.objects.values_list('body', flat=True)) == {"one", "three"}
+
+    def test_tag_names_taken_under_another_slug_are_reused(self, author):
+        """Test that a tag whose name exists with a different slug is linked, not lost."""
+        existing = Tag.objects.create(name="django", slug="django-framework")
+
+        report = ingest.ingest_lines(_ndjson({'user': author.id, 'body': "Tagged", 'tags': ['django']}).splitlines())
+
+        assert (report.created, report.failed) == (1, 0)
+        assert list(Post.objects.get().tags.all()) == [existing]
+
+    def test_ingested_media_references_its_blob(self, author, settings, tmp_path):
+        """Test that media pointing at a stored blob counts as a reference, like saved media."""
+        settings.MEDIA_ROOT = tmp_path
+        name = blob_storage().save("photo.jpg", ContentFile(b"photo"))
+
+        ingest.ingest_lines(_ndjson(
+            {'user': author.id, 'body': "Photo", 'media': [{'type': 'image', 'file': name}]}
+        ).splitlines())
+
+        assert Blob.objects.get(name=name).ref_count == 1
+        Media.objects.get().delete()
+        assert Blob.objects.get(name=name).ref_count == 0
+
+
+@pytest.mark.django_db
+def test_ingest_posts_command(tmp_path, author):
+    """Test importing a file from the command line in batches."""
+    path = tmp_path / 'posts.ndjson'
+    path.write_text(_ndjson(*({'user': author.id, 'body': f"Post {i}"} for i in range(5))))
+    out = StringIO()
+
+    call_command('ingest_posts', str(path), '--batch-size', '2', stdout=out)
+
+    assert Post.objects.count() == 5
+    assert out.getvalue().count("posts created") == 3
+    assert "Imported 5 of 5 posts" in out.getvalue()
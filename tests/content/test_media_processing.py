@@ -0,0 +1,127 @@
+import pytest
+from datetime import timedelta
+from io import BytesIO, StringIO
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from apps.content import imaging, media_processing
+from apps.content.models import Post, Media
+
+
+def _png(width, height, mode='RGBA'):
+    buffer = BytesIO()
+    Image.new(mode, (width, height), (200, 40, 40, 128) if mode == 'RGBA' else (200, 40, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Store uploads and variants in a temporary directory."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def post(create_user):
+    """Create a post to attach media to."""
+    return Post.objects.create(user=create_user, body="Look at this")
+
+
+class TestImaging:
+    """Test decoding and resizing."""
+
+    def test_render_caps_widths_at_the_original(self):
+        """Test that small images are re-encoded, not upscaled."""
+        result = imaging.render(_png(200, 100), [320, 640], ['webp', 'jpeg'], 80)
+
+        assert (result['width'], result['height']) == (200, 100)
+        assert [(v['width'], v['height'], v['format']) for v in result['variants']] == [
+            (200, 100, 'webp'), (200, 100, 'jpeg')
+        ]
+        assert Image.open(BytesIO(result['variants'][1]['data'])).mode == 'RGB'
+
+
+@pytest.mark.django_db
+class TestMediaProcessing:
+    """Test the processing of uploaded media."""
+
+    def test_upload_is_processed_after_commit(self, authenticated_client, post, media_root,
+                                              django_capture_on_commit_callbacks):
+        """Test that an upload gets dimensions and variant URLs."""
+        upload = SimpleUploadedFile("photo.png", _png(2000, 1000), content_type="image/png")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(
+                reverse('posts-add-media', args=[post.id]),
+                {'post': post.id, 'type': 'image', 'file': upload}
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['status'] == 'pending'
+
+        media = Media.objects.get()
+        assert (media.status, media.width, media.height) == ('ready', 2000, 1000)
+        assert [(v['width'], v['format']) for v in media.variants] == [
+            (320, 'webp'), (320, 'jpeg'), (640, 'webp'), (640, 'jpeg'), (1280, 'webp'), (1280, 'jpeg')
+        ]
+        assert all((media_root / variant['name']).exists() for variant in media.variants)
+
+        response = authenticated_client.get(reverse('posts-detail', args=[post.id]))
+        variants = response.data['media'][0]['variants']
+        assert variants[0] == {
+            'width': 320, 'height': 160, 'format': 'webp', 'url': f"/media/{media.variants[0]['name']}"
+        }
+
+    def test_broken_image_fails_and_can_be_retried(self, post, media_root):
+        """Test that undecodable files are marked failed and retried by the command."""
+        (media_root / 'post_media').mkdir()
+        (media_root / 'post_media' / 'broken.png').write_bytes(b"not an image")
+        media = Media.objects.create(post=post, type='image', file='post_media/broken.png')
+
+        assert media_processing.process(media.pk) is False
+        assert Media.objects.get().status == 'failed'
+
+        (media_root / 'post_media' / 'broken.png').write_bytes(_png(50, 50, 'RGB'))
+        out = StringIO()
+        call_command('process_media', '--retry-failed', stdout=out)
+
+        assert "Processed 1 media, 0 failed" in out.getvalue()
+        assert Media.objects.get().width == 50
+
+    def test_abandoned_claims_are_taken_over(self, post):
+        """Test that rows left processing by a dead worker are reclaimed once stale, and live claims are not."""
+        abandoned = Media.objects.create(post=post, type='document', file='post_media/a.pdf')
+        working = Media.objects.create(post=post, type='document', file='post_media/b.pdf')
+        Media.objects.filter(pk=abandoned.pk).update(
+            status='processing', processing_started_at=timezone.now() - timedelta(hours=1)
+        )
+        Media.objects.filter(pk=working.pk).update(status='processing', processing_started_at=timezone.now())
+
+        out = StringIO()
+        call_command('process_media', stdout=out)
+
+        assert "Processed 1 media, 0 failed" in out.getvalue()
+        assert dict(Media.objects.values_list('pk', 'status')) == {
+            abandoned.pk: 'ready', working.pk: 'processing'
+        }
+
+    def test_non_images_are_ready_as_is(self, post):
+        """Test that documents skip decoding."""
+        media = Media.objects.create(post=post, type='document', file='post_media/a.pdf')
+
+        assert media_processing.process(media.pk) is True
+        assert Media.objects.get().status == 'ready'
+
+
+def test_render_in_process_pool(monkeypatch):
+    """Test that decoding runs in a worker process."""
+    monkeypatch.setattr(media_processing, 'ASYNC', True)
+
+    result = media_processing._render(_png(800, 400))
+
+    assert (result['width'], result['height']) == (800, 400)
+    assert len(result['variants']) == 6
@@ -0,0 +1,136 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.content import media_serving
+from apps.content.models import Post, Media
+from apps.interactions.models import Connection, Message, MessageAttachment
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Store served files in a temporary directory."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def video(create_user):
+    """Create public post media holding ten bytes."""
+    post = Post.objects.create(user=create_user, body="Clip")
+    media = Media(post=post, type='video')
+    media.file.save("clip.mp4", ContentFile(b"0123456789"))
+    return media
+
+
+def _get(client, name, **headers):
+    return client.get(reverse('media-file', args=[name]), headers=headers)
+
+
+def _body(response):
+    return b"".join(response.streaming_content)
+
+
+class TestParseRange:
+    """Test Range header parsing."""
+
+    def test_ranges(self):
+        """Test bounded, open, suffix, ignored and unsatisfiable ranges."""
+        assert media_serving.parse_range("bytes=2-5", 10) == (2, 5)
+        assert media_serving.parse_range("bytes=8-", 10) == (8, 9)
+        assert media_serving.parse_range("bytes=5-100", 10) == (5, 9)
+        assert media_serving.parse_range("bytes=-3", 10) == (7, 9)
+        assert media_serving.parse_range("bytes=0-1,4-5", 10) is None
+        assert media_serving.parse_range("items=0-1", 10) is None
+        with pytest.raises(ValueError):
+            media_serving.parse_range("bytes=10-", 10)
+
+
+@pytest.mark.django_db
+class TestMediaServing:
+    """Test the media file view."""
+
+    def test_full_and_partial_responses(self, api_client, video):
+        """Test that whole files and byte ranges are streamed."""
+        response = _get(api_client, video.file.name)
+        assert response.status_code == status.HTTP_200_OK
+        assert _body(response) == b"0123456789"
+        assert response['Accept-Ranges'] == 'bytes'
+        assert response['Content-Type'] == 'video/mp4'
+        etag = response['ETag']
+        assert etag.strip('"') in video.file.name
+
+        response = _get(api_client, video.file.name, Range="bytes=2-5")
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert _body(response) == b"2345"
+        assert response['Content-Range'] == 'bytes 2-5/10'
+        assert response['Content-Length'] == '4'
+
+        response = _get(api_client, video.file.name, Range="bytes=20-")
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == 'bytes */10'
+
+        # A stale If-Range gets the whole, current file
+        response = _get(api_client, video.file.name, Range="bytes=2-5", **{'If-Range': '"old"'})
+        assert response.status_code == status.HTTP_200_OK
+
+        response = _get(api_client, video.file.name, **{'If-None-Match': etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_private_attachments_need_access(self, authenticated_client, create_user):
+        """Test that message attachments are only served to the conversation."""
+        friend = User.objects.create_user(username="friend", email="friend@example.com", password="password123")
+        stranger = User.objects.create_user(username="stranger", email="stranger@example.com", password="password123")
+        message = Message.objects.create(sender=friend, recipient=create_user, body="Secret")
+        attachment = MessageAttachment(message=message, type='document', file_name="plan.pdf", file_size=6)
+        attachment.file.save("plan.pdf", ContentFile(b"secret"))
+
+        assert _get(APIClient(), attachment.file.name).status_code == status.HTTP_403_FORBIDDEN
+        other = APIClient()
+        other.force_authenticate(user=stranger)
+        assert _get(other, attachment.file.name).status_code == status.HTTP_403_FORBIDDEN
+
+        response = _get(authenticated_client, attachment.file.name)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Cache-Control'].startswith('private')
+
+    def test_media_follows_post_visibility(self, authenticated_client, create_user, video):
+        """Test that media on restricted posts is only served to those who can see the post."""
+        follower = User.objects.create_user(username="follower", email="follower@example.com", password="password123")
+        Connection.objects.create(follower=follower, followed=create_user)
+        Post.objects.filter(pk=video.post_id).update(visibility='followers')
+        name = video.file.name
+
+        assert _get(APIClient(), name).status_code == status.HTTP_403_FORBIDDEN
+        following = APIClient()
+        following.force_authenticate(user=follower)
+        response = _get(following, name)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Cache-Control'].startswith('private')
+        assert _get(authenticated_client, name).status_code == status.HTTP_200_OK
+
+        # The same blob on a public post is public
+        Media.objects.create(post=Post.objects.create(user=follower, body="Repost"), type='video', file=name)
+        assert _get(APIClient(), name).status_code == status.HTTP_200_OK
+
+    def test_unfinished_and_outside_files_are_hidden(self, api_client, media_root):
+        """Test that partial uploads and paths outside MEDIA_ROOT are not served."""
+        (media_root / 'uploads' / 'partial').mkdir(parents=True)
+        (media_root / 'uploads' / 'partial' / '1.part').write_bytes(b"half")
+
+        assert _get(api_client, 'uploads/partial/1.part').status_code == status.HTTP_404_NOT_FOUND
+        assert _get(api_client, 'blobs/../../etc/passwd').status_code == status.HTTP_404_NOT_FOUND
+        assert _get(api_client, 'missing.png').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_front_server_handoff(self, api_client, video, monkeypatch):
+        """Test that X-Accel-Redirect mode leaves the transfer to nginx."""
+        monkeypatch.setattr(media_serving, 'MODE', 'x-accel')
+
+        response = _get(api_client, video.file.name)
+
+        assert response['X-Accel-Redirect'] == f"/protected-media/{video.file.name}"
+        assert response.content == b""
+        assert 'Content-Type' not in response
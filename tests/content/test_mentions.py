@@ -0,0 +1,69 @@
+import threading
+import pytest
+
+from apps.content import mentions
+from apps.content.models import Post
+from apps.interactions.models import Notification
+from apps.users.models import User
+
+
+@pytest.fixture
+def fans():
+    """Create users who get mentioned."""
+    return [
+        User.objects.create_user(
+            username=f"fan{i}",
+            email=f"fan{i}@example.com",
+            password="password123"
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestMentionPipeline:
+    """Test resolving mentions and delivering their notifications."""
+
+    def test_notifications_wait_for_commit(self, create_user, fans, django_capture_on_commit_callbacks,
+                                           django_assert_num_queries):
+        """Test that delivery runs after commit as one lookup, one insert and one counter update."""
+        body = "Hi @fan0 @fan1 @fan2 @fan0 @nobody and me @testuser"
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            Post.objects.create(user=create_user, body=body)
+        assert not Notification.objects.exists()
+
+        with django_assert_num_queries(3):
+            callbacks[0]()
+        assert set(Notification.objects.values_list('recipient__username', flat=True)) == {
+            'fan0', 'fan1', 'fan2'
+        }
+
+    def test_renamed_and_new_users_resolve(self, fans):
+        """Test that renamed and newly registered users resolve correctly."""
+        assert mentions.resolve({'fan0', 'newcomer'}) == {'fan0': fans[0].id}
+
+        fans[0].username = 'renamed'
+        fans[0].save()
+        newcomer = User.objects.create_user(
+            username='newcomer', email='newcomer@example.com', password='password123'
+        )
+
+        assert mentions.resolve({'fan0', 'renamed', 'newcomer'}) == {
+            'renamed': fans[0].id, 'newcomer': newcomer.id
+        }
+
+    def test_dispatch_runs_off_the_calling_thread(self, monkeypatch):
+        """Test that asynchronous delivery uses a worker thread."""
+        monkeypatch.setattr(mentions, 'ASYNC', True)
+        done = threading.Event()
+        threads = []
+
+        def job():
+            threads.append(threading.current_thread())
+            done.set()
+
+        mentions.dispatch(job)
+
+        assert done.wait(5)
+        assert threads[0] is not threading.current_thread()
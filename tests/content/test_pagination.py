@@ -0,0 +1,56 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content.models import Post
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test keyset pagination on the post list endpoint."""
+
+    @pytest.fixture
+    def posts(self, create_user):
+        """Create posts that share a timestamp so the id tie-breaker matters."""
+        posts = [Post.objects.create(user=create_user, body=f"Post {i}") for i in range(7)]
+        Post.objects.filter(id__in=[p.id for p in posts[2:5]]).update(created_at=posts[2].created_at)
+        return list(Post.objects.order_by('-created_at', '-id'))
+
+    def _get(self, client, url):
+        return client.get(url.split('http://testserver')[-1])
+
+    def test_first_page_has_no_count_or_previous(self, authenticated_client, posts):
+        """Test the response envelope of the first page."""
+        response = authenticated_client.get(reverse('posts-list'), {'page_size': 3})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' not in response.data
+        assert response.data['previous'] is None
+        assert [item['id'] for item in response.data['results']] == [p.id for p in posts[:3]]
+
+    def test_forward_and_backward_navigation(self, authenticated_client, posts):
+        """Test walking forward to the end and back to the start."""
+        response = authenticated_client.get(reverse('posts-list'), {'page_size': 3})
+        seen = [item['id'] for item in response.data['results']]
+        while response.data['next']:
+            response = self._get(authenticated_client, response.data['next'])
+            seen += [item['id'] for item in response.data['results']]
+
+        assert seen == [p.id for p in posts]
+
+        response = self._get(authenticated_client, response.data['previous'])
+        assert [item['id'] for item in response.data['results']] == [p.id for p in posts[3:6]]
+
+    def test_new_rows_do_not_shift_pages(self, authenticated_client, create_user, posts):
+        """Test that posts created between requests do not repeat rows."""
+        response = authenticated_client.get(reverse('posts-list'), {'page_size': 3})
+        Post.objects.create(user=create_user, body="Brand new")
+
+        response = self._get(authenticated_client, response.data['next'])
+        assert [item['id'] for item in response.data['results']] == [p.id for p in posts[3:6]]
+
+    def test_invalid_cursor(self, authenticated_client, posts):
+        """Test that a malformed cursor is rejected."""
+        response = authenticated_client.get(reverse('posts-list'), {'cursor': 'not-a-cursor'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
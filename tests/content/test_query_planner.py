@@ -0,0 +1,104 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from apps.communities.serializers import CommunityPostSerializer
+from apps.content.models import Post, Tag, Media
+from apps.content.serializers import PostSerializer
+from apps.interactions.models import Connection
+from apps.users.models import User
+from socisphere.query_planner import plan
+
+
+class TestPlan:
+    """Test the eager-loading plan derived from serializers."""
+
+    def test_post_serializer_plan(self):
+        """Test that nested users are joined and to-many relations prefetched."""
+        assert plan(PostSerializer) == (('user',), ('media', 'reaction_counters', 'tags'))
+
+    def test_nested_plan_follows_serializers(self):
+        """Test that relations of nested serializers are planned too."""
+        select, prefetch = plan(CommunityPostSerializer)
+        assert select == ('community__creator', 'user')
+        assert prefetch == ('community__moderators', 'reaction_counters', 'tags')
+
+
+@pytest.mark.django_db
+class TestQueryCounts:
+    """Test that list endpoints run a constant number of queries per page."""
+
+    def _create_posts(self, count, start=0):
+        tag = Tag.objects.get_or_create(name="Planner", slug="planner")[0]
+        for i in range(start, start + count):
+            author = User.objects.create_user(
+                username=f"author{i}",
+                email=f"author{i}@example.com",
+                password="password123"
+            )
+            post = Post.objects.create(user=author, body=f"Post {i}")
+            post.tags.add(tag)
+            Media.objects.create(post=post, type='image', file=f"media/{i}.jpg")
+
+    def _count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        return len(queries)
+
+    def test_post_list(self, authenticated_client):
+        """Test that more posts do not mean more queries."""
+        self._create_posts(2)
+        authenticated_client.get(reverse('posts-list'))  # Warm the visibility cache
+        few = self._count_queries(authenticated_client, reverse('posts-list'))
+
+        self._create_posts(5, start=2)
+        many = self._count_queries(authenticated_client, reverse('posts-list'))
+
+        assert few == many
+
+    def test_search_results(self, authenticated_client):
+        """Test that ranked search results, a list of posts, have their relations loaded per page."""
+        self._create_posts(2)
+        url = f"{reverse('content-search')}?q=post"
+        authenticated_client.get(url)  # Warm the visibility cache
+        few = self._count_queries(authenticated_client, url)
+
+        self._create_posts(5, start=2)
+        many = self._count_queries(authenticated_client, url)
+
+        assert few == many
+
+    def _follow(self, user, count):
+        for i in range(count):
+            followed = User.objects.create_user(
+                username=f"followed{i}",
+                email=f"followed{i}@example.com",
+                password="password123"
+            )
+            Connection.objects.create(follower=user, followed=followed)
+
+    def test_connection_list(self, authenticated_client, create_user):
+        """Test that both nested users of a connection are joined."""
+        self._follow(create_user, 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse('connections-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 3
+        assert not any('"users_user"."id" =' in query['sql'] for query in queries.captured_queries)
+
+    def test_debug_mode_reports_lazy_loads(self, authenticated_client, create_user, settings, monkeypatch):
+        """Test that lazy loads missed by the plan are counted in a header."""
+        settings.QUERY_PLANNER_DEBUG = True
+        self._follow(create_user, 3)
+
+        response = authenticated_client.get(reverse('connections-list'))
+        assert response['X-Lazy-Loads'] == '0'
+
+        monkeypatch.setattr('socisphere.query_planner.plan_queryset', lambda queryset, serializer_class: queryset)
+        response = authenticated_client.get(reverse('connections-list'))
+        assert response['X-Lazy-Loads'] == '6'
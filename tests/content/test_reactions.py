@@ -0,0 +1,210 @@
+import pytest
+from io import StringIO
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content import reactions
+from apps.content.models import Post, Comment, Reaction, ReactionCounter
+from apps.interactions.models import Notification
+from apps.users.models import User
+
+
+@pytest.fixture
+def post(create_user):
+    """Create a post to react to."""
+    return Post.objects.create(user=create_user, body="React to me")
+
+
+@pytest.fixture
+def fans():
+    """Create users who react."""
+    return [
+        User.objects.create_user(
+            username=f"fan{i}",
+            email=f"fan{i}@example.com",
+            password="password123"
+        )
+        for i in range(3)
+    ]
+
+
+def _counts(obj):
+    content_type = ContentType.objects.get_for_model(obj)
+    counter = ReactionCounter.objects.filter(content_type=content_type, object_id=obj.id).first()
+    return {reaction_type: count for reaction_type, count in reactions.summarize(counter).items() if count}
+
+
+@pytest.mark.django_db
+class TestReactionCounters:
+    """Test that counters follow reactions."""
+
+    def test_react_create_switch_remove(self, authenticated_client, post):
+        """Test the counters across the react toggle."""
+        url = reverse('posts-react', args=[post.id])
+
+        assert authenticated_client.post(url, {'reaction_type': 'like'}).status_code == status.HTTP_201_CREATED
+        assert _counts(post) == {'like': 1}
+
+        assert authenticated_client.post(url, {'reaction_type': 'love'}).status_code == status.HTTP_200_OK
+        assert _counts(post) == {'love': 1}
+        assert Reaction.objects.get().reaction_type == 'love'
+
+        assert authenticated_client.post(url, {'reaction_type': 'love'}).status_code == status.HTTP_204_NO_CONTENT
+        assert _counts(post) == {}
+
+    def test_unknown_reaction_type(self, authenticated_client, post):
+        """Test that reaction types outside the choices are rejected."""
+        response = authenticated_client.post(reverse('posts-react', args=[post.id]), {'reaction_type': 'meh'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Reaction.objects.exists()
+
+    def test_reconcile_repairs_drift(self, post, fans):
+        """Test that the reconcile command recounts from the reaction table."""
+        content_type = ContentType.objects.get_for_model(Post)
+        for fan in fans:
+            Reaction.objects.create(user=fan, content_type=content_type, object_id=post.id, reaction_type='like')
+        ReactionCounter.objects.update(like_count=7, sad_count=2)
+
+        out = StringIO()
+        call_command('reconcile_reaction_counters', stdout=out)
+
+        assert _counts(post) == {'like': 3}
+        assert "Repaired 1 reaction counters" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestReactionSummaries:
+    """Test the reaction summary embedded in serialized content."""
+
+    def _react(self, obj, users, reaction_type):
+        content_type = ContentType.objects.get_for_model(obj)
+        for user in users:
+            Reaction.objects.create(user=user, content_type=content_type, object_id=obj.id, reaction_type=reaction_type)
+
+    def test_post_list_summary(self, authenticated_client, post, fans, django_assert_max_num_queries):
+        """Test that post lists embed summaries without per-row queries."""
+        self._react(post, fans[:2], 'like')
+        self._react(post, fans[2:], 'wow')
+        for i in range(5):
+            Post.objects.create(user=fans[0], body=f"Quiet {i}")
+        authenticated_client.get(reverse('posts-list'))  # Warm caches
+
+        with django_assert_max_num_queries(7):
+            response = authenticated_client.get(reverse('posts-list'))
+
+        summary = {item['id']: item['reactions'] for item in response.data['results']}[post.id]
+        assert summary == {'like': 2, 'love': 0, 'laugh': 0, 'sad': 0, 'angry': 0, 'wow': 1, 'support': 0}
+
+    def test_comment_summary(self, authenticated_client, post, fans):
+        """Test that comments embed their reaction summary."""
+        comment = Comment.objects.create(
+            user=fans[0], content_type=ContentType.objects.get_for_model(Post),
+            object_id=post.id, body="Nice"
+        )
+        self._react(comment, fans, 'support')
+
+        response = authenticated_client.get(reverse('posts-comments', args=[post.id]))
+
+        assert response.data[0]['reactions']['support'] == 3
+
+
+@pytest.mark.django_db
+class TestReactionUpsert:
+    """Test the batched reaction writes."""
+
+    def test_upsert_reads_then_writes_once(self, post, fans, django_assert_num_queries):
+        """Test that a write reports the type it replaced with one locking read and one upsert."""
+        content_type = ContentType.objects.get_for_model(Post)
+
+        with django_assert_num_queries(2):
+            [row] = reactions.upsert(fans[0].id, [(content_type.id, post.id, 'like')])
+        assert (row['reaction_type'], row['previous_type']) == ('like', '')
+
+        with django_assert_num_queries(2):
+            [row] = reactions.upsert(fans[0].id, [(content_type.id, post.id, 'wow')])
+        assert (row['reaction_type'], row['previous_type']) == ('wow', 'like')
+        assert Reaction.objects.count() == 1
+
+    def test_double_tap_toggles_off(self, post, fans):
+        """Test that repeating a reaction removes it and its side effects stay balanced."""
+        content_type = ContentType.objects.get_for_model(Post)
+
+        assert reactions.toggle(fans[0], content_type.id, post.id, 'like')[0] == 'created'
+        assert reactions.toggle(fans[0], content_type.id, post.id, 'like')[0] == 'removed'
+
+        assert not Reaction.objects.exists()
+        assert _counts(post) == {}
+        assert Notification.objects.filter(recipient=post.user, notification_type='like').count() == 1
+
+
+@pytest.mark.django_db
+class TestReactionBatch:
+    """Test applying many reactions in one request."""
+
+    def test_batch_sets_and_clears(self, api_client, post, fans, django_assert_max_num_queries):
+        """Test that a batch writes every reaction and batches its side effects."""
+        post_type = ContentType.objects.get_for_model(Post)
+        comment = Comment.objects.create(
+            user=post.user, content_type=post_type, object_id=post.id, body="Hello"
+        )
+        comment_type = ContentType.objects.get_for_model(Comment)
+        others = [Post.objects.create(user=post.user, body=f"More {i}") for i in range(3)]
+        Reaction.objects.create(user=fans[0], content_type=post_type, object_id=others[0].id, reaction_type='sad')
+        api_client.force_authenticate(user=fans[0])
+        url = reverse('reactions-batch')
+        payload = {'reactions': [
+            {'content_type': post_type.id, 'object_id': post.id, 'reaction_type': 'like'},
+            {'content_type': comment_type.id, 'object_id': comment.id, 'reaction_type': 'like'},
+            {'content_type': post_type.id, 'object_id': others[0].id, 'reaction_type': None},
+            {'content_type': post_type.id, 'object_id': others[1].id, 'reaction_type': None},
+            {'content_type': post_type.id, 'object_id': others[2].id, 'reaction_type': 'love'},
+        ]}
+        api_client.get(reverse('posts-list'))  # Warm caches
+
+        with django_assert_max_num_queries(19):
+            response = api_client.post(url, payload, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['status'] for item in response.data['results']] == [
+            'created', 'created', 'removed', 'absent', 'created'
+        ]
+        assert _counts(post) == {'like': 1}
+        assert _counts(comment) == {'like': 1}
+        assert _counts(others[0]) == {}
+        assert Notification.objects.filter(recipient=post.user, notification_type='like').count() == 2
+
+        # Replaying the same queue changes nothing
+        response = api_client.post(url, payload, format='json')
+        assert [item['status'] for item in response.data['results']] == [
+            'unchanged', 'unchanged', 'absent', 'absent', 'unchanged'
+        ]
+        assert _counts(post) == {'like': 1}
+        assert Notification.objects.filter(recipient=post.user, notification_type='like').count() == 2
+
+    def test_batch_skips_invisible_targets(self, api_client, create_user, fans):
+        """Test that private posts of other users cannot be reacted to."""
+        hidden = Post.objects.create(user=create_user, body="Secret", visibility='private')
+        api_client.force_authenticate(user=fans[0])
+
+        response = api_client.post(reverse('reactions-batch'), {'reactions': [
+            {'content_type': ContentType.objects.get_for_model(Post).id, 'object_id': hidden.id, 'reaction_type': 'like'},
+        ]}, format='json')
+
+        assert response.data['results'][0]['status'] == 'not_found'
+        assert not Reaction.objects.exists()
+
+    def test_batch_size_limit(self, authenticated_client, post):
+        """Test that oversized and malformed batches are rejected."""
+        item = {'content_type': ContentType.objects.get_for_model(Post).id, 'object_id': post.id, 'reaction_type': 'meh'}
+
+        response = authenticated_client.post(reverse('reactions-batch'), {'reactions': [item]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        item['reaction_type'] = 'like'
+        response = authenticated_client.post(
+            reverse('reactions-batch'), {'reactions': [item] * (reactions.BATCH_MAX_SIZE + 1)}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,122 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content import search
+from apps.content.models import Post, Tag, SearchDocument
+from apps.interactions.models import Connection
+from apps.users.models import User
+
+
+@pytest.fixture
+def author():
+    """Create an author for testing."""
+    return User.objects.create_user(
+        username="author",
+        email="author@example.com",
+        password="password123"
+    )
+
+
+@pytest.fixture
+def posts(author):
+    """Create posts with varying relevance for 'django'."""
+    title_match = Post.objects.create(user=author, title="Django tips", body="Some advice")
+    body_match = Post.objects.create(user=author, title="Notes", body="I once used django for a project")
+    other = Post.objects.create(user=author, title="Cooking", body="Pasta recipes")
+    return title_match, body_match, other
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('backend_class', [search.FTS5SearchBackend, search.PythonSearchBackend])
+class TestSearchBackends:
+    """Test both search index backends."""
+
+    def _backend(self, backend_class, posts):
+        backend = backend_class()
+        if not backend.is_available():
+            pytest.skip("FTS5 is not available")
+        backend.clear()
+        for post in posts:
+            backend.index_post(post)
+        return backend
+
+    def test_ranks_title_matches_first(self, backend_class, posts):
+        """Test that BM25 ranking prefers the weighted title field."""
+        backend = self._backend(backend_class, posts)
+        title_match, body_match, _ = posts
+
+        assert [post_id for post_id, _ in backend.search("django")] == [title_match.id, body_match.id]
+
+    def test_all_tokens_must_match(self, backend_class, posts):
+        """Test that every query token must match, with prefix matching."""
+        backend = self._backend(backend_class, posts)
+
+        assert [post_id for post_id, _ in backend.search("djan proj")] == [posts[1].id]
+        assert backend.search("django pasta") == []
+
+    def test_remove_post(self, backend_class, posts):
+        """Test removing a post from the index."""
+        backend = self._backend(backend_class, posts)
+        backend.remove_post(posts[0].id)
+
+        assert [post_id for post_id, _ in backend.search("django")] == [posts[1].id]
+
+
+@pytest.mark.django_db
+class TestSearchIndexSync:
+    """Test that the index follows posts and tags."""
+
+    @pytest.fixture(autouse=True)
+    def python_backend(self, settings):
+        """Use the pure-Python backend so index rows can be inspected."""
+        settings.SEARCH_BACKEND = 'python'
+
+    def test_post_save_and_delete(self, author):
+        """Test that saving indexes a post and deleting removes it."""
+        post = Post.objects.create(user=author, body="Indexed on save")
+        assert SearchDocument.objects.filter(post=post).exists()
+
+        post.delete()
+        assert not SearchDocument.objects.exists()
+
+    def test_tag_changes_reindex(self, author):
+        """Test that adding and renaming tags updates the index."""
+        tag = Tag.objects.create(name="Gardening", slug="gardening")
+        post = Post.objects.create(user=author, body="Tomatoes")
+        post.tags.add(tag)
+        assert [post_id for post_id, _ in search.search_post_ids("gardening")] == [post.id]
+
+        tag.name = "Horticulture"
+        tag.save()
+        assert search.search_post_ids("gardening") == []
+        assert [post_id for post_id, _ in search.search_post_ids("horticulture")] == [post.id]
+
+    def test_rebuild_command(self, posts):
+        """Test rebuilding the index from scratch."""
+        SearchDocument.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+
+        assert SearchDocument.objects.count() == 3
+        assert "Indexed 3 posts using the python search backend" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestContentSearchView:
+    """Test the content search endpoint."""
+
+    def test_results_are_ranked_and_visibility_filtered(self, authenticated_client, create_user, author, posts):
+        """Test that only visible matches are returned in relevance order."""
+        hidden = Post.objects.create(user=author, title="Django secrets", body="x", visibility="followers")
+
+        response = authenticated_client.get(reverse('content-search'), {'q': 'django'})
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [posts[0].id, posts[1].id]
+
+        Connection.objects.create(follower=create_user, followed=author)
+        response = authenticated_client.get(reverse('content-search'), {'q': 'django'})
+        assert hidden.id in [item['id'] for item in response.data['results']]
@@ -0,0 +1,112 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content.models import Post, TimelineEntry
+from apps.content import timelines
+from apps.interactions.models import Connection
+from apps.users.models import User
+
+
+@pytest.mark.django_db
+class TestMaterializedTimelines:
+    """Test fan-out-on-write home timelines."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Reset the cached heavy-author set between tests."""
+        cache.clear()
+        yield
+        cache.clear()
+
+    @pytest.fixture
+    def author(self):
+        """Create an author for testing."""
+        return User.objects.create_user(
+            username="author",
+            email="author@example.com",
+            password="password123"
+        )
+
+    def test_post_fans_out_to_followers(self, create_user, author):
+        """Test that a new post is written into followers' timelines."""
+        Connection.objects.create(follower=create_user, followed=author)
+        post = Post.objects.create(user=author, body="Hello followers")
+
+        entry = TimelineEntry.objects.get(user=create_user, post=post)
+        assert entry.author == author
+        assert entry.created_at == post.created_at
+
+    def test_private_post_is_not_fanned_out(self, create_user, author):
+        """Test that private posts never reach timelines."""
+        Connection.objects.create(follower=create_user, followed=author)
+        post = Post.objects.create(user=author, body="Secret", visibility="private")
+
+        assert not TimelineEntry.objects.filter(post=post).exists()
+
+    def test_visibility_change_removes_entries(self, create_user, author):
+        """Test that making a post private removes it from timelines."""
+        Connection.objects.create(follower=create_user, followed=author)
+        post = Post.objects.create(user=author, body="Soon private")
+        assert TimelineEntry.objects.filter(post=post).exists()
+
+        post.visibility = 'private'
+        post.save()
+
+        assert not TimelineEntry.objects.filter(post=post).exists()
+
+    def test_follow_backfills_and_unfollow_purges(self, create_user, author):
+        """Test that following copies recent posts and unfollowing removes them."""
+        posts = [Post.objects.create(user=author, body=f"Post {i}") for i in range(3)]
+
+        connection = Connection.objects.create(follower=create_user, followed=author)
+        assert set(
+            TimelineEntry.objects.filter(user=create_user).values_list('post_id', flat=True)
+        ) == {post.id for post in posts}
+
+        connection.delete()
+        assert not TimelineEntry.objects.filter(user=create_user).exists()
+
+    def test_heavy_author_is_merged_at_read_time(self, create_user, author, monkeypatch):
+        """Test that authors above the fan-out limit are read from the post table."""
+        monkeypatch.setattr(timelines, 'FANOUT_MAX_FOLLOWERS', 0)
+        monkeypatch.setattr(timelines, 'RECENT_PUBLIC_SIZE', 0)
+        Connection.objects.create(follower=create_user, followed=author)
+        post = Post.objects.create(user=author, body="Too popular", visibility="followers")
+
+        assert not TimelineEntry.objects.filter(post=post).exists()
+        assert list(timelines.feed_queryset(create_user)) == [post]
+
+    def test_feed_view_reads_timeline(self, authenticated_client, create_user, author):
+        """Test that the feed endpoint returns fanned-out and recent public posts."""
+        stranger = User.objects.create_user(
+            username="stranger",
+            email="stranger@example.com",
+            password="password123"
+        )
+        Connection.objects.create(follower=create_user, followed=author)
+        followers_only = Post.objects.create(user=author, body="For followers", visibility="followers")
+        public = Post.objects.create(user=stranger, body="Public post")
+        Post.objects.create(user=stranger, body="Hidden", visibility="followers")
+
+        response = authenticated_client.get(reverse('feed'))
+
+        assert response.status_code == status.HTTP_200_OK
+        ids = [item['id'] for item in response.data['results']]
+        assert ids == [public.id, followers_only.id]
+
+    def test_rebuild_timelines_command(self, create_user, author):
+        """Test rebuilding timelines from follows."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        Connection.objects.create(follower=create_user, followed=author)
+        post = Post.objects.create(user=author, body="Rebuild me")
+        TimelineEntry.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_timelines', user=create_user.username, stdout=out)
+
+        assert TimelineEntry.objects.filter(user=create_user, post=post).exists()
+        assert "Rebuilt 1 timelines with 1 entries" in out.getvalue()
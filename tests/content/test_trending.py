@@ -0,0 +1,120 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from apps.content import trending
+from apps.content.models import Post, Tag, Reaction, PostActivityBucket, TrendingSnapshot
+from apps.users.models import User
+
+
+@pytest.mark.django_db
+class TestTrendingSnapshots:
+    """Test hourly activity buckets and trending snapshots."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Reset the refresh lock between tests."""
+        cache.clear()
+        yield
+        cache.clear()
+
+    @pytest.fixture
+    def fans(self):
+        """Create users who react to posts."""
+        return [
+            User.objects.create_user(
+                username=f"fan{i}",
+                email=f"fan{i}@example.com",
+                password="password123"
+            )
+            for i in range(3)
+        ]
+
+    @pytest.fixture
+    def tags(self):
+        """Create tags for testing."""
+        return (
+            Tag.objects.create(name="Python", slug="python"),
+            Tag.objects.create(name="Django", slug="django"),
+        )
+
+    def _like(self, post, users):
+        content_type = ContentType.objects.get_for_model(Post)
+        for user in users:
+            Reaction.objects.create(user=user, content_type=content_type, object_id=post.id, reaction_type='like')
+
+    def test_reactions_fill_hourly_buckets(self, create_user, fans):
+        """Test that engagement is accumulated into the current hour bucket."""
+        post = Post.objects.create(user=create_user, body="Bucket me")
+        self._like(post, fans)
+
+        bucket = PostActivityBucket.objects.get(post=post)
+        assert bucket.score == pytest.approx(3.0)
+        assert bucket.hour.minute == 0
+
+    def test_snapshot_ranks_posts_and_tags(self, create_user, fans, tags):
+        """Test that the snapshot orders posts and tags by windowed activity."""
+        python, django = tags
+        hot = Post.objects.create(user=create_user, body="Hot")
+        hot.tags.add(python)
+        warm = Post.objects.create(user=create_user, body="Warm")
+        warm.tags.add(django)
+        self._like(hot, fans)
+        self._like(warm, fans[:1])
+
+        trending.refresh_snapshot()
+
+        assert [post.id for post in trending.trending_posts()] == [hot.id, warm.id]
+        assert [tag.id for tag in trending.trending_tags()] == [python.id, django.id]
+
+    def test_old_buckets_leave_the_window(self, create_user):
+        """Test that buckets outside the window are ignored and pruned."""
+        post = Post.objects.create(user=create_user, body="Yesterday's news")
+        old_hour = timezone.now() - timedelta(hours=trending.WINDOW_HOURS + 1)
+        trending.record_activity([post.id], 10.0, at=old_hour)
+
+        entries, pruned = trending.refresh_snapshot()
+
+        assert entries == 0
+        assert pruned == 1
+        assert not TrendingSnapshot.objects.exists()
+
+    def test_private_posts_are_not_trending(self, create_user, fans):
+        """Test that non-public posts never enter the snapshot."""
+        post = Post.objects.create(user=create_user, body="Secret", visibility="private")
+        self._like(post, fans)
+
+        trending.refresh_snapshot()
+
+        assert trending.trending_posts() == []
+
+    def test_trending_endpoints(self, authenticated_client, create_user, fans, tags):
+        """Test the trending posts and tags endpoints."""
+        post = Post.objects.create(user=create_user, body="Endpoint")
+        post.tags.add(tags[0])
+        self._like(post, fans)
+
+        response = authenticated_client.get(reverse('trending'))
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [post.id]
+
+        response = authenticated_client.get(reverse('trending-tags'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0]['slug'] == "python"
+        assert response.data['results'][0]['score'] == pytest.approx(3.0)
+
+    def test_refresh_trending_command(self, create_user, fans):
+        """Test the refresh_trending management command."""
+        post = Post.objects.create(user=create_user, body="Command")
+        self._like(post, fans[:1])
+
+        out = StringIO()
+        call_command('refresh_trending', stdout=out)
+
+        assert "Stored 1 trending entries" in out.getvalue()
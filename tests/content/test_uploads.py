@@ -0,0 +1,145 @@
+import os
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from apps.content import uploads
+from apps.content.models import Post, Media, Blob, Upload
+from apps.interactions.models import Message, MessageAttachment
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Store uploads in a temporary directory."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def message(create_user):
+    """Create a message sent by the test user."""
+    friend = User.objects.create_user(username="friend", email="friend@example.com", password="password123")
+    return Message.objects.create(sender=create_user, recipient=friend, body="Listen")
+
+
+def _start(client, target_type, target_id, file_size, type='audio', file_name="voice.ogg"):
+    return client.post(reverse('uploads-list'), {
+        'target_type': target_type, 'target_id': target_id,
+        'type': type, 'file_name': file_name, 'file_size': file_size
+    })
+
+
+def _chunk(client, upload_id, offset, data):
+    return client.put(
+        f"{reverse('uploads-chunk', args=[upload_id])}?offset={offset}",
+        data, content_type='application/octet-stream'
+    )
+
+
+@pytest.mark.django_db
+class TestResumableUploads:
+    """Test chunked uploads and their attachment."""
+
+    def test_chunks_are_assembled_and_attached_to_a_message(self, authenticated_client, message, media_root):
+        """Test the init, chunk and finalize flow for a message attachment."""
+        response = _start(authenticated_client, 'message', message.id, 10)
+        assert response.status_code == status.HTTP_201_CREATED
+        upload_id = response.data['id']
+
+        assert _chunk(authenticated_client, upload_id, 0, b"hello").data == {'offset': 5, 'file_size': 10}
+        # A lost response is retried from the offset the server reports
+        response = _chunk(authenticated_client, upload_id, 0, b"hello")
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data['offset'] == 5
+
+        _chunk(authenticated_client, upload_id, 5, b"world")
+        assert authenticated_client.get(reverse('uploads-detail', args=[upload_id])).data['received'] == 10
+
+        response = authenticated_client.post(reverse('uploads-finalize', args=[upload_id]))
+
+        assert response.status_code == status.HTTP_201_CREATED
+        attachment = MessageAttachment.objects.get()
+        assert (attachment.file_name, attachment.file_size, attachment.type) == ("voice.ogg", 10, 'audio')
+        assert attachment.file.read() == b"helloworld"
+        assert Blob.objects.get(name=attachment.file.name).ref_count == 1
+        assert Message.objects.get().has_attachment
+        assert not Upload.objects.exists()
+        assert not os.listdir(media_root / uploads.UPLOAD_DIR)
+
+    def test_chunks_must_fit_the_declared_size(self, authenticated_client, message):
+        """Test that oversized chunks and early finalizes are rejected."""
+        upload_id = _start(authenticated_client, 'message', message.id, 4).data['id']
+
+        response = _chunk(authenticated_client, upload_id, 0, b"too long")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        _chunk(authenticated_client, upload_id, 0, b"abc")
+        response = authenticated_client.post(reverse('uploads-finalize', args=[upload_id]))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['detail'] == "Received 3 of 4 bytes."
+
+    def test_upload_to_a_post_creates_media(self, authenticated_client, create_user):
+        """Test that finalizing a post upload adds media to the post."""
+        post = Post.objects.create(user=create_user, body="Slides")
+        upload_id = _start(
+            authenticated_client, 'post', post.id, 3, type='document', file_name="slides.pdf"
+        ).data['id']
+        _chunk(authenticated_client, upload_id, 0, b"pdf")
+
+        response = authenticated_client.post(reverse('uploads-finalize', args=[upload_id]))
+
+        assert response.status_code == status.HTTP_201_CREATED
+        media = Media.objects.get(post=post)
+        assert media.file.name.endswith('.pdf')
+        assert response.data['id'] == media.id
+
+    def test_failed_and_repeated_finalizes(self, authenticated_client, message, monkeypatch):
+        """Test that a failed attach can be retried and a lost partial file is a conflict."""
+        upload_id = _start(authenticated_client, 'message', message.id, 3).data['id']
+        _chunk(authenticated_client, upload_id, 0, b"abc")
+        upload = Upload.objects.get(pk=upload_id)
+
+        def broken(*args):
+            raise RuntimeError("database went away")
+        with monkeypatch.context() as patch:
+            patch.setattr(uploads, '_attach', broken)
+            with pytest.raises(RuntimeError):
+                uploads.finalize(upload)
+        assert Blob.objects.get().ref_count == 0
+        assert os.path.exists(uploads.part_path(upload))
+
+        assert uploads.finalize(upload).file.read() == b"abc"
+        with pytest.raises(uploads.UploadConflict):
+            uploads.finalize(upload)
+
+        upload_id = _start(authenticated_client, 'message', message.id, 3).data['id']
+        _chunk(authenticated_client, upload_id, 0, b"xyz")
+        os.remove(uploads.part_path(Upload.objects.get(pk=upload_id)))
+        response = authenticated_client.post(reverse('uploads-finalize', args=[upload_id]))
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_only_own_targets_accept_uploads(self, authenticated_client, message):
+        """Test that uploads to someone else's message are refused."""
+        reply = Message.objects.create(sender=message.recipient, recipient=message.sender, body="Hi")
+
+        assert _start(authenticated_client, 'message', reply.id, 3).status_code == status.HTTP_403_FORBIDDEN
+        assert _start(authenticated_client, 'post', 999, 3).status_code == status.HTTP_404_NOT_FOUND
+        assert _start(authenticated_client, 'message', message.id, 0).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stale_uploads_are_discarded(self, create_user, message, media_root):
+        """Test that idle uploads and their partial files are removed."""
+        stale = uploads.start(create_user, 'message', message.id, 'audio', "old.ogg", 10)
+        fresh = uploads.start(create_user, 'message', message.id, 'audio', "new.ogg", 10)
+        Upload.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('discard_stale_uploads', stdout=out)
+
+        assert "Discarded 1 stale uploads" in out.getvalue()
+        assert list(Upload.objects.values_list('pk', flat=True)) == [fresh.pk]
+        assert not os.path.exists(uploads.part_path(stale))
@@ -0,0 +1,86 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content.models import Post
+from apps.content.view_counter import ViewCounter, view_counter
+
+
+@pytest.mark.django_db
+class TestViewCounter:
+    """Test the write-behind view counter."""
+
+    @pytest.fixture
+    def counter(self):
+        """Return a counter that only flushes when asked to."""
+        return ViewCounter(flush_interval=3600, max_pending=100, background=False)
+
+    @pytest.fixture
+    def posts(self, create_user):
+        """Create posts for testing."""
+        return [Post.objects.create(user=create_user, body=f"Post {i}") for i in range(2)]
+
+    def test_views_are_buffered_until_flush(self, counter, posts):
+        """Test that views are not written until the buffer is flushed."""
+        for _ in range(3):
+            counter.record(posts[0])
+        counter.record(posts[1])
+
+        posts[0].refresh_from_db()
+        assert posts[0].view_count == 0
+        assert counter.pending() == 4
+
+        assert counter.flush() == 2
+        posts[0].refresh_from_db()
+        posts[1].refresh_from_db()
+        assert posts[0].view_count == 3
+        assert posts[1].view_count == 1
+        assert posts[0].engagement_score > posts[1].engagement_score > 0
+        assert counter.pending() == 0
+
+    def test_size_threshold_triggers_flush(self, posts):
+        """Test that reaching max_pending flushes immediately."""
+        counter = ViewCounter(flush_interval=3600, max_pending=2, background=False)
+        counter.record(posts[0])
+        counter.record(posts[0])
+
+        posts[0].refresh_from_db()
+        assert posts[0].view_count == 2
+
+    def test_background_flush_is_not_run_by_requests(self, posts, monkeypatch):
+        """Test that a due flush wakes the flush thread rather than running in the request."""
+        counter = ViewCounter(flush_interval=3600, max_pending=2, background=True)
+        monkeypatch.setattr(counter, '_ensure_thread', lambda: None)
+        monkeypatch.setattr(counter, 'flush', lambda: pytest.fail("flushed on the request thread"))
+        counter.record(posts[0])
+        assert not counter._wake.is_set()
+
+        counter.record(posts[0])
+        assert counter._wake.is_set()
+        assert counter.pending() == 2
+
+    def test_flush_metrics(self, counter, posts):
+        """Test the metrics reported after a flush."""
+        counter.record(posts[0], count=5)
+        counter.flush()
+
+        stats = counter.stats()
+        assert stats['flushes'] == 1
+        assert stats['flushed_rows'] == 1
+        assert stats['flushed_views'] == 5
+        assert stats['pending'] == 0
+        assert stats['last_flush_at'] is not None
+
+    def test_retrieve_records_view(self, authenticated_client, posts, monkeypatch):
+        """Test that fetching a post buffers a view."""
+        monkeypatch.setattr(view_counter, 'background', False)
+        monkeypatch.setattr(view_counter, 'flush_interval', 3600)
+        view_counter.flush()
+
+        response = authenticated_client.get(reverse('posts-detail', args=[posts[0].id]))
+        assert response.status_code == status.HTTP_200_OK
+        assert view_counter.pending() == 1
+
+        view_counter.flush()
+        posts[0].refresh_from_db()
+        assert posts[0].view_count == 1
@@ -0,0 +1,111 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from apps.content import visibility
+from apps.content.models import Post
+from apps.interactions.models import Connection
+from apps.users.models import User
+
+
+@pytest.mark.django_db
+class TestVisibleAuthorCache:
+    """Test the per-user cache of followed authors."""
+
+    @pytest.fixture
+    def authors(self):
+        """Create authors to follow."""
+        return [
+            User.objects.create_user(
+                username=f"author{i}",
+                email=f"author{i}@example.com",
+                password="password123"
+            )
+            for i in range(3)
+        ]
+
+    def test_follow_and_unfollow_update_cache(self, create_user, authors):
+        """Test that connection changes drop the cached set so it is rebuilt."""
+        Connection.objects.create(follower=create_user, followed=authors[2])
+        assert list(visibility.followed_author_ids(create_user.id)) == [authors[2].id]
+
+        Connection.objects.create(follower=create_user, followed=authors[0])
+        assert list(visibility.followed_author_ids(create_user.id)) == [authors[0].id, authors[2].id]
+
+        Connection.objects.filter(follower=create_user, followed=authors[2]).delete()
+        Connection.objects.get(follower=create_user, followed=authors[0]).delete()
+        assert list(visibility.followed_author_ids(create_user.id)) == []
+
+    def test_rolled_back_follow_leaves_the_set_alone(self, create_user, authors):
+        """Test that the cached set is only changed by committed connections."""
+        visibility.followed_author_ids(create_user.id)
+
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Connection.objects.create(follower=create_user, followed=authors[0])
+                raise RuntimeError
+
+        assert list(visibility.followed_author_ids(create_user.id)) == []
+
+    def test_cached_lookup_skips_the_database(self, create_user, authors):
+        """Test that a warm cache answers without querying connections."""
+        Connection.objects.create(follower=create_user, followed=authors[0])
+        visibility.followed_author_ids(create_user.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            ids = visibility.followed_author_ids(create_user.id)
+
+        assert list(ids) == [authors[0].id]
+        assert len(queries) == 0
+
+    def test_can_view_and_filter_visible(self, create_user, authors):
+        """Test in-memory visibility checks against the cached set."""
+        followed, stranger, _ = authors
+        Connection.objects.create(follower=create_user, followed=followed)
+        shared = Post.objects.create(user=followed, body="Shared", visibility="followers")
+        hidden = Post.objects.create(user=stranger, body="Hidden", visibility="followers")
+        secret = Post.objects.create(user=followed, body="Secret", visibility="private")
+        public = Post.objects.create(user=stranger, body="Public")
+        own = Post.objects.create(user=create_user, body="Mine", visibility="private")
+
+        assert visibility.can_view(create_user, shared)
+        assert not visibility.can_view(create_user, hidden)
+        assert visibility.filter_visible(create_user, [own, hidden, secret, public, shared]) == [own, public, shared]
+
+    def test_large_sets_use_a_subquery(self, create_user, authors, monkeypatch):
+        """Test that large followed sets are filtered with a subquery."""
+        monkeypatch.setattr(visibility, 'MAX_INLINE_IDS', 1)
+        for author in authors[:2]:
+            Connection.objects.create(follower=create_user, followed=author)
+            Post.objects.create(user=author, body="Followers only", visibility="followers")
+        Post.objects.create(user=authors[2], body="Hidden", visibility="followers")
+
+        posts = Post.objects.filter(visibility.visible_posts_q(create_user))
+
+        assert 'interactions_connection' in str(posts.query)
+        assert sorted(post.user_id for post in posts) == [authors[0].id, authors[1].id]
+
+
+@pytest.mark.django_db
+class TestPostListVisibility:
+    """Test the post list query built from the visibility filter."""
+
+    def test_post_list_has_no_distinct(self, authenticated_client, create_user):
+        """Test that the post list returns visible posts without DISTINCT."""
+        author = User.objects.create_user(
+            username="author",
+            email="author@example.com",
+            password="password123"
+        )
+        Connection.objects.create(follower=create_user, followed=author)
+        shared = Post.objects.create(user=author, body="Shared", visibility="followers")
+        Post.objects.create(user=author, body="Secret", visibility="private")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse('posts-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [shared.id]
+        assert not any('DISTINCT' in query['sql'] for query in queries.captured_queries)
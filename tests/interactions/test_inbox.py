@@ -0,0 +1,133 @@
+import importlib
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.interactions import inbox
+from apps.interactions.models import Conversation, ConversationMessage, ConversationRead
+from apps.users.models import User
+
+
+@pytest.fixture
+def friend():
+    """Create a second participant."""
+    return User.objects.create_user(username="friend", email="friend@example.com", password="password123")
+
+
+@pytest.fixture
+def friend_client(friend):
+    """Return an API client authenticated as the second participant."""
+    client = APIClient()
+    client.force_authenticate(user=friend)
+    return client
+
+
+def _conversation(*users):
+    conversation = Conversation.objects.create()
+    conversation.participants.set(users)
+    return conversation
+
+
+def _send(client, conversation, body):
+    response = client.post(reverse('conversation-messages', args=[conversation.id]), {'body': body})
+    assert response.status_code == status.HTTP_201_CREATED
+    return response
+
+
+def _inbox(client):
+    return {row['id']: row for row in client.get(reverse('conversations-list')).data['results']}
+
+
+@pytest.mark.django_db
+class TestConversationInbox:
+    """Test the denormalized conversation inbox."""
+
+    def test_messages_update_pointer_and_counters(self, authenticated_client, friend_client, create_user, friend):
+        """Test that sending moves the pointer and counts unread messages for others only."""
+        conversation = _conversation(create_user, friend)
+        _send(authenticated_client, conversation, "Hello")
+        last = _send(authenticated_client, conversation, "Are you there? " + "x" * 200).data
+
+        row = _inbox(friend_client)[conversation.id]
+        assert row['unread_count'] == 2
+        assert row['last_message']['id'] == last['id']
+        assert row['last_message_preview'] == last['body'][:inbox.PREVIEW_LENGTH]
+        assert _inbox(authenticated_client)[conversation.id]['unread_count'] == 0
+
+        response = friend_client.post(reverse('mark-conversation-read', args=[conversation.id]))
+        assert response.status_code == status.HTTP_200_OK
+        assert _inbox(friend_client)[conversation.id]['unread_count'] == 0
+
+        _send(friend_client, conversation, "Yes")
+        assert _inbox(authenticated_client)[conversation.id]['unread_count'] == 1
+
+    def test_list_query_count_is_constant(self, authenticated_client, create_user, friend):
+        """Test that the inbox does not query per conversation."""
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = authenticated_client.get(reverse('conversations-list'))
+            assert response.status_code == status.HTTP_200_OK
+            return len(queries)
+
+        conversation = _conversation(create_user, friend)
+        inbox.record_message(ConversationMessage.objects.create(conversation=conversation, sender=friend, body="Hi"))
+        few = count_queries()
+        for i in range(5):
+            conversation = _conversation(create_user, friend)
+            inbox.record_message(
+                ConversationMessage.objects.create(conversation=conversation, sender=friend, body=f"Hi {i}")
+            )
+
+        assert count_queries() == few
+
+    def test_rebuild_from_messages(self, create_user, friend):
+        """Test that pointers and counters can be recomputed from raw rows."""
+        conversation = _conversation(create_user, friend)
+        first = ConversationMessage.objects.create(conversation=conversation, sender=friend, body="One")
+        ConversationMessage.objects.create(conversation=conversation, sender=create_user, body="Two")
+        last = ConversationMessage.objects.create(conversation=conversation, sender=friend, body="Three")
+        ConversationRead.objects.create(
+            conversation=conversation, user=create_user, last_read_at=first.created_at + timedelta(microseconds=1)
+        )
+
+        out = StringIO()
+        call_command('rebuild_inbox', stdout=out)
+
+        assert "Rebuilt the inbox of 1 conversations" in out.getvalue()
+        conversation.refresh_from_db()
+        assert (conversation.last_message_id, conversation.last_message_preview) == (last.id, "Three")
+        assert inbox.unread_count(conversation, create_user) == 1
+        assert inbox.unread_count(conversation, friend) == 1
+
+    def test_migration_fills_the_inbox(self, create_user, friend):
+        """Test that migrating fills pointers and counters for existing conversations."""
+        conversation = _conversation(create_user, friend)
+        ConversationMessage.objects.create(conversation=conversation, sender=friend, body="Before the inbox")
+
+        migration = importlib.import_module('apps.interactions.migrations.0006_conversation_inbox')
+        migration.fill_inbox(apps, None)
+
+        conversation.refresh_from_db()
+        assert conversation.last_message_preview == "Before the inbox"
+        assert inbox.unread_count(conversation, create_user) == 1
+
+    def test_deleting_the_newest_message_moves_the_preview_back(self, authenticated_client, create_user, friend):
+        """Test that the inbox falls back to the previous message, or to nothing."""
+        conversation = _conversation(create_user, friend)
+        _send(authenticated_client, conversation, "First")
+        _send(authenticated_client, conversation, "Second")
+
+        ConversationMessage.objects.get(body="Second").delete()
+        conversation.refresh_from_db()
+        assert (conversation.last_message.body, conversation.last_message_preview) == ("First", "First")
+
+        ConversationMessage.objects.get(body="First").delete()
+        conversation.refresh_from_db()
+        assert (conversation.last_message, conversation.last_message_preview) == (None, "")
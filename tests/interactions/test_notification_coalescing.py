@@ -0,0 +1,114 @@
+import pytest
+from datetime import timedelta
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.content.models import Post, Reaction
+from apps.interactions import notification_counter
+from apps.interactions.coalescing import describe
+from apps.interactions.models import Connection, Notification
+from apps.users.models import User
+
+
+@pytest.fixture
+def fans():
+    """Create users who react to and follow the test user."""
+    return [
+        User.objects.create_user(username=f"fan{i}", email=f"fan{i}@example.com", password="password123")
+        for i in range(5)
+    ]
+
+
+def _like(user, post):
+    return Reaction.objects.create(
+        user=user, content_type=ContentType.objects.get_for_model(Post), object_id=post.id, reaction_type='like'
+    )
+
+
+@pytest.mark.django_db
+class TestNotificationCoalescing:
+    """Test grouping notifications by recipient, type and target."""
+
+    def test_likes_share_one_notification(self, create_user, fans):
+        """Test that likes on one post update a single aggregate notification."""
+        post = Post.objects.create(user=create_user, body="Viral")
+        other = Post.objects.create(user=create_user, body="Quiet")
+        for fan in fans:
+            _like(fan, post)
+        _like(fans[0], other)
+
+        notification = Notification.objects.get(target_id=post.id)
+        assert notification.actor_count == 5
+        assert [actor['username'] for actor in notification.recent_actors] == ["fan4", "fan3", "fan2"]
+        assert notification.message == "fan4 and 4 others liked your post: Viral"
+        assert Notification.objects.filter(recipient=create_user, notification_type='like').count() == 2
+        assert notification_counter.get(create_user.pk) == 2
+
+    def test_read_groups_are_reopened_and_old_ones_closed(self, create_user, fans,
+                                                         django_capture_on_commit_callbacks):
+        """Test that new activity marks a read group unread, and groups close after the window."""
+        post = Post.objects.create(user=create_user, body="Hello")
+        _like(fans[0], post)
+        notification = Notification.objects.get()
+        notification.is_read = True
+        notification.save()
+        assert notification_counter.get(create_user.pk) == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            _like(fans[1], post)
+        notification.refresh_from_db()
+        assert (notification.is_read, notification.actor_count) == (False, 2)
+        assert notification.message == "fan1 and fan0 liked your post: Hello"
+        assert notification_counter.get(create_user.pk) == 1
+
+        Notification.objects.update(last_event_at=timezone.now() - timedelta(days=2))
+        _like(fans[2], post)
+        assert list(Notification.objects.order_by('id').values_list('actor_count', flat=True)) == [2, 1]
+
+    def test_coalescing_keeps_the_list_order(self, authenticated_client, create_user, fans):
+        """Test that a grown group keeps its creation time, so an open cursor still reaches it."""
+        older = Post.objects.create(user=create_user, body="Older")
+        newer = Post.objects.create(user=create_user, body="Newer")
+        _like(fans[0], older)
+        _like(fans[0], newer)
+        first_page = authenticated_client.get(reverse('notifications-list'), {'page_size': 1}).data
+        created_at = Notification.objects.get(target_id=older.id).created_at
+
+        _like(fans[1], older)
+
+        notification = Notification.objects.get(target_id=older.id)
+        assert notification.created_at == created_at < notification.last_event_at
+        second_page = authenticated_client.get(first_page['next']).data
+        assert [item['id'] for item in second_page['results']] == [notification.id]
+        assert second_page['results'][0]['actor_count'] == 2
+
+    def test_follows_coalesce_and_repeat_actors_count_once(self, create_user, fans):
+        """Test that follows group per recipient and refollowing does not inflate the count."""
+        for fan in fans[:3]:
+            Connection.objects.create(follower=fan, followed=create_user)
+        Connection.objects.filter(follower=fans[0]).delete()
+        Connection.objects.create(follower=fans[0], followed=create_user)
+
+        notification = Notification.objects.get(notification_type='follow')
+        assert notification.actor_count == 3
+        assert notification.message == "fan0 and 2 others started following you."
+
+        # Still counted once after dropping out of the displayed actors
+        Connection.objects.create(follower=fans[3], followed=create_user)
+        Connection.objects.create(follower=fans[4], followed=create_user)
+        Connection.objects.filter(follower=fans[1]).delete()
+        Connection.objects.create(follower=fans[1], followed=create_user)
+
+        notification.refresh_from_db()
+        assert notification.actor_count == 5
+        assert notification.message == "fan1 and 4 others started following you."
+
+
+def test_describe():
+    """Test naming the actors of a notification."""
+    alice, bob = {'username': "alice"}, {'username': "bob"}
+    assert describe([alice], 1) == "alice"
+    assert describe([alice, bob], 2) == "alice and bob"
+    assert describe([alice], 2) == "alice and 1 other"
+    assert describe([alice, bob], 42) == "alice and 41 others"
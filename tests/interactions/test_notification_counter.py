@@ -0,0 +1,92 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.content import mentions
+from apps.interactions import notification_counter
+from apps.interactions.middleware import NotificationMiddleware
+from apps.interactions.models import Notification
+from apps.users.models import User
+
+
+def _notify(user, **fields):
+    return Notification.objects.create(
+        recipient=user, notification_type='system', title="Hello", message="Hello", **fields
+    )
+
+
+def _stored(user):
+    return User.objects.get(pk=user.pk).unread_notification_count
+
+
+@pytest.mark.django_db
+class TestUnreadNotificationCounter:
+    """Test the cached unread notification counter."""
+
+    def test_counter_follows_notifications(self, authenticated_client, create_user,
+                                           django_capture_on_commit_callbacks):
+        """Test that creating, reading and deleting notifications keep the counter exact."""
+        assert notification_counter.get(create_user.pk) == 0
+        with django_capture_on_commit_callbacks(execute=True):
+            first, second, third = [_notify(create_user) for _ in range(3)]
+            _notify(create_user, is_read=True)
+            mentions.deliver(None, "someone", {create_user.username})
+        assert (notification_counter.get(create_user.pk), _stored(create_user)) == (4, 4)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(reverse('notifications-mark-read', args=[first.id]))
+            authenticated_client.post(reverse('notifications-mark-read', args=[first.id]))
+            authenticated_client.delete(reverse('notifications-detail', args=[second.id]))
+        assert (notification_counter.get(create_user.pk), _stored(create_user)) == (2, 2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Notification.objects.filter(pk=third.pk).delete()
+        assert (notification_counter.get(create_user.pk), _stored(create_user)) == (1, 1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(reverse('mark-all-notifications-read'))
+        assert (notification_counter.get(create_user.pk), _stored(create_user)) == (0, 0)
+
+    def test_middleware_reads_the_cache_once(self, create_user):
+        """Test that a warm counter costs the middleware no queries, even for template responses."""
+        _notify(create_user)
+        notification_counter.get(create_user.pk)
+
+        class TemplateResponse:
+            context_data = {}
+
+        middleware = NotificationMiddleware(
+            get_response=lambda request: middleware.process_template_response(request, TemplateResponse())
+        )
+        request = RequestFactory().get('/')
+        request.user = create_user
+        with CaptureQueriesContext(connection) as queries:
+            response = middleware(request)
+
+        assert len(queries) == 0
+        assert response.context_data['unread_notifications_count'] == 1
+
+    def test_cleanup_and_reconciliation(self, create_user, django_capture_on_commit_callbacks):
+        """Test that cleanup takes deleted rows off the counter and reconciliation repairs drift."""
+        old = [_notify(create_user) for _ in range(3)]
+        _notify(create_user)
+        Notification.objects.filter(pk__in=[n.pk for n in old]).update(
+            created_at=timezone.now() - timedelta(days=90)
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('clean_old_notifications', '--days=30', stdout=StringIO())
+        assert (notification_counter.get(create_user.pk), _stored(create_user)) == (1, 1)
+
+        User.objects.filter(pk=create_user.pk).update(unread_notification_count=50)
+        out = StringIO()
+        call_command('reconcile_notification_counts', stdout=out)
+
+        assert "Reconciled the unread notification counts of 1 users" in out.getvalue()
+        assert (notification_counter.get(create_user.pk), _stored(create_user)) == (1, 1)
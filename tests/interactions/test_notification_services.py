@@ -83,15 +83,16 @@ class TestNotificationCreationServices:
         assert user2.username in notification.message
         assert not notification.is_read
     
-    def test_mention_notification_creation(self, users):
+    def test_mention_notification_creation(self, users, django_capture_on_commit_callbacks):
         """Test notification creation when a user mentions another."""
         user1, user2 = users
         
-        # Create a post with mention
-        post = Post.objects.create(
-            user=user1,
-            body=f"Hello @{user2.username} this is a mention test"
-        )
+        # Create a post with mention; notifications are sent once it commits
+        with django_capture_on_commit_callbacks(execute=True):
+            post = Post.objects.create(
+                user=user1,
+                body=f"Hello @{user2.username} this is a mention test"
+            )
         
         # Check if notification was created
         notifications = Notification.objects.filter(
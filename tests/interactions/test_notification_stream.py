@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.test import AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.interactions import hub, notification_stream
+from apps.interactions.models import Notification, NotificationEvent
+from apps.interactions.views import NotificationStreamView
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def local_hub(monkeypatch):
+    """Give every test its own single-process hub."""
+    monkeypatch.setattr(hub, '_hub', hub.Hub(hub.LocalBackend()))
+
+
+def _notify(user, title="Hello"):
+    return Notification.objects.create(recipient=user, notification_type='system', title=title, message=title)
+
+
+async def _open(user=None, last_event_id=None):
+    query = {'token': str(AccessToken.for_user(user))} if user else {}
+    headers = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+    request = AsyncRequestFactory().get(reverse('notification-stream'), query, headers=headers)
+    return await NotificationStreamView.as_view()(request)
+
+
+async def _next(stream):
+    """Return the next frame as ``(id, event, data)``, or the raw text of other lines."""
+    text = (await asyncio.wait_for(stream.__anext__(), 1)).decode()
+    if not text.startswith('id: '):
+        return text
+    lines = dict(line.split(': ', 1) for line in text.strip().split('\n'))
+    return int(lines['id']), lines['event'], json.loads(lines['data'])
+
+
+@pytest.mark.django_db
+class TestNotificationStream:
+    """Test the Server-Sent Events notification stream."""
+
+    def test_committed_notifications_and_counts_are_pushed(self, authenticated_client, create_user,
+                                                           django_capture_on_commit_callbacks):
+        """Test that new notifications and unread counts arrive after commit."""
+        _notify(create_user, "Old")
+
+        def notify():
+            with django_capture_on_commit_callbacks(execute=True):
+                _notify(create_user, "New")
+
+        def read_all():
+            with django_capture_on_commit_callbacks(execute=True):
+                authenticated_client.post(reverse('mark-all-notifications-read'))
+
+        async def scenario():
+            response = await _open(create_user)
+            stream = response.streaming_content
+            frames = [await _next(stream), await _next(stream)]
+            await sync_to_async(notify)()
+            frames += [await _next(stream), await _next(stream)]
+            await sync_to_async(read_all)()
+            frames.append(await _next(stream))
+            await stream.aclose()
+            return response, frames
+
+        response, frames = async_to_sync(scenario)()
+
+        assert response['Content-Type'] == 'text/event-stream'
+        assert response['Cache-Control'] == 'no-cache'
+        retry, opening, notification, count, cleared = frames
+        assert retry.startswith('retry: ')
+        assert opening[1:] == ('unread_count', {'unread_count': 1})
+        assert notification[1] == 'notification' and notification[2]['title'] == "New"
+        assert count[1:] == ('unread_count', {'unread_count': 2})
+        assert cleared[1:] == ('unread_count', {'unread_count': 0})
+        assert opening[0] == 0
+        assert [frame[0] for frame in frames[2:]] == sorted(NotificationEvent.objects.values_list('id', flat=True))
+
+    def test_resume_from_last_event_id(self, create_user, monkeypatch):
+        """Test that missed events are replayed, and a reset is sent once they are gone."""
+        monkeypatch.setattr(notification_stream, 'REPLAY_SIZE', 3)
+        # No heartbeat interrupts reading the opening frames
+        monkeypatch.setattr(notification_stream, 'HEARTBEAT', 5)
+        for _ in range(5):
+            notification_stream.publish_unread_counts([create_user.pk])
+        ids = list(NotificationEvent.objects.order_by('id').values_list('id', flat=True))
+
+        async def read(stream):
+            frames = []
+            try:
+                while True:
+                    frames.append(await _next(stream))
+            except asyncio.TimeoutError:
+                return frames
+
+        async def opening(last_event_id):
+            stream = (await _open(create_user, last_event_id)).streaming_content
+            await _next(stream)
+            return await read(stream)
+
+        async def resume_then_receive_live():
+            stream = (await _open(create_user, ids[2])).streaming_content
+            await _next(stream)
+            replayed = [await _next(stream) for _ in ids[3:]]
+            # Another worker may commit an event with a lower id after ours
+            for event_id in (ids[3], ids[0]):
+                hub.get_hub().publish(
+                    notification_stream.notification_channel(create_user.pk),
+                    notification_stream.frame(event_id, 'unread_count', {'unread_count': 0})
+                )
+            live = await _next(stream)
+            await stream.aclose()
+            return replayed, live
+
+        replayed, live = async_to_sync(resume_then_receive_live)()
+        assert [frame[0] for frame in replayed] == ids[3:]
+        assert live[0] == ids[0]
+
+        # Too far behind, then pruned
+        assert async_to_sync(opening)(ids[0]) == [(ids[-1], 'reset', {'unread_count': 0})]
+        NotificationEvent.objects.filter(pk=ids[2]).delete()
+        assert async_to_sync(opening)(ids[2])[0][1] == 'reset'
+
+    def test_heartbeats_and_anonymous_requests(self, create_user, monkeypatch):
+        """Test that idle streams get heartbeats and anonymous clients are refused."""
+        monkeypatch.setattr(notification_stream, 'HEARTBEAT', 0.05)
+
+        async def scenario():
+            stream = (await _open(create_user)).streaming_content
+            frames = [await _next(stream) for _ in range(3)]
+            await stream.aclose()
+            return frames, (await _open()).status_code
+
+        frames, anonymous_status = async_to_sync(scenario)()
+
+        assert frames[2] == ': heartbeat\n\n'
+        assert anonymous_status == 401
+
+    def test_batches_are_published_with_constant_queries(self, monkeypatch):
+        """Test that notifications from one bulk insert are pushed with three queries."""
+        monkeypatch.setattr(notification_stream, '_pruned_at', time.monotonic())
+        users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="password123")
+            for i in range(3)
+        ]
+        notifications = Notification.objects.bulk_create([
+            Notification(recipient=user, notification_type='like', title="Like", message="Like")
+            for user in users for _ in range(2)
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            notification_stream.publish_notifications(notifications)
+
+        assert len(queries) == 3
+        assert NotificationEvent.objects.filter(event='notification').count() == 6
+        assert all(NotificationEvent.objects.filter(recipient=user).count() == 3 for user in users)
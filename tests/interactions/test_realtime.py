@@ -0,0 +1,155 @@
+import json
+import threading
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.interactions import hub, realtime
+from apps.interactions.models import Conversation, ConversationMessage
+from apps.interactions.realtime import websocket_application
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def local_hub(monkeypatch):
+    """Give every test its own single-process hub."""
+    monkeypatch.setattr(hub, '_hub', hub.Hub(hub.LocalBackend()))
+
+
+@pytest.fixture(autouse=True)
+def closed_connections(monkeypatch):
+    """Count the connection checks around socket database work instead of closing the test's transaction."""
+    calls = []
+    monkeypatch.setattr(realtime, 'close_old_connections', lambda: calls.append(1))
+    return calls
+
+
+@pytest.fixture
+def friend():
+    """Create a second participant."""
+    return User.objects.create_user(username="friend", email="friend@example.com", password="password123")
+
+
+@pytest.fixture
+def conversation(create_user, friend):
+    """Create a conversation between the test user and a friend."""
+    conversation = Conversation.objects.create()
+    conversation.participants.set([create_user, friend])
+    return conversation
+
+
+def _socket(path, user=None):
+    query = f"token={AccessToken.for_user(user)}" if user else ""
+    return ApplicationCommunicator(websocket_application, {
+        'type': 'websocket', 'path': path, 'query_string': query.encode(), 'headers': []
+    })
+
+
+async def _connect(path, user=None):
+    socket = _socket(path, user)
+    await socket.send_input({'type': 'websocket.connect'})
+    return socket, await socket.receive_output(1)
+
+
+@pytest.mark.django_db
+class TestRealtimeMessaging:
+    """Test WebSocket delivery of conversation messages."""
+
+    def test_posted_messages_are_pushed(self, authenticated_client, conversation, friend,
+                                        django_capture_on_commit_callbacks):
+        """Test that a message posted over HTTP reaches open sockets after commit."""
+        def post_message():
+            with django_capture_on_commit_callbacks(execute=True):
+                authenticated_client.post(
+                    reverse('conversation-messages', args=[conversation.id]), {'body': "Ping"}
+                )
+
+        async def scenario():
+            room, accepted = await _connect(f"/ws/conversations/{conversation.id}/", friend)
+            assert accepted['type'] == 'websocket.accept'
+            inbox, _ = await _connect("/ws/conversations/", friend)
+
+            await sync_to_async(post_message)()
+
+            for socket in (room, inbox):
+                event = json.loads((await socket.receive_output(1))['text'])
+                assert (event['type'], event['conversation'], event['message']['body']) == (
+                    'message', conversation.id, "Ping"
+                )
+                await socket.send_input({'type': 'websocket.disconnect', 'code': 1000})
+                await socket.wait(1)
+
+        async_to_sync(scenario)()
+
+    def test_messages_can_be_sent_over_the_socket(self, conversation, friend, django_capture_on_commit_callbacks):
+        """Test that a socket can send messages, which are stored and echoed."""
+        async def scenario():
+            socket, _ = await _connect(f"/ws/conversations/{conversation.id}/", friend)
+            # Database work runs on the test thread, so commit callbacks are captured there
+            capture = django_capture_on_commit_callbacks(execute=True)
+            await sync_to_async(capture.__enter__)()
+            await socket.send_input({'type': 'websocket.receive', 'text': json.dumps({'type': 'message'})})
+            error = json.loads((await socket.receive_output(1))['text'])
+            await socket.send_input({
+                'type': 'websocket.receive', 'text': json.dumps({'type': 'message', 'body': "Hello"})
+            })
+            assert await socket.receive_nothing(0.2)
+            await sync_to_async(capture.__exit__)(None, None, None)
+            event = json.loads((await socket.receive_output(1))['text'])
+            await socket.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await socket.wait(1)
+            return error, event
+
+        error, event = async_to_sync(scenario)()
+
+        assert error['type'] == 'error' and 'body' in error['errors']
+        assert event['message']['sender']['username'] == "friend"
+        assert ConversationMessage.objects.get().body == "Hello"
+        assert Conversation.objects.get().last_message_preview == "Hello"
+
+    def test_departed_participants_cannot_send(self, conversation, friend, closed_connections):
+        """Test that participation is checked again for each message, with stale connections closed."""
+        async def scenario():
+            socket, _ = await _connect(f"/ws/conversations/{conversation.id}/", friend)
+            await sync_to_async(conversation.participants.remove)(friend)
+            await socket.send_input({
+                'type': 'websocket.receive', 'text': json.dumps({'type': 'message', 'body': "Still here?"})
+            })
+            return await socket.receive_output(1)
+
+        closed = async_to_sync(scenario)()
+
+        assert (closed['type'], closed['code']) == ('websocket.close', 4403)
+        assert not ConversationMessage.objects.exists()
+        # Before and after authenticating, loading the conversation and sending
+        assert len(closed_connections) == 6
+
+    def test_connections_are_checked(self, conversation):
+        """Test that anonymous users and outsiders are turned away."""
+        stranger = User.objects.create_user(username="stranger", email="stranger@example.com", password="password123")
+
+        async def close_code(path, user=None):
+            _, event = await _connect(path, user)
+            assert event['type'] == 'websocket.close'
+            return event['code']
+
+        assert async_to_sync(close_code)(f"/ws/conversations/{conversation.id}/") == 4401
+        assert async_to_sync(close_code)(f"/ws/conversations/{conversation.id}/", stranger) == 4403
+        assert async_to_sync(close_code)("/ws/conversations/999/", stranger) == 4404
+        assert async_to_sync(close_code)("/ws/unknown/", stranger) == 4404
+
+
+def test_sqlite_backend_fans_out_between_instances(tmp_path):
+    """Test that events published by one worker reach another through the shared file."""
+    received = []
+    arrived = threading.Event()
+    subscriber = hub.SQLiteBackend(path=tmp_path / 'events.sqlite3', poll_interval=0.01)
+    subscriber.start(lambda channel, event: (received.append((channel, event)), arrived.set()))
+
+    hub.SQLiteBackend(path=tmp_path / 'events.sqlite3').publish('user.1', '{"type": "message"}')
+
+    assert arrived.wait(2)
+    subscriber.stop()
+    assert received == [('user.1', '{"type": "message"}')]